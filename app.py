@@ -1,7 +1,10 @@
+import logging
 import streamlit as st
-from components.historical_form import display_historical_form
-from components.simulated_form import display_simulated_form
-from utils.api import API_URL
+from config.settings import LOG_LEVEL
+from utils.metrics import start_metrics_server
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+start_metrics_server()
 
 st.set_page_config(
     page_title="Prop Trading Simulator",
@@ -12,14 +15,27 @@ st.set_page_config(
 def main():
     st.title("Prop Trading Account Simulator")
     
-    # Create tabs for different simulation modes
-    tab1, tab2 = st.tabs(["Simulated Parameters", "Historical Data"])
-    
-    with tab1:
-        display_simulated_form()
-        
-    with tab2:
-        display_historical_form()
+    # Create tabs for different simulation modes. Switching tabs reruns the
+    # app and only the open tab is built, and its module imported; each form
+    # is a fragment, so its widgets rerun just that form.
+    tab1, tab2, tab3 = st.tabs(
+        ["Simulated Parameters", "Historical Data", "Run History"], on_change="rerun", key="mode_tab"
+    )
+
+    if tab1.open:
+        from components.simulated_form import display_simulated_form
+        with tab1:
+            display_simulated_form()
+
+    if tab2.open:
+        from components.historical_form import display_historical_form
+        with tab2:
+            display_historical_form()
+
+    if tab3.open:
+        from components.history import display_history
+        with tab3:
+            display_history()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+"""
+Iterations used by Auto Iterations versus always running the cap.
+
+Runs several strategies on the local NumPy engine (no backend needed)
+with the default tolerances. For each one it prints the iterations the
+adaptive run used and its achieved precision. It also prints how far its
+estimates landed from a full run at the cap.
+
+    python -m benchmarks.bench_adaptive --cap 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STRATEGIES = {
+    "GT 55% 40/40": {"account_type": "ftt:GT", "win_percentage": 55.0, "stop_loss": 40.0, "take_profit": 40.0},
+    "Rally 50% 40/40": {"account_type": "ftt:Rally", "win_percentage": 50.0, "stop_loss": 40.0, "take_profit": 40.0},
+    "LeMans 45% 20/60": {"account_type": "ftt:LeMans", "win_percentage": 45.0, "stop_loss": 20.0, "take_profit": 60.0},
+    "Topstep 50K 60% 30/30": {"account_type": "topstep:Fifty", "win_percentage": 60.0, "stop_loss": 30.0, "take_profit": 30.0},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive iteration benchmark")
+    parser.add_argument("--cap", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--balance-tolerance", type=float, default=100.0)
+    parser.add_argument("--end-state-tolerance", type=float, default=1.0)
+    args = parser.parse_args()
+
+    from utils.api import simulate
+    from utils.progressive import is_converged, run_adaptive
+
+    used_total = 0
+    print(f"{'strategy':24s} {'iterations':>10s} {'±balance':>9s} {'±states':>8s} "
+          f"{'Δbalance':>9s} {'Δstates':>8s} {'adaptive':>9s} {'full':>8s}")
+    for name, strategy in STRATEGIES.items():
+        config = {
+            "iterations": args.cap,
+            "max_simulation_days": args.days,
+            "multiplier": 20.0,
+            "round_trip_cost": 4.0,
+            "histogram": True,
+            "histogram_format": "bins",
+            "condition_end_state": "All",
+            "max_payouts": 12,
+            "avg_trades_per_day": 10.0,
+            "seed": 7,
+            **strategy,
+        }
+
+        start = time.perf_counter()
+        for result in run_adaptive(config, args.balance_tolerance, args.end_state_tolerance, engine="local"):
+            pass
+        adaptive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = simulate(config, engine="local")
+        full_seconds = time.perf_counter() - start
+
+        precision = result["precision"]
+        state_width = max(precision["end_state_percentages"].values())
+        state_error = max(
+            abs(result["end_state_percentages"].get(state, 0.0) - percentage)
+            for state, percentage in full["end_state_percentages"].items()
+        )
+        used = result["iterations_completed"]
+        used_total += used
+        flag = "" if is_converged(result, args.balance_tolerance, args.end_state_tolerance) else "  (cap reached)"
+        print(f"{name:24s} {used:10,d} {precision['mean_balance']:9.2f} {state_width:8.2f} "
+              f"{abs(result['mean_balance'] - full['mean_balance']):9.2f} {state_error:8.2f} "
+              f"{adaptive_seconds:8.2f}s {full_seconds:7.2f}s{flag}")
+
+    print(f"Average iterations: {used_total / len(STRATEGIES):,.0f} of {args.cap:,} "
+          f"({100 * used_total / (len(STRATEGIES) * args.cap):.1f}% of the compute)")
+
+
+if __name__ == "__main__":
+    main()
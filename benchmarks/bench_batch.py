@@ -0,0 +1,98 @@
+"""
+Batched versus individual submission of a sweep over one trade file.
+
+Runs the same parameter sweep over a synthetic trade file through
+run_sweep twice against the stub backend: once with /simulate_batch
+advertised, once without (one request per config). For each it prints
+wall time, backend requests and bytes uploaded. Exits non-zero if the
+two disagree on any result, a point fails, batching does not reduce
+the requests, or a backend that advertises batches but does not serve
+/simulate_batch is not handled by falling back to individual requests.
+
+    python -m benchmarks.bench_batch --points 48 --rows 100000 --latency-ms 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_csv import synthetic_csv
+from benchmarks.stub_backend import StubBackend
+
+BASE_CONFIG = {
+    "iterations": 10000,
+    "max_simulation_days": 365,
+    "account_type": "ftt:GT",
+    "multiplier": 20.0,
+    "round_trip_cost": 4.0,
+    "histogram": True,
+    "histogram_format": "bins",
+    "condition_end_state": "All",
+    "max_payouts": 12,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched submission benchmark")
+    parser.add_argument("--points", type=int, default=48)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--batch-max-configs", type=int, default=32)
+    args = parser.parse_args()
+
+    csv_bytes = synthetic_csv(args.rows)
+    configs = [dict(BASE_CONFIG, seed=seed) for seed in range(1, args.points + 1)]
+
+    with StubBackend(latency_ms=args.latency_ms, batch_max_configs=args.batch_max_configs) as stub:
+        os.environ["PROPSIM_API_URL"] = stub.url
+        os.environ["PROPSIM_TRADE_UPLOAD_FORMAT"] = "csv"
+        from utils import api
+        from utils.cache import get_result_cache
+        from utils.sweep import run_sweep
+
+        def sweep(batch_max_configs: int, capabilities=None):
+            """Run the sweep from a cold cache; returns results by point, errors, seconds"""
+            stub.batch_max_configs = batch_max_configs
+            stub.request_count = stub.bytes_received = stub.config_count = 0
+            # Pretend to have just fetched `capabilities`, or fetch them afresh
+            api._capabilities = capabilities or {}
+            api._capabilities_checked_at = time.monotonic() if capabilities else float("-inf")
+            get_result_cache().clear()
+            start = time.perf_counter()
+            points = list(run_sweep(configs, csv_bytes, engine="backend", upload=api.prepare_upload(csv_bytes)))
+            seconds = time.perf_counter() - start
+            results = {p.index: p.results for p in points if p.results is not None}
+            errors = [p.error for p in points if p.error is not None]
+            return results, errors, seconds
+
+        print(f"{args.points} configs over a {len(csv_bytes) / 2**20:.1f} MB trade file, "
+              f"stub latency {args.latency_ms:g} ms")
+        runs = {}
+        for label, limit in (("individual", 0), ("batched", args.batch_max_configs)):
+            results, errors, seconds = sweep(limit)
+            runs[label] = (results, stub.request_count)
+            print(f"  {label:10s} {seconds:6.2f}s  {stub.request_count:4d} requests  "
+                  f"{stub.bytes_received / 2**20:8.1f} MB uploaded  {len(errors)} errors")
+
+        failures = []
+        if runs["batched"][0] != runs["individual"][0] or len(runs["batched"][0]) != args.points:
+            failures.append("batched results differ from individual ones")
+        if runs["batched"][1] >= runs["individual"][1]:
+            failures.append("batching did not reduce the number of requests")
+
+        # Capabilities say batches, the node does not serve them: fall back
+        results, errors, _ = sweep(0, capabilities={"batch_max_configs": args.batch_max_configs})
+        if errors or results != runs["individual"][0]:
+            failures.append(f"no fallback when /simulate_batch is missing: {errors[:1]}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All batch checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Backend requests made when many sessions submit the same config at once.
+
+Runs `--sessions` concurrent identical simulations against the stub
+backend. With coalescing they share one backend request. For comparison,
+the same number of distinct configs (different seeds) each need their own.
+
+    python -m benchmarks.bench_coalescing --sessions 32 --latency-ms 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_transport import CONFIG
+from benchmarks.stub_backend import StubBackend
+
+
+def burst(simulate, configs) -> float:
+    """Start all simulations together and return the wall time until the last finishes"""
+    barrier = threading.Barrier(len(configs))
+
+    def one(config):
+        barrier.wait()
+        return simulate(config, engine="backend")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(configs)) as pool:
+        list(pool.map(one, configs))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request coalescing benchmark")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    with StubBackend(latency_ms=args.latency_ms) as stub:
+        os.environ["PROPSIM_API_URL"] = stub.url
+        from utils import api
+
+        identical = burst(api.simulate, [dict(CONFIG, seed=1)] * args.sessions)
+        identical_requests = stub.request_count
+
+        distinct = burst(api.simulate, [dict(CONFIG, seed=i + 2) for i in range(args.sessions)])
+        distinct_requests = stub.request_count - identical_requests
+
+    print(f"sessions={args.sessions} latency={args.latency_ms}ms")
+    print(f"  identical configs : {identical_requests:3d} backend requests  {identical * 1000:7.1f} ms")
+    print(f"  distinct configs  : {distinct_requests:3d} backend requests  {distinct * 1000:7.1f} ms")
+    print(f"  collapsed calls   : {api._inflight.collapsed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput of validate_csv_file on synthetic trade files, compared with
+the previous infer-then-coerce implementation.
+
+    python -m benchmarks.bench_csv --size-mb 9.5
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+
+class UploadedCsv(io.BytesIO):
+    """BytesIO with the .size attribute of Streamlit's UploadedFile"""
+
+    @property
+    def size(self) -> int:
+        return len(self.getbuffer())
+
+
+def synthetic_csv(rows: int, seed: int = 0) -> bytes:
+    """Trade file with the required columns and realistic value ranges"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp("2020-01-02 09:30:00") + pd.to_timedelta(np.arange(rows) * 17, unit="min")
+    df = pd.DataFrame({
+        "DateTime": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "Return": rng.normal(2.0, 25.0, rows).round(2),
+        "Max Opposite Excursion": -np.abs(rng.normal(0.0, 15.0, rows)).round(2),
+    })
+    return df.to_csv(index=False).encode()
+
+
+def synthetic_csv_of_size(size_mb: float) -> bytes:
+    """Synthetic CSV trimmed to roughly size_mb megabytes"""
+    probe = synthetic_csv(1000)
+    rows = int(size_mb * 1024 * 1024 / (len(probe) / 1000))
+    return synthetic_csv(rows)
+
+
+def legacy_validate(file):
+    """The original implementation: type inference, then re-coercion"""
+    df = pd.read_csv(file)
+    df.columns = df.columns.str.strip()
+    df["Return"] = pd.to_numeric(df["Return"])
+    df["Max Opposite Excursion"] = pd.to_numeric(df["Max Opposite Excursion"])
+    pd.to_datetime(df["DateTime"])
+    if df["Return"].abs().max() > 1000 or df["Max Opposite Excursion"].abs().max() > 1000:
+        return False, "Values outside reasonable range", None
+    return True, None, df
+
+
+def best_time(fn, data: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        file = UploadedCsv(data)
+        start = time.perf_counter()
+        ok = fn(file)[0]
+        timings.append(time.perf_counter() - start)
+        if not ok:
+            raise RuntimeError(f"{fn.__name__} rejected the synthetic file")
+    return min(timings)
+
+
+def main():
+    # Imported here so other benchmarks can reuse the helpers above before
+    # pointing PROPSIM_API_URL at their stub backend
+    from utils.security import validate_csv_file
+
+    parser = argparse.ArgumentParser(description="CSV validation benchmark")
+    parser.add_argument("--size-mb", type=float, default=9.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = synthetic_csv_of_size(args.size_mb)
+    rows = data.count(b"\n") - 1
+    size_mb = len(data) / (1024 * 1024)
+
+    # Row limit lifted so the whole file is parsed
+    current = best_time(lambda f: validate_csv_file(f, max_rows=rows), data, args.repeat)
+    legacy = best_time(legacy_validate, data, args.repeat)
+
+    print(f"{size_mb:.1f} MB, {rows:,} rows")
+    print(f"  legacy  : {legacy:6.3f}s  ({size_mb / legacy:6.1f} MB/s)")
+    print(f"  current : {current:6.3f}s  ({size_mb / current:6.1f} MB/s)  {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Run history: cost on the job path, writer throughput and filter latency.
+
+Records N synthetic runs with binned histograms, the way job workers do.
+It times record() (the only part a job waits for) and how long the
+writer takes to persist everything. It then times the Run History tab's
+filters over the full table. Exits non-zero if record() is slow, runs
+are lost, or a filter misses its index or takes longer than the budget.
+
+    python -m benchmarks.bench_history --runs 20000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ACCOUNTS = ("ftt:Rally", "ftt:Daytona", "ftt:GT", "ftt:LeMans", "topstep:Fifty")
+MULTIPLIERS = (2.0, 5.0, 20.0, 50.0)
+
+# Filters of the Run History tab: (label, query() keyword arguments)
+QUERIES = (
+    ("account", {"account_types": ["ftt:GT"]}),
+    ("account + multiplier", {"account_types": ["ftt:GT", "ftt:Rally"], "ranges": {"multiplier": (20, 20)}}),
+    ("strategy ranges", {"ranges": {"stop_loss": (20, 30), "take_profit": (40, 60), "win_percentage": (50, 55)}}),
+    ("client", {"client": "client-7"}),
+    ("everything", {}),
+)
+
+
+def synthetic_run(rng: random.Random):
+    config = {
+        "iterations": 10000,
+        "max_simulation_days": 365,
+        "account_type": rng.choice(ACCOUNTS),
+        "multiplier": rng.choice(MULTIPLIERS),
+        "round_trip_cost": 4.0,
+        "histogram": True,
+        "condition_end_state": "All",
+        "max_payouts": 12,
+        "avg_trades_per_day": float(rng.randint(1, 20)),
+        "stop_loss": float(rng.randrange(10, 100, 5)),
+        "take_profit": float(rng.randrange(10, 150, 5)),
+        "win_percentage": float(rng.randint(30, 70)),
+    }
+    busted = rng.uniform(0, 100)
+    results = {
+        "mean_balance": rng.uniform(-2000, 5000),
+        "median_balance": rng.uniform(-2000, 5000),
+        "std_dev": rng.uniform(0, 3000),
+        "positive_balance_percentage": rng.uniform(0, 100),
+        "mean_days": rng.uniform(1, 365),
+        "mad": 1.0, "iqr": 1.0, "mad_median": 1.0,
+        "end_state_percentages": {"Busted": busted, "TimeOut": (100 - busted) / 2, "MaxPayouts": (100 - busted) / 2},
+        "histogram_bins": {"edges": list(range(101)), "counts": [rng.randint(0, 500) for _ in range(100)]},
+    }
+    return config, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run history benchmark")
+    parser.add_argument("--runs", type=int, default=20000)
+    parser.add_argument("--record-budget-us", type=float, default=200.0, help="p99 of record()")
+    parser.add_argument("--query-budget-ms", type=float, default=50.0, help="median of each filter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["PROPSIM_HISTORY_DB_PATH"] = os.path.join(directory, "history.sqlite3")
+        from utils.history import RunHistory
+
+        history = RunHistory(os.environ["PROPSIM_HISTORY_DB_PATH"], max_pending=args.runs + 1)
+        rng = random.Random(3)
+        runs = [synthetic_run(rng) for _ in range(args.runs)]
+
+        latencies = []
+        start = time.perf_counter()
+        for i, (config, results) in enumerate(runs):
+            began = time.perf_counter()
+            history.record(config, results, client=f"client-{i % 50}", queue_seconds=0.0, run_seconds=1.0)
+            latencies.append(time.perf_counter() - began)
+        recorded = time.perf_counter() - start
+        history.flush()
+        persisted = time.perf_counter() - start
+
+        latencies.sort()
+        p99_us = 1e6 * latencies[int(0.99 * (len(latencies) - 1))]
+        size_mb = os.path.getsize(history.path) / 2**20
+        print(f"{args.runs:,} runs recorded")
+        print(f"  record()   median {1e6 * statistics.median(latencies):6.1f} us, p99 {p99_us:6.1f} us "
+              f"({recorded:.2f}s for all)")
+        print(f"  writer     {args.runs / persisted:,.0f} runs/s, all persisted after {persisted:.2f}s, "
+              f"{size_mb:.1f} MB on disk")
+
+        failures = []
+        if p99_us > args.record_budget_us:
+            failures.append(f"record() p99 {p99_us:.1f} us exceeds {args.record_budget_us:g} us")
+        if history.stats()["written"] != args.runs:
+            failures.append(f"{args.runs - history.stats()['written']} runs were not written")
+
+        conn = sqlite3.connect(history.path)
+        for label, kwargs in QUERIES:
+            timings = []
+            for _ in range(5):
+                began = time.perf_counter()
+                found = history.query(**kwargs)
+                timings.append(time.perf_counter() - began)
+            median_ms = 1000 * statistics.median(timings)
+            print(f"  {label:22s} {len(found):6,d} runs in {median_ms:6.1f} ms")
+            if median_ms > args.query_budget_ms:
+                failures.append(f"filter by {label} took {median_ms:.1f} ms")
+
+        # Filters on indexed columns must not scan the table
+        plans = {
+            "account + multiplier": "SELECT id FROM runs WHERE account_type IN ('ftt:GT') AND multiplier >= 20",
+            "strategy ranges": "SELECT id FROM runs WHERE stop_loss >= 20 AND stop_loss <= 30",
+        }
+        for label, sql in plans.items():
+            plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            if "USING INDEX" not in plan and "USING COVERING INDEX" not in plan:
+                failures.append(f"filter by {label} does not use an index: {plan}")
+        conn.close()
+
+        if history.load(int(history.query(limit=1)["id"][0]))["results"].get("histogram_bins") is None:
+            failures.append("stored histogram did not round-trip")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All run history checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Concurrency check and throughput of the shared rate limiter and backend gate.
+
+Hammers RateLimiter and ConcurrencyGate from many threads and verifies:
+no bucket admits more than its burst, the gate never exceeds its slot
+count, waiters are admitted in arrival order, timed-out waiters do not
+stall the queue, and a full queue rejects instead of blocking.
+Exits non-zero if any check fails.
+
+    python -m benchmarks.bench_limiter --threads 64
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.limiter import ConcurrencyGate, QueueFullError, RateLimiter
+
+
+def check_rate_limiter(threads: int, calls: int) -> list:
+    failures = []
+    now = 1000.0  # frozen clock: no refill, so admissions must equal the bursts
+
+    limiter = RateLimiter(client_rate=1.0, client_burst=10, global_rate=1.0, global_burst=10**9)
+    with ThreadPoolExecutor(threads) as pool:
+        admitted = sum(pool.map(lambda _: limiter.acquire("one-client", now)[0], range(threads * calls)))
+    if admitted != 10:
+        failures.append(f"single client admitted {admitted}, expected 10")
+
+    limiter = RateLimiter(client_rate=1.0, client_burst=5, global_rate=1.0, global_burst=50)
+    with ThreadPoolExecutor(threads) as pool:
+        outcomes = list(pool.map(lambda i: limiter.acquire(f"client-{i % 100}", now), range(threads * calls)))
+    admitted = sum(allowed for allowed, _, _ in outcomes)
+    if admitted != 50:
+        failures.append(f"global bucket admitted {admitted}, expected 50")
+    if not any(scope == "global" for _, scope, _ in outcomes):
+        failures.append("no request was rejected by the global bucket")
+
+    limiter = RateLimiter(client_rate=0.0, client_burst=1, global_rate=0.0, global_burst=10**9, max_clients=100)
+    for i in range(1000):
+        limiter.acquire(f"client-{i}", now)
+    if limiter.client_count() != 100:
+        failures.append(f"{limiter.client_count()} client buckets kept, limit is 100")
+    return failures
+
+
+def check_gate(threads: int, slots: int) -> list:
+    failures = []
+    gate = ConcurrencyGate(max_concurrent=slots, max_queue=threads, timeout=30)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def work(_):
+        with gate:
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.002)
+            with lock:
+                state["active"] -= 1
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(work, range(threads * 10)))
+    if state["peak"] > slots:
+        failures.append(f"gate admitted {state['peak']} at once, limit is {slots}")
+    if gate.active or gate.waiting:
+        failures.append(f"gate left active={gate.active} waiting={gate.waiting}")
+
+    # FIFO: hold every slot, queue waiters one at a time, then free the slots
+    gate = ConcurrencyGate(max_concurrent=1, max_queue=threads, timeout=30)
+    gate.acquire()
+    order = []
+    waiters = []
+    for i in range(threads):
+        queued = threading.Event()
+
+        def waiter(i=i, queued=queued):
+            gate.acquire(on_wait=lambda position: queued.set())
+            order.append(i)
+            gate.release()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        queued.wait()
+        waiters.append(thread)
+    gate.release()
+    for thread in waiters:
+        thread.join()
+    if order != list(range(threads)):
+        failures.append("waiters were not admitted in arrival order")
+
+    # Abandoned tickets: waiters that time out must not block those behind them
+    gate = ConcurrencyGate(max_concurrent=1, max_queue=threads, timeout=0.05)
+    gate.acquire()
+    timed_out = []
+    impatient = [threading.Thread(target=lambda: _expect_queue_error(gate, timed_out)) for _ in range(threads // 2)]
+    for thread in impatient:
+        thread.start()
+    for thread in impatient:
+        thread.join()
+    gate.timeout = 5
+    gate.release()
+    try:
+        gate.acquire()
+        gate.release()
+    except QueueFullError:
+        failures.append("queue stalled behind timed-out waiters")
+    if len(timed_out) != threads // 2:
+        failures.append(f"{len(timed_out)} of {threads // 2} waiters timed out")
+
+    # Bounded queue: arrivals beyond max_queue are rejected immediately
+    gate = ConcurrencyGate(max_concurrent=1, max_queue=4, timeout=1)
+    gate.acquire()
+    rejected = []
+    crowd = [threading.Thread(target=lambda: _expect_queue_error(gate, rejected)) for _ in range(threads)]
+    for thread in crowd:
+        thread.start()
+    for thread in crowd:
+        thread.join()
+    gate.release()
+    full = sum("capacity" in message for message in rejected)
+    if full != threads - 4 or len(rejected) != threads:
+        failures.append(f"{full} arrivals rejected by a full queue, expected {threads - 4}")
+    return failures
+
+
+def _expect_queue_error(gate: ConcurrencyGate, errors: list):
+    try:
+        gate.acquire()
+        gate.release()
+    except QueueFullError as e:
+        errors.append(str(e))
+
+
+def throughput(threads: int, seconds: float = 1.0) -> float:
+    """Rate limiter decisions per second across `threads` threads"""
+    limiter = RateLimiter(client_rate=1e9, client_burst=1e9, global_rate=1e9, global_burst=1e9)
+    stop = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def spin(i):
+        client = f"client-{i}"
+        while time.perf_counter() < stop:
+            limiter.acquire(client)
+            counts[i] += 1
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(spin, range(threads)))
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter and gate concurrency check")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--calls", type=int, default=50, help="acquires per thread in the bucket checks")
+    parser.add_argument("--slots", type=int, default=4, help="gate slots in the concurrency check")
+    args = parser.parse_args()
+
+    failures = check_rate_limiter(args.threads, args.calls) + check_gate(args.threads, args.slots)
+    print(f"rate limiter: {throughput(args.threads):,.0f} decisions/s with {args.threads} threads")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All limiter and gate checks passed")
+
+
+if __name__ == "__main__":
+    main()
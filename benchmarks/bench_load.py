@@ -0,0 +1,320 @@
+"""
+Concurrent sessions of app.py served by one frontend process.
+
+Each session is a headless AppTest of app.py driven the way a user
+would: it changes a few strategy inputs, runs a simulation (answering
+the verification challenge), switches to the Historical Data tab,
+uploads a trade file and runs that as well. The stub backend runs in a
+separate process with injected latency, so only the frontend's work,
+memory and threads count against this process.
+
+For each concurrency level it reports:
+- rerun latency: wall time of every script run a session triggers
+- end-to-end latency: from clicking Run Simulation to the rendered
+  result, including the job queue and polling at --poll-seconds
+- peak RSS and peak OS thread count of the process
+
+AppTest reruns the whole script where a browser reruns only a fragment
+(form widgets, job polling), so rerun latencies are an upper bound.
+Exits non-zero if a session raises or a run ends without a result.
+
+    python -m benchmarks.bench_load --sessions 1,4,8,16 --latency-ms 200
+"""
+import argparse
+import contextlib
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_csv import synthetic_csv
+
+OWNERS = ("simulated", "historical")
+
+# Every run gets its own seed; the result cache and request coalescing
+# would otherwise answer most runs without reaching the backend
+SEEDS = itertools.count(1)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def process_usage() -> Tuple[float, int]:
+    """Resident memory in MB and OS thread count of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["Threads"])
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, threading.active_count()
+
+
+class UsageSampler:
+    """Peak RSS and thread count while the context is open"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss_mb, self.peak_threads = process_usage()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss_mb, threads = process_usage()
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self.peak_threads = max(self.peak_threads, threads)
+
+    def __enter__(self) -> "UsageSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_stub(latency_ms: float, histogram_bytes: int) -> Tuple[subprocess.Popen, str]:
+    """Stub backend in its own process; returns it and its URL once it answers /health"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_backend", "--port", str(port),
+         "--latency-ms", str(latency_ms), "--histogram-bytes", str(histogram_bytes)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            urllib.request.urlopen(f"{url}/health", timeout=1).close()
+            return process, url
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("stub backend did not start")
+            time.sleep(0.1)
+
+
+def allow_concurrent_apptests():
+    """
+    AppTest runs one test at a time: every run installs a mock Runtime and
+    patches a config option, then removes both when it ends, under the
+    feet of other sessions still running. A server has one Runtime for all
+    sessions, so keep the latest mock installed between runs and set the
+    option once for the process.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+    latest = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        elif not latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+
+
+def pass_challenge(at) -> None:
+    """
+    Test hook for the verification dialog: does what its Submit button
+    does, with the code the session was shown. The dialog is a fragment,
+    which AppTest cannot rerun on its own, so the harness answers it
+    through the session's ChallengeSystem instead.
+    """
+    state = at.session_state
+    if not state["challenge_system"].verify_response(state["challenge_hash"], state["challenge"]):
+        raise RuntimeError("verification code rejected")
+    state["challenge_verified"] = True
+    state["run_simulation"] = True
+    del state["challenge"]
+    del state["challenge_hash"]
+
+
+class Session:
+    """One browser session of app.py, with the latencies it saw"""
+
+    def __init__(self, index: int, csv_data: bytes, poll_seconds: float, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.csv_data = csv_data
+        self.poll_seconds = poll_seconds
+        self.at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+        self.tab = "Simulated Parameters"
+        self.reruns: List[float] = []
+        self.end_to_end: Dict[str, List[float]] = {owner: [] for owner in OWNERS}
+
+    def rerun(self):
+        # AppTest does not send the tabs' state back, so set the open tab
+        # before every run, as the browser does
+        self.at.session_state["mode_tab"] = self.tab
+        start = time.perf_counter()
+        self.at.run()
+        self.reruns.append(time.perf_counter() - start)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def simulate(self, owner: str):
+        """Click Run Simulation and rerun as the job poller would until the result shows"""
+        from utils.jobs import DONE, get_job_queue
+
+        self.at.number_input(key=f"{owner}_seed").set_value(next(SEEDS))
+        start = time.perf_counter()
+        self.at.button(key=f"{owner}_run_button").click()
+        self.rerun()
+        if "challenge" in self.at.session_state:
+            pass_challenge(self.at)
+            self.rerun()
+        if f"{owner}_job" not in self.at.session_state:
+            errors = [e.value for e in self.at.error]
+            raise RuntimeError(f"{owner} run was not queued: {errors}")
+
+        queue = get_job_queue()
+        job_id = self.at.session_state[f"{owner}_job"]
+        while True:
+            # A rerun that starts after the job finished renders its result
+            job = queue.get(job_id)
+            finished = job is None or job.finished
+            self.rerun()
+            if finished:
+                break
+            time.sleep(self.poll_seconds)
+        self.end_to_end[owner].append(time.perf_counter() - start)
+        if job is None or job.status != DONE:
+            raise RuntimeError(f"{owner} run ended without a result: {job.error if job else 'expired'}")
+
+    def play(self, rounds: int):
+        self.rerun()
+        for round_ in range(rounds):
+            self.tab = "Simulated Parameters"
+            self.rerun()
+            for step in range(3):
+                self.at.number_input(key="simulated_stop_loss").set_value(20 + 5 * ((self.index + round_ + step) % 8))
+                self.rerun()
+            self.simulate("simulated")
+
+            self.tab = "Historical Data"
+            self.rerun()
+            if round_ == 0:
+                self.at.file_uploader(key="historical_csv_upload").set_value(
+                    (f"trades-{self.index}.csv", self.csv_data, "text/csv")
+                )
+                self.rerun()
+            self.simulate("historical")
+
+
+def run_level(sessions: int, rounds: int, csv_data: bytes, poll_seconds: float, timeout: float) -> Dict[str, Any]:
+    players = [Session(i, csv_data, poll_seconds, timeout) for i in range(sessions)]
+    failures = []
+
+    def play(player: Session):
+        try:
+            player.play(rounds)
+        except Exception as e:
+            failures.append(f"session {player.index}: {e}")
+
+    start = time.perf_counter()
+    with UsageSampler() as usage, ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(play, players))
+    elapsed = time.perf_counter() - start
+
+    reruns = [s for p in players for s in p.reruns]
+    end_to_end = [s for p in players for owner in OWNERS for s in p.end_to_end[owner]]
+    return {
+        "sessions": sessions,
+        "reruns": reruns,
+        "end_to_end": end_to_end,
+        "runs_per_second": len(end_to_end) / elapsed,
+        "peak_rss_mb": usage.peak_rss_mb,
+        "peak_threads": usage.peak_threads,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test")
+    parser.add_argument("--sessions", default="1,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=2, help="simulated and historical runs per session")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="stub backend latency")
+    parser.add_argument("--histogram-bytes", type=int, default=0, help="stub histogram size")
+    parser.add_argument("--csv-rows", type=int, default=5000, help="rows of the uploaded trade file")
+    parser.add_argument("--poll-seconds", type=float, default=None,
+                        help="job polling interval (default: PROPSIM_JOB_POLL_SECONDS)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="limit for one script run")
+    args = parser.parse_args()
+
+    stub, url = start_stub(args.latency_ms, args.histogram_bytes)
+    history_dir = tempfile.TemporaryDirectory()
+    # Settings are read on import: point the app at the stub, keep run
+    # history out of the real database and lift the per-client and global
+    # rate limits, which would otherwise turn away most sessions
+    os.environ["PROPSIM_API_URL"] = url
+    os.environ.setdefault("PROPSIM_LOG_LEVEL", "WARNING")
+    os.environ["PROPSIM_HISTORY_DB_PATH"] = os.path.join(history_dir.name, "history.sqlite3")
+    os.environ["PROPSIM_RATE_LIMIT_CLIENT_REQUESTS"] = "1000000"
+    os.environ["PROPSIM_RATE_LIMIT_GLOBAL_PER_SECOND"] = "1000000"
+    os.environ["PROPSIM_RATE_LIMIT_GLOBAL_BURST"] = "1000000"
+
+    from streamlit import config as streamlit_config
+    from streamlit import logger as streamlit_logger
+    from config.settings import BACKEND_MAX_CONCURRENCY, JOB_POLL_SECONDS, JOB_WORKERS
+
+    streamlit_config.get_config_options()
+    streamlit_logger.set_log_level("error")
+    allow_concurrent_apptests()
+    poll_seconds = JOB_POLL_SECONDS if args.poll_seconds is None else args.poll_seconds
+    csv_data = synthetic_csv(args.csv_rows)
+
+    print(f"Stub latency {args.latency_ms:g} ms, {JOB_WORKERS} job workers, backend concurrency "
+          f"{BACKEND_MAX_CONCURRENCY}, polling every {poll_seconds:g}s, {args.rounds} rounds per session")
+    print(f"{'sessions':>8s} | {'rerun p50':>9s} {'p95':>7s} {'p99':>7s} ms | "
+          f"{'end-to-end p50':>14s} {'p95':>6s} {'p99':>6s} s | {'runs/s':>6s} | {'RSS MB':>6s} | {'threads':>7s}")
+
+    failures = []
+    try:
+        for sessions in [int(level) for level in args.sessions.split(",")]:
+            level = run_level(sessions, args.rounds, csv_data, poll_seconds, args.timeout)
+            failures.extend(f"{sessions} sessions, {failure}" for failure in level["failures"])
+            reruns, end_to_end = level["reruns"], level["end_to_end"] or [float("nan")]
+            print(f"{sessions:8d} | {1000 * statistics.median(reruns):9.1f} {1000 * percentile(reruns, 0.95):7.1f} "
+                  f"{1000 * percentile(reruns, 0.99):7.1f}    | {statistics.median(end_to_end):14.2f} "
+                  f"{percentile(end_to_end, 0.95):6.2f} {percentile(end_to_end, 0.99):6.2f}   | "
+                  f"{level['runs_per_second']:6.2f} | {level['peak_rss_mb']:6.0f} | {level['peak_threads']:7d}")
+    finally:
+        stub.terminate()
+        stub.wait()
+        history_dir.cleanup()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All sessions completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Wall time of the local NumPy engine on one core.
+
+    python -m benchmarks.bench_local_engine --iterations 100000 --days 365
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.local_engine import simulate_strategy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local engine benchmark")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--account", default="ftt:GT")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config = {
+        "iterations": args.iterations,
+        "max_simulation_days": args.days,
+        "account_type": args.account,
+        "multiplier": 20.0,
+        "round_trip_cost": 4.0,
+        "histogram": True,
+        "condition_end_state": "All",
+        "max_payouts": 12,
+        "avg_trades_per_day": 10.0,
+        "stop_loss": 40.0,
+        "take_profit": 40.0,
+        "win_percentage": 55.0,
+        "seed": 1,
+    }
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        results = simulate_strategy(config)
+        timings.append(time.perf_counter() - start)
+
+    print(f"iterations={args.iterations} days={args.days} account={args.account}")
+    print(f"  best {min(timings):.2f}s  mean {sum(timings) / len(timings):.2f}s")
+    print(f"  mean balance ${results['mean_balance']:.2f}  end states "
+          + ", ".join(f"{k} {v:.1f}%" for k, v in results["end_state_percentages"].items()))
+
+
+if __name__ == "__main__":
+    main()
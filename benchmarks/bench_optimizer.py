@@ -0,0 +1,70 @@
+"""
+Successive halving versus a full grid, on the local NumPy engine.
+
+Searches a stop/target/win grid for each objective. It reports the
+iterations spent against a full grid at the same budget, and where the
+halving winner places in the full grid's own ranking (1 = it found the
+full grid's best point).
+
+    python -m benchmarks.bench_optimizer --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving optimizer benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--max-bust-rate", type=float, default=30.0)
+    args = parser.parse_args()
+
+    from utils.optimizer import OBJECTIVES, objective_value, successive_halving
+    from utils.sweep import build_sweep_grid, run_sweep, value_range
+
+    base_config = {
+        "iterations": args.iterations,
+        "max_simulation_days": args.days,
+        "account_type": "ftt:GT",
+        "multiplier": 20.0,
+        "round_trip_cost": 4.0,
+        "histogram": False,
+        "condition_end_state": "All",
+        "max_payouts": 12,
+        "avg_trades_per_day": 10.0,
+        "seed": 11,
+    }
+    grid = build_sweep_grid(base_config, {
+        "stop_loss": value_range(20, 60, 10),
+        "take_profit": value_range(20, 80, 15),
+        "win_percentage": value_range(45, 60, 5),
+    })
+
+    start = time.perf_counter()
+    full = {point.index: point.results for point in run_sweep(grid, engine="local")}
+    full_seconds = time.perf_counter() - start
+    full_iterations = len(grid) * args.iterations
+    print(f"{len(grid)} grid points, {args.iterations:,} iterations each: "
+          f"full grid {full_iterations:,} iterations in {full_seconds:.1f}s")
+
+    for objective, label in OBJECTIVES.items():
+        start = time.perf_counter()
+        for report in successive_halving(grid, objective, args.iterations, eta=args.eta,
+                                         max_bust_rate=args.max_bust_rate, engine="local"):
+            pass
+        seconds = time.perf_counter() - start
+
+        winner = report.candidates[0].index
+        truth = sorted(full, key=lambda i: objective_value(objective, full[i], args.max_bust_rate), reverse=True)
+        print(f"  {label:32s} {report.iterations_spent:10,d} iterations "
+              f"({100 * report.iterations_spent / full_iterations:4.1f}% of the grid) in {seconds:5.1f}s; "
+              f"winner ranks #{truth.index(winner) + 1} in the full grid")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Paired what-if comparisons versus two independent runs.
+
+For several common what-if questions it runs the baseline and the
+variant on common random numbers on the local NumPy engine. It prints the
+95% half-width of the mean-balance and bust-rate differences next to the
+half-width two independent runs of the same size would have had. It
+also prints how many iterations per run the independent runs would need
+for the paired precision, and how far the paired estimate lands from
+independent reference runs at --reference-iterations. Exits non-zero if,
+with a condition_end_state filter, the compared balance statistics are
+not the ones the result tables show.
+
+    python -m benchmarks.bench_paired --iterations 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE = {
+    "max_simulation_days": 365,
+    "account_type": "ftt:GT",
+    "multiplier": 20.0,
+    "round_trip_cost": 2.0,
+    "histogram": False,
+    "condition_end_state": "All",
+    "max_payouts": 12,
+    "avg_trades_per_day": 10.0,
+    "stop_loss": 40.0,
+    "take_profit": 40.0,
+    "win_percentage": 52.0,
+}
+
+VARIANTS = {
+    "cost 2.00 -> 2.50": {"round_trip_cost": 2.5},
+    "multiplier 20 -> 21": {"multiplier": 21.0},
+    "GT -> LeMans": {"account_type": "ftt:LeMans"},
+    "GT -> Daytona": {"account_type": "ftt:Daytona"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paired what-if benchmark")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--reference-iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    from utils import local_engine
+    from utils.paired import run_paired
+
+    print(f"{'what-if':22s} {'Δbalance':>9s} {'±paired':>8s} {'±indep.':>8s} {'Δbusted':>8s} {'±paired':>8s} "
+          f"{'±indep.':>8s} {'indep. iterations':>17s} {'vs reference':>12s} {'time':>6s}")
+    for name, change in VARIANTS.items():
+        baseline = dict(BASELINE, iterations=args.iterations, seed=5)
+        start = time.perf_counter()
+        paired = run_paired(baseline, dict(baseline, **change))
+        seconds = time.perf_counter() - start
+
+        # Independent reference runs, each with its own seed
+        reference = [
+            local_engine.simulate_strategy(dict(BASELINE, iterations=args.reference_iterations, seed=seed, **config))
+            for seed, config in ((101, {}), (202, change))
+        ]
+        reference_difference = reference[1]["mean_balance"] - reference[0]["mean_balance"]
+
+        balance = paired["differences"]["Mean Balance"]
+        busted = paired["differences"]["Busted (%)"]
+        print(f"{name:22s} {balance['difference']:9.1f} {balance['halfwidth']:8.1f} {balance['unpaired_halfwidth']:8.1f} "
+              f"{busted['difference']:8.2f} {busted['halfwidth']:8.2f} {busted['unpaired_halfwidth']:8.2f} "
+              f"{paired['unpaired_iterations']:17,.0f} {balance['difference'] - reference_difference:12.1f} "
+              f"{seconds:5.2f}s")
+
+    # Conditioned balance statistics must match each side's displayed results
+    failures = []
+    for condition in local_engine.END_STATES:
+        baseline = dict(BASELINE, iterations=args.iterations, seed=5, condition_end_state=condition)
+        paired = run_paired(baseline, dict(baseline, round_trip_cost=2.5))
+        for label, key in (("Mean Balance", "mean_balance"), ("Mean Days", "mean_days")):
+            for side in ("baseline", "variant"):
+                if abs(paired["differences"][label][side] - paired[side][key]) > 1e-6:
+                    failures.append(f"{condition}: {side} {label} differs from its results")
+        balance = paired["differences"]["Mean Balance"]
+        print(f"conditioned on {condition:10s} Δbalance {balance['difference']:9.1f} "
+              f"±paired {balance['halfwidth']:8.1f} ±indep. {balance['unpaired_halfwidth']:8.1f}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All paired checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Upload size and client-side cost of the compact binary trade payload
+versus the raw CSV, measured against the local stub backend.
+
+Each format sends --repeat requests over one trade file. The binary
+encoding is made once per file and reused by every later request, so
+its cost is reported separately from the per-request wall time. Wall
+time on loopback also includes the stub decoding the binary payload,
+which it skips for CSV. Exits non-zero if the file is encoded more than
+once.
+
+    python -m benchmarks.bench_payload --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_csv import UploadedCsv, synthetic_csv
+from benchmarks.stub_backend import StubBackend
+
+CONFIG = {
+    "iterations": 10000,
+    "max_simulation_days": 365,
+    "account_type": "ftt:GT",
+    "multiplier": 20.0,
+    "round_trip_cost": 0.0,
+    "histogram": False,
+    "condition_end_state": "All",
+    "max_payouts": 12,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade payload benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    csv_bytes = synthetic_csv(args.rows)
+
+    with StubBackend(binary_trades=True) as stub:
+        os.environ["PROPSIM_API_URL"] = stub.url
+        from utils import api, payload
+        from utils.cache import get_result_cache
+        from utils.metrics import collect_timings
+        from utils.security import validate_csv_file
+
+        ok, error, trades = validate_csv_file(UploadedCsv(csv_bytes), max_rows=args.rows)
+        if not ok:
+            raise RuntimeError(error)
+
+        start = time.perf_counter()
+        blob = payload.encode_trades(trades)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        encodes = 0
+        for label, kwargs in (("csv", {}), ("binary", {"trades": trades})):
+            stub.bytes_received = 0
+            start = time.perf_counter()
+            with collect_timings() as timings:
+                for i in range(args.repeat):
+                    get_result_cache().clear()
+                    api.simulate(dict(CONFIG, seed=i), csv_bytes, engine="backend", **kwargs)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            encoding = [seconds for stage, seconds in timings.stages if stage == "encode_trades"]
+            encodes += len(encoding) if label == "binary" else 0
+            print(f"  {label:6s} upload {stub.bytes_received / args.repeat / 1024:9.1f} KiB"
+                  f"  {elapsed * 1000:7.1f} ms/request  {len(encoding)} encodes ({sum(encoding) * 1000:.1f} ms)")
+
+    print(f"rows={args.rows:,}  csv {len(csv_bytes) / 1024:.1f} KiB  "
+          f"binary {len(blob) / 1024:.1f} KiB  ({len(csv_bytes) / len(blob):.1f}x smaller, "
+          f"encode {encode_ms:.1f} ms)")
+    if encodes != 1:
+        print(f"FAIL: the trade file was encoded {encodes} times for {args.repeat} requests")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
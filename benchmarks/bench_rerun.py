@@ -0,0 +1,78 @@
+"""
+Script execution time per Streamlit rerun, measured with AppTest.
+
+- app: a full rerun of app.py, as triggered by navigation or a widget
+  outside any fragment.
+- widget change: changing one input of the simulated form. With the
+  forms in fragments only that fragment reruns in the browser. AppTest
+  always reruns the whole script, so this measures the fragment body on
+  its own.
+- core parameters: display_core_parameters alone.
+
+    python -m benchmarks.bench_rerun --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def simulated_form_script():
+    from components.simulated_form import display_simulated_form
+    display_simulated_form()
+
+
+def core_parameters_script():
+    from components.core_parameters import display_core_parameters
+    display_core_parameters(prefix="simulated_")
+
+
+def median_run_ms(app: AppTest, runs: int, change=None) -> float:
+    """Median wall time of `runs` reruns; change(app, i) edits a widget before each"""
+    app.run()
+    timings = []
+    for i in range(runs):
+        if change is not None:
+            change(app, i)
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+    return statistics.median(timings) * 1000
+
+
+def change_iterations(app: AppTest, i: int):
+    app.number_input(key="simulated_iterations").set_value(10000 + 1000 * (i % 10 + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit rerun benchmark")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    streamlit_config.get_config_options()
+    streamlit_logger.set_log_level("error")
+
+    results = {
+        "app rerun": median_run_ms(AppTest.from_file(os.path.join(ROOT, "app.py")), args.runs),
+        "widget change (simulated form)": median_run_ms(
+            AppTest.from_function(simulated_form_script), args.runs, change_iterations
+        ),
+        "core parameters": median_run_ms(AppTest.from_function(core_parameters_script), args.runs),
+    }
+    for name, ms in results.items():
+        print(f"{name:32s} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
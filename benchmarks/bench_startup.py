@@ -0,0 +1,135 @@
+"""
+Cold start of the app in a fresh interpreter.
+
+Time to first render: one AppTest run of app.py in a new process. That
+run includes importing every app module, as the first session after a
+restart does. Streamlit itself is imported beforehand, since the server
+loads it before any session. Import cost: `python -X importtime` totals
+for the app modules beyond what Streamlit already loads, with the
+largest ones listed. Also reports heavy libraries (HEAVY_MODULES) that
+the first render imports although it does not need them.
+
+Exits non-zero when the first render exceeds --budget-ms, the app
+imports exceed --import-budget-ms, or a heavy library is imported at
+startup.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Needed only once a run starts or a file is uploaded
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "requests", "urllib3")
+
+APP_MODULES = ("components.simulated_form", "components.historical_form", "components.history", "utils.metrics")
+
+FIRST_RENDER = """
+import json, sys, time
+from streamlit import config, logger
+from streamlit.testing.v1 import AppTest
+config.get_config_options(); logger.set_log_level("error")
+heavy = {heavy!r}
+before = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": 1000 * elapsed,
+    "exceptions": [e.value for e in at.exception],
+    "loaded": sorted(m for m in heavy if m in sys.modules and m not in before),
+}}))
+"""
+
+
+def _python(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def first_render() -> Dict[str, Any]:
+    """Time to the first complete script run of app.py in a new process"""
+    result = _python(FIRST_RENDER.format(heavy=HEAVY_MODULES, app=os.path.join(ROOT, "app.py")))
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _import_times(code: str) -> Dict[str, int]:
+    """Module -> self import time in microseconds, from -X importtime"""
+    times = {}
+    for line in _python(code, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def app_import_times() -> Dict[str, int]:
+    """Self import time of every module the app adds on top of Streamlit"""
+    streamlit = _import_times("import streamlit.web.server")
+    app = _import_times(f"import streamlit.web.server, {', '.join(APP_MODULES)}")
+    return {name: us for name, us in app.items() if name not in streamlit}
+
+
+def measure(runs: int) -> Dict[str, Any]:
+    renders = [first_render() for _ in range(runs)]
+    imports = [app_import_times() for _ in range(runs)]
+    totals = [sum(times.values()) / 1000 for times in imports]
+    packages: Dict[str, List[int]] = {}
+    for times in imports:
+        per_package: Dict[str, int] = {}
+        for name, us in times.items():
+            package = name.split(".")[0]
+            per_package[package] = per_package.get(package, 0) + us
+        for package, us in per_package.items():
+            packages.setdefault(package, []).append(us)
+    return {
+        "first_render_ms": statistics.median(r["ms"] for r in renders),
+        "import_ms": statistics.median(totals),
+        "exceptions": renders[-1]["exceptions"],
+        "loaded": renders[-1]["loaded"],
+        "packages": {p: statistics.median(us) / 1000 for p, us in packages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=750.0, help="median time to first render")
+    parser.add_argument("--import-budget-ms", type=float, default=100.0, help="median app import time")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    startup = measure(args.runs)
+    print(f"Median of {args.runs} fresh processes")
+    print(f"  time to first render  {startup['first_render_ms']:8.1f} ms (budget {args.budget_ms:g})")
+    print(f"  app imports           {startup['import_ms']:8.1f} ms (budget {args.import_budget_ms:g}), largest:")
+    for package, ms in sorted(startup["packages"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"    {package:24s} {ms:8.1f} ms")
+
+    failures = []
+    if startup["exceptions"]:
+        failures.append(f"first render raised: {startup['exceptions']}")
+    if startup["first_render_ms"] > args.budget_ms:
+        failures.append(f"first render took {startup['first_render_ms']:.0f} ms")
+    if startup["import_ms"] > args.import_budget_ms:
+        failures.append(f"app imports took {startup['import_ms']:.0f} ms")
+    if startup["loaded"]:
+        failures.append(f"first render imported {', '.join(startup['loaded'])}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
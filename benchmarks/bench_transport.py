@@ -0,0 +1,130 @@
+"""
+Requests/sec through the old bare requests.post path versus the pooled
+keep-alive session in utils.api, against a local stub backend.
+
+Then checks retries and failover against a stub answering 503: a single
+node must see at most 1 + PROPSIM_HTTP_MAX_RETRIES requests for one
+simulation, and with a healthy second node the request must succeed
+without the failing node being tried again. Exits non-zero otherwise.
+
+    python -m benchmarks.bench_transport --requests 2000 --threads 8
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.stub_backend import StubBackend
+
+CONFIG = {
+    "iterations": 10000,
+    "max_simulation_days": 365,
+    "account_type": "ftt:GT",
+    "multiplier": 20.0,
+    "round_trip_cost": 0.0,
+    "histogram": False,
+    "condition_end_state": "All",
+    "max_payouts": 12,
+    "avg_trades_per_day": 10.0,
+    "stop_loss": 40.0,
+    "take_profit": 40.0,
+    "win_percentage": 50.0,
+}
+
+
+def bare_post(url: str):
+    files = {"config": ("config.json", json.dumps(CONFIG), "application/json")}
+    response = requests.post(f"{url}/simulate", files=files)
+    response.raise_for_status()
+    return response.json()
+
+
+def measure(fn, total: int, threads: int) -> float:
+    """Return requests/sec for `total` calls of fn spread over `threads` workers"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: fn(), range(total)))
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for r in results if not r)
+    if failures:
+        raise RuntimeError(f"{failures} requests failed")
+    return total / elapsed
+
+
+def check_failover() -> list:
+    """Requests per node for one simulation against failing nodes; returns failures"""
+    from config.settings import HTTP_MAX_RETRIES
+    from utils import api, endpoints
+
+    failures = []
+    # A config the throughput run has not cached
+    config = dict(CONFIG, round_trip_cost=1.5, seed=987654321)
+    with StubBackend(fail_status=503) as failing, StubBackend() as healthy:
+        endpoints._pool = endpoints.EndpointPool([failing.url])
+        try:
+            api.simulate(config, engine="backend")
+            failures.append("a failing node's 503 was not reported")
+        except api.SimulationError:
+            pass
+        print(f"  one failing node   : {failing.request_count} requests for one simulation")
+        if failing.request_count > 1 + HTTP_MAX_RETRIES:
+            failures.append(f"{failing.request_count} requests to a single failing node "
+                            f"(at most {1 + HTTP_MAX_RETRIES} expected)")
+
+        # The pool picks at random between fresh nodes; go on until a
+        # simulation has started on the failing one and failed over
+        for seed in range(1, 21):
+            failing.request_count = healthy.request_count = 0
+            endpoints._pool = endpoints.EndpointPool([failing.url, healthy.url])
+            api.simulate(dict(config, seed=seed), engine="backend")
+            if failing.request_count:
+                break
+        print(f"  failing + healthy  : {failing.request_count} requests to the failing node, "
+              f"{healthy.request_count} to the healthy one")
+        if not failing.request_count or healthy.request_count != 1:
+            failures.append("no failover from the failing node to the healthy one")
+        if failing.request_count > 1 + HTTP_MAX_RETRIES:
+            failures.append(f"the failing node was tried again after failing over "
+                            f"({failing.request_count} requests)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP transport benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StubBackend(latency_ms=args.latency_ms) as stub:
+        os.environ["PROPSIM_API_URL"] = stub.url
+        # Retries in the failover check need not wait
+        os.environ["PROPSIM_HTTP_BACKOFF_FACTOR"] = "0"
+        from utils.api import run_simulation
+
+        before = measure(lambda: bare_post(stub.url), args.requests, args.threads)
+        # Distinct seeds so neither the result cache nor request coalescing answers
+        seeds = itertools.count(1)
+        after = measure(lambda: run_simulation(dict(CONFIG, seed=next(seeds))), args.requests, args.threads)
+
+    print(f"requests={args.requests} threads={args.threads} latency={args.latency_ms}ms")
+    print(f"  bare requests.post : {before:8.1f} req/s")
+    print(f"  pooled session     : {after:8.1f} req/s  ({after / before:.2f}x)")
+
+    failures = check_failover()
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All failover checks passed")
+
+
+if __name__ == "__main__":
+    main()
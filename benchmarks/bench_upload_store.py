@@ -0,0 +1,160 @@
+"""
+Frontend memory of uploaded files held by in-flight runs.
+
+N sessions upload the same file and each has one run in flight. Before
+the upload store, every run held its own getvalue() copy of the file;
+with the store, runs hold the stored content: one shared copy while it
+is small, a view of a memory map (page cache, not heap) once it is
+spilled. Streamlit keeps its own copy of each session's upload while the
+uploader widget shows it either way, so that copy is not counted. Python
+heap held by the runs is measured with tracemalloc.
+
+Also checks the store: deduplication, spilling, LRU eviction of
+unreferenced files first, lapsing of idle references, and that stored
+content survives being sent by several requests (a spilled file used to
+come back as a file-like mmap that the first request read to its end).
+Exits non-zero if any check fails.
+
+    python -m benchmarks.bench_upload_store --sessions 32 --size-mb 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_backend import StubBackend
+from utils.upload_store import MB, UploadStore
+
+
+def held_bytes(keep) -> int:
+    """Python heap still allocated after keep() returns"""
+    tracemalloc.start()
+    try:
+        keep()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current
+
+
+def measure(sessions: int, data: bytes, directory: str):
+    class Upload:
+        """Stands in for Streamlit's UploadedFile, whose getvalue() returns a copy"""
+        def getvalue(self):
+            return memoryview(data).tobytes()
+
+    runs = []
+    baseline = held_bytes(lambda: runs.extend(Upload().getvalue() for _ in range(sessions)))
+    runs.clear()
+
+    store = UploadStore(directory, spill_bytes=MB, memory_bytes=64 * MB, max_bytes=4096 * MB)
+    digests = []
+
+    def upload(i):
+        # Each session's upload arrives as its own copy, dropped after put()
+        digest = store.put(Upload().getvalue(), f"session-{i}")
+        digests.append(digest)
+        runs.append(store.get(digest, f"session-{i}"))
+
+    def upload_all():
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(upload, range(sessions)))
+
+    stored = held_bytes(upload_all)
+    return baseline, stored, store, digests
+
+
+def check_resend(directory: str) -> list:
+    """Spilled content sent by several requests arrives whole every time"""
+    from utils import api, endpoints
+
+    store = UploadStore(directory, spill_bytes=1000)
+    data = b"DateTime,Return,Max Opposite Excursion\n" + b"2024-01-02 09:30:00,12.5,-3.0\n" * 200
+    content = store.get(store.put(data, "owner"))
+    config = {"iterations": 100, "max_simulation_days": 30, "account_type": "ftt:GT", "multiplier": 1.0,
+              "round_trip_cost": 4.0, "histogram": False, "condition_end_state": "All", "max_payouts": 12}
+    with StubBackend() as stub:
+        endpoints._pool = endpoints.EndpointPool([stub.url])
+        upload = api.prepare_upload(content)
+        sizes = []
+        # One request per seed, so none is served from the result cache
+        for seed in (1, 2, 3):
+            before = stub.bytes_received
+            api.simulate(dict(config, seed=seed), content, engine="backend", upload=upload)
+            sizes.append(stub.bytes_received - before)
+    if len(set(sizes)) != 1:
+        return [f"requests over one spilled upload sent {sizes} bytes for a {len(data)} byte file"]
+    return []
+
+
+def check_store(directory: str) -> list:
+    failures = []
+    store = UploadStore(directory, spill_bytes=1000, memory_bytes=2500, max_bytes=6000, idle_seconds=60)
+
+    small = [bytes([i]) * 800 for i in range(4)]
+    for i, data in enumerate(small[:3]):
+        store.put(data, f"owner-{i}")
+    if store.memory_used > 2500:
+        failures.append(f"memory tier holds {store.memory_used} bytes, budget is 2500")
+    if not isinstance(store.get(store.put(small[0], "owner-0"), "owner-0"), bytes):
+        failures.append("recently used small file was spilled before older ones")
+
+    large = b"x" * 3000
+    digest = store.put(large, "owner-large")
+    content = store.get(digest)
+    if not isinstance(content, memoryview) or content != large or bytes(store.get(digest)) != large:
+        failures.append("large file was not read back memory-mapped with the same content")
+    if store.put(large, "owner-other") != digest or store.stats()["files"] != 4:
+        failures.append("identical content was stored twice")
+
+    # Over the total: the file nobody references goes first
+    store.release("owner-1")
+    store.put(b"y" * 1000, "owner-new")
+    if store.get(digest) is None or any(store.get(d) is None for d in (store.touch("owner-0"), store.touch("owner-2"))):
+        failures.append("a referenced file was evicted while an unreferenced one remained")
+    if store.memory_used + store.disk_used > 6000:
+        failures.append(f"store holds {store.memory_used + store.disk_used} bytes, limit is 6000")
+
+    # Idle references lapse, after which their files can be evicted
+    store.idle_seconds = 0.05
+    time.sleep(0.1)
+    store.put(b"z" * 10, "owner-late")
+    if store.stats()["owners"] != 1:
+        failures.append(f"{store.stats()['owners'] - 1} idle references did not lapse")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload store memory benchmark")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--size-mb", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data = os.urandom(int(args.size_mb * MB))
+        baseline, stored, store, digests = measure(args.sessions, data, os.path.join(directory, "bench"))
+        failures = check_store(os.path.join(directory, "checks"))
+        failures += check_resend(os.path.join(directory, "resend"))
+        if len(set(digests)) != 1 or store.stats()["files"] != 1:
+            failures.append("concurrent uploads of one file were not deduplicated")
+
+        stats = store.stats()
+        print(f"{args.sessions} sessions with a run in flight over one {args.size_mb:g} MB file")
+        print(f"  one copy per run      {baseline / MB:10.1f} MB heap")
+        print(f"  upload store          {stored / MB:10.1f} MB heap, "
+              f"{stats['disk_bytes'] / MB:.1f} MB on disk, {stats['deduplicated']} uploads deduplicated")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("All upload store checks passed")
+
+
+if __name__ == "__main__":
+    main()
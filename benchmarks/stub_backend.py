@@ -0,0 +1,279 @@
+"""
+Local stand-in for the Rust /simulate endpoint.
+
+Speaks HTTP/1.1 with keep-alive so connection reuse on the client side is
+measurable, and returns a response with the same schema as the real
+backend. Latency and histogram payload size are configurable.
+
+With --batch-max-configs it also serves /simulate_batch: a "configs" JSON
+array plus one trade file, answered with {"results": [...]} in request
+order, each entry a result or {"error": message}. A batch costs one
+latency, as if the backend ran its configs in parallel.
+
+With --fail-status every simulation request is answered with that HTTP
+status instead, to exercise retries and failover.
+
+    python -m benchmarks.stub_backend --port 8080 --latency-ms 20
+"""
+import argparse
+import gzip
+import json
+import random
+import socket
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from utils import payload
+
+
+def parse_multipart(body: bytes, content_type: str) -> Dict[str, bytes]:
+    """Split a multipart/form-data body into {field name: raw bytes}"""
+    boundary = None
+    for part in content_type.split(";"):
+        part = part.strip()
+        if part.startswith("boundary="):
+            boundary = part[len("boundary="):].strip('"')
+    if boundary is None:
+        return {}
+
+    fields = {}
+    for chunk in body.split(b"--" + boundary.encode()):
+        if not chunk or chunk in (b"--\r\n", b"--"):
+            continue
+        head, _, data = chunk.partition(b"\r\n\r\n")
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-disposition") and b'name="' in line:
+                name = line.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+                fields[name] = data[:-2] if data.endswith(b"\r\n") else data
+    return fields
+
+
+def fake_result(config: Dict[str, Any], histogram_bytes: int) -> Dict[str, Any]:
+    """Build a plausible result payload, deterministic for a given config"""
+    rng = random.Random(json.dumps(config, sort_keys=True))
+    busted = rng.uniform(20, 70)
+    max_payouts = rng.uniform(0, 100 - busted)
+    result = {
+        "mean_balance": rng.uniform(-2000, 8000),
+        "median_balance": rng.uniform(-2000, 8000),
+        "std_dev": rng.uniform(1000, 6000),
+        "positive_balance_percentage": rng.uniform(0, 100),
+        "mean_days": rng.uniform(5, 300),
+        "mad": rng.uniform(500, 4000),
+        "iqr": rng.uniform(1000, 8000),
+        "mad_median": rng.uniform(500, 4000),
+        "end_state_percentages": {
+            "Busted": busted,
+            "MaxPayouts": max_payouts,
+            "TimeOut": 100 - busted - max_payouts,
+        },
+    }
+    histogram_format = config.get("histogram_format", "plotly")
+    if config.get("histogram") and histogram_format == "bins":
+        width = 6 * result["std_dev"] / 100
+        lo = result["mean_balance"] - 3 * result["std_dev"]
+        result["histogram_bins"] = {
+            "edges": [lo + i * width for i in range(101)],
+            "counts": [int(1000 * pow(2.718, -((i - 50) / 17) ** 2 / 2)) for i in range(100)],
+        }
+    elif config.get("histogram") and histogram_format == "quantiles":
+        result["balance_quantiles"] = {
+            "probabilities": [i / 100 for i in range(101)],
+            "values": [result["mean_balance"] + result["std_dev"] * 3 * (i - 50) / 50 for i in range(101)],
+        }
+    elif config.get("histogram") and histogram_bytes > 0:
+        result["histogram_plotly_json"] = histogram_plotly_json(histogram_bytes)
+    return result
+
+
+@lru_cache(maxsize=8)
+def histogram_plotly_json(histogram_bytes: int) -> str:
+    """Serialized histogram figure of roughly histogram_bytes; built once per size
+    so generating it does not dominate the stub's response time"""
+    rng = random.Random(histogram_bytes)
+    values = [round(rng.gauss(3000, 4000), 2) for _ in range(max(1, histogram_bytes // 10))]
+    return json.dumps({
+        "data": [{"type": "histogram", "x": values}],
+        "layout": {"title": {"text": "Final Balances"}},
+    })
+
+
+class StubBackend:
+    """In-process stub server; use as a context manager or start()/stop()"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, histogram_bytes: int = 0,
+                 binary_trades: bool = False, batch_max_configs: int = 0, fail_status: int = 0):
+        self.latency_ms = latency_ms
+        self.histogram_bytes = histogram_bytes
+        self.binary_trades = binary_trades
+        self.batch_max_configs = batch_max_configs
+        self.fail_status = fail_status
+        self.request_count = 0
+        self.config_count = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are written separately; avoid Nagle stalls
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_body(self) -> bytes:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                return body
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._reply(200, {"status": "ok"})
+                elif self.path == "/capabilities":
+                    formats = ["csv"] + ([payload.FORMAT_NAME] if stub.binary_trades else [])
+                    capabilities = {"trade_formats": formats}
+                    if stub.batch_max_configs:
+                        capabilities["batch_max_configs"] = stub.batch_max_configs
+                    self._reply(200, capabilities)
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self._read_body()
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.bytes_received += len(body)
+                if stub.fail_status:
+                    self._reply(stub.fail_status, {"error": "failing on purpose"})
+                elif self.path == "/simulate":
+                    self._simulate(body)
+                elif self.path == "/simulate_batch" and stub.batch_max_configs:
+                    self._simulate_batch(body)
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def _trades_error(self, fields: Dict[str, bytes]) -> Optional[str]:
+                if "trades_file" in fields:
+                    try:
+                        payload.decode_trades(fields["trades_file"])
+                    except (payload.PayloadError, ValueError) as e:
+                        return f"invalid trades_file: {e}"
+                return None
+
+            def _simulate(self, body: bytes):
+                fields = parse_multipart(body, self.headers.get("Content-Type", ""))
+                try:
+                    config = json.loads(fields["config"])
+                except (KeyError, ValueError):
+                    self._reply(400, {"error": "missing or invalid config"})
+                    return
+                error = self._trades_error(fields)
+                if error:
+                    self._reply(400, {"error": error})
+                    return
+                with stub._lock:
+                    stub.config_count += 1
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000.0)
+                self._reply(200, fake_result(config, stub.histogram_bytes))
+
+            def _simulate_batch(self, body: bytes):
+                fields = parse_multipart(body, self.headers.get("Content-Type", ""))
+                try:
+                    configs = json.loads(fields["configs"])
+                except (KeyError, ValueError):
+                    configs = None
+                if not isinstance(configs, list) or not configs:
+                    self._reply(400, {"error": "missing or invalid configs"})
+                    return
+                if len(configs) > stub.batch_max_configs:
+                    self._reply(413, {"error": f"at most {stub.batch_max_configs} configs per batch"})
+                    return
+                error = self._trades_error(fields)
+                if error:
+                    self._reply(400, {"error": error})
+                    return
+                with stub._lock:
+                    stub.config_count += len(configs)
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000.0)
+                self._reply(200, {"results": [
+                    fake_result(config, stub.histogram_bytes) if isinstance(config, dict)
+                    else {"error": "config must be an object"}
+                    for config in configs
+                ]})
+
+        return Handler
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubBackend":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--histogram-bytes", type=int, default=0)
+    parser.add_argument("--binary-trades", action="store_true",
+                        help="advertise the compact binary trade upload format")
+    parser.add_argument("--batch-max-configs", type=int, default=0,
+                        help="serve /simulate_batch with up to this many configs per request")
+    parser.add_argument("--fail-status", type=int, default=0,
+                        help="answer every simulation request with this HTTP status")
+    args = parser.parse_args()
+
+    stub = StubBackend(args.host, args.port, args.latency_ms, args.histogram_bytes,
+                       args.binary_trades, args.batch_max_configs, args.fail_status)
+    print(f"Stub backend listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
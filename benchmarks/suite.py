@@ -0,0 +1,231 @@
+"""
+End-to-end benchmark suite against a local stub backend.
+
+Measures run_simulation latency/throughput at several concurrency levels,
+validate_csv_file throughput on synthetic files, display_results render
+cost (including histogram JSON decoding), and cold start (time to first
+render and app import time, see benchmarks.bench_startup). Results are written as
+JSON and compared with a stored baseline; a metric that is worse than the
+baseline by more than the tolerance is reported as a regression and the
+suite exits non-zero.
+
+    python -m benchmarks.suite                      # run and compare
+    python -m benchmarks.suite --update-baseline    # accept current numbers
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+
+from benchmarks.bench_csv import UploadedCsv, synthetic_csv
+from benchmarks.stub_backend import StubBackend
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "results.json")
+
+CONFIG = {
+    "iterations": 10000,
+    "max_simulation_days": 365,
+    "account_type": "ftt:GT",
+    "multiplier": 20.0,
+    "round_trip_cost": 0.0,
+    "histogram": True,
+    "condition_end_state": "All",
+    "max_payouts": 12,
+    "avg_trades_per_day": 10.0,
+    "stop_loss": 40.0,
+    "take_profit": 40.0,
+    "win_percentage": 50.0,
+}
+
+
+def metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_run_simulation(levels: List[int], requests_per_level: int) -> Dict[str, Dict[str, Any]]:
+    """Latency and throughput of run_simulation through the pooled client"""
+    from utils.api import run_simulation
+
+    results = {}
+    counter = iter(range(10**9))
+    for level in levels:
+        latencies = []
+
+        def one_call(_):
+            # Distinct seeds so the result cache never answers
+            config = dict(CONFIG, seed=next(counter) + 1)
+            start = time.perf_counter()
+            if run_simulation(config, engine="backend") is None:
+                raise RuntimeError("run_simulation failed")
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            list(pool.map(one_call, range(requests_per_level)))
+        elapsed = time.perf_counter() - start
+
+        prefix = f"run_simulation.c{level}"
+        results[f"{prefix}.p50_ms"] = metric(percentile(latencies, 0.50) * 1000, "ms", "lower")
+        results[f"{prefix}.p95_ms"] = metric(percentile(latencies, 0.95) * 1000, "ms", "lower")
+        results[f"{prefix}.throughput"] = metric(requests_per_level / elapsed, "req/s", "higher")
+    return results
+
+
+def bench_validate_csv(row_counts: List[int], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """validate_csv_file throughput on synthetic files"""
+    from utils.security import validate_csv_file
+
+    results = {}
+    for rows in row_counts:
+        data = synthetic_csv(rows)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ok, error, _ = validate_csv_file(UploadedCsv(data), max_rows=rows)
+            timings.append(time.perf_counter() - start)
+            if not ok:
+                raise RuntimeError(error)
+        best = min(timings)
+        results[f"validate_csv.{rows}_rows.ms"] = metric(best * 1000, "ms", "lower")
+        results[f"validate_csv.{rows}_rows.rows_per_s"] = metric(rows / best, "rows/s", "higher")
+    return results
+
+
+def bench_display_results(histogram_bytes: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """display_results cost with and without histogram decoding (bare-mode Streamlit)"""
+    from benchmarks.stub_backend import fake_result
+    from components import results as results_module
+
+    result = fake_result(CONFIG, histogram_bytes)
+
+    def timed(fn: Callable[[], None]) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def cold():
+        results_module._figure_from_json.cache_clear()
+        results_module.display_results(result)
+
+    results_module.display_results(result)
+    return {
+        "display_results.cold_ms": metric(timed(cold) * 1000, "ms", "lower"),
+        "display_results.memoized_ms": metric(timed(lambda: results_module.display_results(result)) * 1000,
+                                              "ms", "lower"),
+        "display_results.histogram_json_kb": metric(len(result["histogram_plotly_json"]) / 1024, "KiB", "lower"),
+    }
+
+
+def bench_startup(runs: int) -> Dict[str, Dict[str, Any]]:
+    """Time to first render and app import time in fresh processes"""
+    from benchmarks.bench_startup import measure
+
+    startup = measure(runs)
+    if startup["exceptions"]:
+        raise RuntimeError(f"First render raised: {startup['exceptions']}")
+    return {
+        "startup.first_render_ms": metric(startup["first_render_ms"], "ms", "lower"),
+        "startup.import_ms": metric(startup["import_ms"], "ms", "lower"),
+    }
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Names and deltas of metrics that regressed beyond the tolerance"""
+    regressions = []
+    for name, entry in current.items():
+        reference = baseline.get(name)
+        if reference is None or not reference["value"]:
+            continue
+        change = (entry["value"] - reference["value"]) / reference["value"]
+        worse = change > tolerance if entry["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(f"{name}: {reference['value']} -> {entry['value']} {entry['unit']} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub backend latency")
+    parser.add_argument("--histogram-bytes", type=int, default=200000, help="stub histogram size")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--csv-rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Bare-mode Streamlit calls (run_simulation, display_results) warn about
+    # the missing script context. Parse the config first: parsing applies
+    # logger.level and would undo this.
+    streamlit_config.get_config_options()
+    streamlit_logger.set_log_level("error")
+
+    with StubBackend(latency_ms=args.latency_ms, histogram_bytes=args.histogram_bytes) as stub:
+        os.environ["PROPSIM_API_URL"] = stub.url
+        metrics = {}
+        metrics.update(bench_run_simulation(args.concurrency, args.requests))
+        metrics.update(bench_validate_csv(args.csv_rows, args.repeat))
+        metrics.update(bench_display_results(args.histogram_bytes, args.repeat))
+    metrics.update(bench_startup(args.repeat))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "baseline", "update_baseline")},
+        "metrics": metrics,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, entry in metrics.items():
+        print(f"{name:45s} {entry['value']:>12.2f} {entry['unit']}")
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["metrics"]
+    regressions = compare(metrics, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import streamlit as st
+import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from config.accounts import ACCOUNT_LABELS, ACCOUNT_OPTIONS
+from components.jobs import display_job, forget_job, remember_job
+from components.results import display_engine_notice
+from config.settings import SIMULATION_ENGINE
+from utils.compare import comparison_task, summarize_account
+from utils.jobs import get_job_queue
+from utils.security import get_client_id
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _comparison_key(owner: str) -> str:
+    return f"{owner}_comparison"
+
+
+def forget_comparison(owner: str):
+    forget_job(_comparison_key(owner))
+
+
+def run_account_comparison(
+    owner: str,
+    base_config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    engine: str = SIMULATION_ENGINE,
+    csv_digest: Optional[str] = None
+):
+    """
+    Queue base_config on every account; display_comparison follows the job.
+    csv_digest: content hash of csv_file, so the upload is not hashed again.
+    Raises JobQueueFullError.
+    """
+    job_id = get_job_queue().submit(
+        base_config,
+        csv_file,
+        trades=trades,
+        engine=engine,
+        csv_digest=csv_digest,
+        client=get_client_id(),
+        task=comparison_task(base_config),
+    )
+    remember_job(_comparison_key(owner), job_id)
+
+
+def _density(results: Dict[str, Any]):
+    """Bin centers and densities of the balance histogram, or None if the result has none"""
+    # NumPy (via utils.stats) is imported only once a comparison is shown
+    from utils.stats import result_histogram
+
+    histogram = result_histogram(results)
+    if histogram is None:
+        return None
+    edges, counts = histogram["edges"], histogram["counts"]
+    total = sum(counts)
+    if total <= 0:
+        return None
+    centers = [(lo + hi) / 2 for lo, hi in zip(edges, edges[1:])]
+    return centers, [c / (total * (hi - lo)) if hi > lo else 0.0 for c, lo, hi in zip(counts, edges, edges[1:])]
+
+
+def display_comparison_result(comparison: Dict[str, Any]):
+    """Side-by-side statistics, end states and balance distributions of a comparison (see comparison_task)"""
+    # Account order of the selectbox, whatever order the runs finished in
+    results = {a: comparison["results"][a] for a in ACCOUNT_OPTIONS if a in comparison["results"]}
+    for account, error in comparison["errors"].items():
+        st.error(f"{ACCOUNT_LABELS.get(account, account)}: {error}")
+    if not results:
+        return
+
+    st.markdown("### Account Comparison")
+    display_result_comparison({ACCOUNT_LABELS[a]: r for a, r in results.items()}, "Account")
+
+
+def display_comparison(owner: str):
+    """The form's current comparison: progress while it runs, then the accounts side by side"""
+    display_job(_comparison_key(owner), render=display_comparison_result)
+
+
+def display_result_comparison(results: Dict[str, Dict[str, Any]], index_name: str):
+    """Statistics table, grouped end states and overlaid balance densities of results keyed by label"""
+    import pandas as pd
+
+    table = pd.DataFrame(
+        [summarize_account(r) for r in results.values()],
+        index=pd.Index(list(results), name=index_name),
+    )
+    st.dataframe(table.round(2), use_container_width=True)
+    local = [label for label, r in results.items() if r.get("engine") == "local"]
+    if local:
+        which = None if len(local) == len(results) else ", ".join(local)
+        display_engine_notice(which, fallback=any(results[label].get("fallback") for label in local))
+
+    st.markdown("### End States")
+    states = list(dict.fromkeys(s for r in results.values() for s in r.get("end_state_percentages", {})))
+    end_states = go.Figure([
+        go.Bar(
+            name=label,
+            x=states,
+            y=[r.get("end_state_percentages", {}).get(s, 0.0) for s in states],
+        )
+        for label, r in results.items()
+    ])
+    end_states.update_layout(barmode="group", yaxis_title="Percentage")
+    st.plotly_chart(end_states, use_container_width=True)
+
+    distributions = go.Figure()
+    for label, r in results.items():
+        density = _density(r)
+        if density is not None:
+            distributions.add_trace(go.Scatter(
+                x=density[0], y=density[1], mode="lines", line_shape="hvh", name=label
+            ))
+    if distributions.data:
+        st.markdown("### Distribution of Final Account Balances")
+        distributions.update_layout(xaxis_title="Final Balance", yaxis_title="Density")
+        st.plotly_chart(distributions, use_container_width=True)
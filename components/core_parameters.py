@@ -1,5 +1,14 @@
 import streamlit as st
-from config.accounts import ACCOUNT_TYPES, COMMON_MULTIPLIERS
+from config.accounts import (
+    ACCOUNT_OPTIONS,
+    ACCOUNT_LABELS,
+    COMMON_MULTIPLIERS,
+    MULTIPLIER_LABELS,
+    MULTIPLIER_POSITIONS,
+    CUSTOM_MULTIPLIER,
+)
+
+END_STATE_OPTIONS = ["All", "Busted", "TimeOut", "MaxPayouts"]
 
 def display_core_parameters(prefix=""):
     """
@@ -10,16 +19,10 @@ def display_core_parameters(prefix=""):
 
     with col1:
         # Account Type Selection
-        account_options = []
-        for provider, info in ACCOUNT_TYPES.items():
-            account_options.extend(
-                [(account["value"], f"{info['label']} - {account['label']}")
-                 for account in info["accounts"]]
-            )
         account_type = st.selectbox(
             "Account Type",
-            options=[opt[0] for opt in account_options],
-            format_func=lambda x: next(opt[1] for opt in account_options if opt[0] == x),
+            options=ACCOUNT_OPTIONS,
+            format_func=ACCOUNT_LABELS.__getitem__,
             index=2,  # Default to GT
             key=f"{prefix}account_type"
         )
@@ -36,19 +39,16 @@ def display_core_parameters(prefix=""):
         )
 
     with col3:
-        # Point Multiplier
-        multiplier_options = [(m["value"], m["label"]) for m in COMMON_MULTIPLIERS]
-        multiplier_options.append(("custom", "Custom Value..."))
-
+        # Point Multiplier (selected by position, see config.accounts)
         multiplier_selection = st.selectbox(
             "Point Multiplier",
-            options=[opt[0] for opt in multiplier_options],
-            format_func=lambda x: next(opt[1] for opt in multiplier_options if opt[0] == x),
+            options=MULTIPLIER_POSITIONS,
+            format_func=MULTIPLIER_LABELS.__getitem__,
             index=1,  # Default to NQ
             key=f"{prefix}multiplier_selection"
         )
 
-        if multiplier_selection == "custom":
+        if multiplier_selection == CUSTOM_MULTIPLIER:
             multiplier = st.number_input(
                 "Custom Multiplier",
                 min_value=1,
@@ -58,7 +58,7 @@ def display_core_parameters(prefix=""):
                 key=f"{prefix}custom_multiplier"
             )
         else:
-            multiplier = multiplier_selection
+            multiplier = COMMON_MULTIPLIERS[multiplier_selection]["value"]
 
     col4, col5, col6 = st.columns(3)
 
@@ -70,6 +70,7 @@ def display_core_parameters(prefix=""):
             max_value=100000,
             value=10000,
             step=1000,
+            help="With Auto Iterations, the most iterations the run may use",
             key=f"{prefix}iterations"
         )
 
@@ -88,16 +89,76 @@ def display_core_parameters(prefix=""):
         # End State Filter
         end_state = st.selectbox(
             "End State Filter",
-            options=["All", "Busted", "TimeOut", "MaxPayouts"],
+            options=END_STATE_OPTIONS,
             index=0,
             key=f"{prefix}end_state"
         )
 
+    col7, col8, col9 = st.columns(3)
+
+    with col7:
+        # Random Seed (fixed seeds make results reproducible and cacheable)
+        seed = st.number_input(
+            "Random Seed (0 = random)",
+            min_value=0,
+            max_value=2**32 - 1,
+            value=0,
+            step=1,
+            key=f"{prefix}seed"
+        )
+
+    with col8:
+        # Progressive results (batches merged as they arrive)
+        progressive = st.checkbox(
+            "Progressive Results",
+            value=False,
+            help="Show running estimates while the simulation is in progress",
+            key=f"{prefix}progressive"
+        )
+
+    with col9:
+        # Stop once the results are precise enough
+        auto_iterations = st.checkbox(
+            "Auto Iterations",
+            value=False,
+            help="Run batches until the 95% confidence intervals are within the tolerances below",
+            key=f"{prefix}auto_iterations"
+        )
+
+    balance_tolerance, end_state_tolerance = None, None
+    if auto_iterations:
+        col10, col11, _ = st.columns(3)
+
+        with col10:
+            balance_tolerance = st.number_input(
+                "Mean Balance Tolerance (±$)",
+                min_value=1.0,
+                max_value=10000.0,
+                value=100.0,
+                step=10.0,
+                key=f"{prefix}balance_tolerance"
+            )
+
+        with col11:
+            end_state_tolerance = st.number_input(
+                "End State Tolerance (± points)",
+                min_value=0.1,
+                max_value=25.0,
+                value=1.0,
+                step=0.1,
+                key=f"{prefix}end_state_tolerance"
+            )
+
     return {
         "account_type": account_type,
         "round_trip_cost": round_trip_cost,
         "multiplier": multiplier,
         "iterations": iterations,
         "max_simulation_days": max_days,
-        "condition_end_state": end_state
+        "condition_end_state": end_state,
+        "seed": seed,
+        "progressive": progressive,
+        "auto_iterations": auto_iterations,
+        "balance_tolerance": balance_tolerance,
+        "end_state_tolerance": end_state_tolerance
     }
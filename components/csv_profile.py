@@ -0,0 +1,29 @@
+import streamlit as st
+from utils.csv_profile import CsvProfile
+
+
+def display_csv_profile(profile: CsvProfile):
+    """Preview of an uploaded trade file: validation status, span and distributions"""
+    if not profile.valid:
+        st.error(profile.error)
+        return
+
+    with st.expander("File Profile", expanded=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Trades", f"{profile.rows:,}")
+        with col2:
+            st.metric("Trading Days", f"{profile.trading_days:,}")
+        with col3:
+            st.metric("Trades per Day", f"{profile.trades_per_day:.1f}")
+        with col4:
+            st.metric("Winning Trades", f"{profile.win_rate:.1f}%")
+
+        st.caption(f"{profile.start:%Y-%m-%d} to {profile.end:%Y-%m-%d}")
+
+        import pandas as pd
+
+        distributions = pd.DataFrame(
+            {"Return": profile.returns, "Max Opposite Excursion": profile.excursions}
+        ).T
+        st.dataframe(distributions.round(2), use_container_width=True)
@@ -1,11 +1,19 @@
 import streamlit as st
 import logging
+from components.compare import display_comparison, forget_comparison, run_account_comparison
 from components.core_parameters import display_core_parameters
-from components.results import display_results
-from utils.api import run_simulation
+from components.csv_profile import display_csv_profile
+from components.jobs import auto_tolerances, display_job, forget_job, remember_job
+from config.accounts import ACCOUNT_OPTIONS
+from config.settings import HISTOGRAM_FORMAT
+from utils.jobs import JobQueueFullError, PRIORITY_LOW, PRIORITY_NORMAL, get_job_queue
+from utils.metrics import collect_timings, timed
+from utils.csv_profile import get_csv_profile
+from utils.upload_store import StoredFile, load_upload, release_upload, store_upload
 from utils.security import (
-    validate_csv_file,
     check_rate_limit,
+    get_client_id,
+    rate_limit_message,
     display_challenge,
     init_session_state,
     clear_session_state,
@@ -14,6 +22,7 @@ from utils.security import (
 logger = logging.getLogger(__name__)
 
 
+@st.fragment
 def display_historical_form():
     # Initialize session state
     init_session_state()
@@ -29,21 +38,38 @@ def display_historical_form():
         key="historical_csv_upload"
     )
 
+    # The session keeps only the content hash; the file itself is stored
+    # once per process and validated and summarized once per content
+    csv_digest = None
+    if csv_file is not None:
+        csv_digest = store_upload("historical", csv_file)
+        display_csv_profile(get_csv_profile(csv_digest, lambda: csv_file))
+    elif st.session_state.get("historical_upload"):
+        release_upload("historical")
+
     # Core parameters
     params = display_core_parameters(prefix="historical_")
 
+    compare_accounts = st.checkbox(
+        "Compare All Accounts",
+        value=False,
+        help="Run this trade file on every account at once and compare the results",
+        key="historical_compare_accounts"
+    )
+
     run_button = st.button("Run Simulation", type="primary", key="historical_run_button")
 
     # Store parameters in session state when button is clicked
     if run_button:
-        st.session_state.current_params = params
-        st.session_state.current_csv = csv_file
+        st.session_state.current_params = dict(params, compare_accounts=compare_accounts)
+        st.session_state.current_csv_digest = csv_digest
 
     # Check if we should run the simulation
     if (run_button or st.session_state.run_simulation) and st.session_state.current_params is not None:
-        # Check rate limit
-        if not check_rate_limit():
-            st.error("Rate limit exceeded. Please wait before trying again.")
+        # Check rate limit: a comparison counts one run per account
+        compare = st.session_state.current_params.get("compare_accounts")
+        if not check_rate_limit(len(ACCOUNT_OPTIONS) if compare else 1):
+            st.error(rate_limit_message())
             return
 
         # Show challenge dialog if not verified
@@ -54,38 +80,66 @@ def display_historical_form():
         # Clear the run flag
         st.session_state.run_simulation = False
 
-        csv_file = st.session_state.current_csv
-        if csv_file is None:
+        csv_digest = st.session_state.current_csv_digest
+        if csv_digest is None:
             st.error("Please upload a CSV file")
             return
 
+        csv_data = load_upload("historical", csv_digest)
+        if csv_data is None:
+            st.error("The uploaded file has expired. Please upload it again.")
+            return
+
         try:
-            # Validate CSV file
-            is_valid, error_msg, df = validate_csv_file(csv_file)
-            if not is_valid:
-                st.error(error_msg)
-                return
-
-            # Reset file pointer for sending
-            csv_file.seek(0)
-
-            # Prepare configuration
-            params = st.session_state.current_params
-            config = {
-                "iterations": int(params["iterations"]),
-                "max_simulation_days": int(params["max_simulation_days"]),
-                "account_type": str(params["account_type"]),
-                "multiplier": float(params["multiplier"]),
-                "round_trip_cost": float(params["round_trip_cost"]),
-                "histogram": True,
-                "condition_end_state": str(params["condition_end_state"]),
-                "max_payouts": 12
-            }
-
-            with st.spinner("Running simulation..."):
-                results = run_simulation(config, csv_file.getvalue())
-                if results:
-                    display_results(results)
+            with collect_timings() as timings:
+                # Cached since upload unless the profile has been evicted
+                with timed("csv_profile"):
+                    profile = get_csv_profile(csv_digest, lambda: StoredFile(csv_data))
+                if not profile.valid:
+                    st.error(profile.error)
+                    return
+                df = profile.trades
+
+                # Prepare configuration
+                params = st.session_state.current_params
+                config = {
+                    "iterations": int(params["iterations"]),
+                    "max_simulation_days": int(params["max_simulation_days"]),
+                    "account_type": str(params["account_type"]),
+                    "multiplier": float(params["multiplier"]),
+                    "round_trip_cost": float(params["round_trip_cost"]),
+                    "histogram": True,
+                    "condition_end_state": str(params["condition_end_state"]),
+                    "max_payouts": 12
+                }
+
+                if params["seed"]:
+                    config["seed"] = int(params["seed"])
+                if HISTOGRAM_FORMAT != "plotly":
+                    config["histogram_format"] = HISTOGRAM_FORMAT
+
+            if params["compare_accounts"]:
+                # The file is encoded once and shared by every account's request
+                forget_job("historical")
+                run_account_comparison("historical", config, csv_data, trades=df, csv_digest=csv_digest)
+            else:
+                # Queue the run; display_job below follows it across reruns
+                job_id = get_job_queue().submit(
+                    config,
+                    csv_data,
+                    trades=df,
+                    priority=PRIORITY_LOW if params["progressive"] else PRIORITY_NORMAL,
+                    progressive=params["progressive"],
+                    tolerances=auto_tolerances(params),
+                    timings=timings,
+                    csv_digest=csv_digest,
+                    client=get_client_id(),
+                )
+                remember_job("historical", job_id)
+                forget_comparison("historical")
+
+        except JobQueueFullError as e:
+            st.error(str(e))
 
         except Exception as e:
             logger.error(f"Error in simulation: {str(e)}")
@@ -94,3 +148,6 @@ def display_historical_form():
         finally:
             # Clear stored parameters after simulation
             clear_session_state()
+
+    display_comparison("historical")
+    display_job("historical")
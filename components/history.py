@@ -0,0 +1,138 @@
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+import streamlit as st
+from components.compare import display_result_comparison
+from components.results import display_results
+from config.accounts import ACCOUNT_LABELS, ACCOUNT_OPTIONS
+from config.settings import HISTORY_SHOW_ALL_CLIENTS
+from utils.history import get_run_history
+from utils.security import get_client_id
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Most selected runs compared side by side
+MAX_COMPARED_RUNS = 8
+
+# Run source: None lists both, True only runs on an uploaded trade file
+SOURCES = {"All": None, "Simulated Parameters": False, "Historical Data": True}
+
+# Filterable columns and their labels
+RANGE_FILTERS = {
+    "multiplier": "Multiplier",
+    "stop_loss": "Stop Loss",
+    "take_profit": "Take Profit",
+    "win_percentage": "Win %",
+}
+
+TABLE_COLUMNS = {
+    "id": "Run",
+    "recorded": "Recorded",
+    "account": "Account",
+    "multiplier": "Multiplier",
+    "stop_loss": "Stop Loss",
+    "take_profit": "Take Profit",
+    "win_percentage": "Win %",
+    "avg_trades_per_day": "Trades/Day",
+    "csv_digest": "Trade File",
+    "iterations": "Iterations",
+    "mean_balance": "Mean Balance",
+    "median_balance": "Median Balance",
+    "busted": "Busted (%)",
+    "timeout": "TimeOut (%)",
+    "max_payouts": "MaxPayouts (%)",
+    "run_seconds": "Run Time (s)",
+    "engine": "Engine",
+}
+
+
+def _bounds(label: str, key: str) -> Tuple[Optional[float], Optional[float]]:
+    """Min and max inputs; an empty input leaves that side open"""
+    col1, col2 = st.columns(2)
+    with col1:
+        low = st.number_input(f"Min {label}", value=None, key=f"{key}_min")
+    with col2:
+        high = st.number_input(f"Max {label}", value=None, key=f"{key}_max")
+    return low, high
+
+
+def _run_label(row: "pd.Series") -> str:
+    return f"#{row['id']} {ACCOUNT_LABELS.get(row['account_type'], row['account_type'])}"
+
+
+@st.fragment
+def display_history():
+    """Filterable list of past runs; select one to show it again, or several to compare them"""
+    history = get_run_history()
+    if history is None:
+        st.info("Run history is disabled on this server")
+        return
+
+    st.markdown("### Run History")
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        account_types = st.multiselect(
+            "Accounts",
+            options=ACCOUNT_OPTIONS,
+            format_func=ACCOUNT_LABELS.__getitem__,
+            placeholder="All accounts",
+            key="history_accounts"
+        )
+    with col2:
+        source = st.radio("Runs", options=list(SOURCES), horizontal=True, key="history_source")
+    with col3:
+        # Other clients' runs are listed only where the server allows it
+        mine = True
+        if HISTORY_SHOW_ALL_CLIENTS:
+            mine = st.checkbox("Only my runs", value=True, key="history_mine")
+
+    ranges = {}
+    for column, (name, label) in zip(st.columns(len(RANGE_FILTERS)), RANGE_FILTERS.items()):
+        with column:
+            ranges[name] = _bounds(label, f"history_{name}")
+
+    start = time.perf_counter()
+    runs = history.query(
+        account_types,
+        ranges,
+        client=get_client_id() if mine else None,
+        trade_file=SOURCES[source],
+    )
+    elapsed_ms = 1000 * (time.perf_counter() - start)
+    st.caption(f"{len(runs):,} runs (query took {elapsed_ms:.1f} ms)")
+    if runs.empty:
+        return
+
+    import pandas as pd
+
+    table = runs.round(2).assign(
+        recorded=pd.to_datetime(runs["recorded_at"], unit="s"),
+        account=runs["account_type"].map(lambda a: ACCOUNT_LABELS.get(a, a)),
+        csv_digest=runs["csv_digest"].str[:12],
+    )[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS)
+    selection = st.dataframe(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="history_table"
+    ).selection.rows
+
+    if len(selection) == 1:
+        run = history.load(int(runs.iloc[selection[0]]["id"]))
+        if run is not None:
+            st.markdown(f"### {_run_label(runs.iloc[selection[0]])}")
+            display_results(run["results"])
+    elif selection:
+        if len(selection) > MAX_COMPARED_RUNS:
+            st.warning(f"Comparing the first {MAX_COMPARED_RUNS} selected runs")
+        compared = {}
+        for position in selection[:MAX_COMPARED_RUNS]:
+            row = runs.iloc[position]
+            run = history.load(int(row["id"]))
+            if run is not None:
+                compared[_run_label(row)] = run["results"]
+        if compared:
+            st.markdown("### Run Comparison")
+            display_result_comparison(compared, "Run")
@@ -0,0 +1,133 @@
+import streamlit as st
+from typing import Any, Callable, Dict, Optional
+from components.results import display_results
+from components.timings import display_timings
+from config.settings import JOB_POLL_SECONDS
+from utils.jobs import CANCELLED, DONE, QUEUED, Job, get_job_queue
+from utils.metrics import collect_timings, timed
+from utils.security import get_client_id
+
+
+def _job_key(owner: str) -> str:
+    return f"{owner}_job"
+
+
+def remember_job(owner: str, job_id: str):
+    """
+    Make job_id the form's current job, also in the URL so a refresh finds
+    it. A previous job of the form that is still pending is cancelled.
+    """
+    previous = current_job_id(owner)
+    if previous and previous != job_id:
+        get_job_queue().cancel(previous, client=get_client_id())
+    st.session_state[_job_key(owner)] = job_id
+    st.query_params[_job_key(owner)] = job_id
+
+
+def forget_job(owner: str):
+    st.session_state.pop(_job_key(owner), None)
+    st.query_params.pop(_job_key(owner), None)
+
+
+def current_job_id(owner: str) -> Optional[str]:
+    """
+    The form's job id, from the session or the URL. A URL can be shared,
+    so jobs are only ever looked up or cancelled together with the
+    caller's client id (see JobQueue.get): other clients' jobs stay hidden.
+    """
+    return st.session_state.get(_job_key(owner)) or st.query_params.get(_job_key(owner))
+
+
+def auto_tolerances(params: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """Job tolerances from display_core_parameters, or None without Auto Iterations"""
+    if not params.get("auto_iterations"):
+        return None
+    return {
+        "mean_balance": float(params["balance_tolerance"]),
+        "end_state_percentages": float(params["end_state_tolerance"]),
+    }
+
+
+def _display_finished(job: Job, render: Optional[Callable[[Dict[str, Any]], None]] = None):
+    # Each rerun's render is shown with the job's stages without adding to them
+    timings = job.timings.copy()
+    render = render or display_results
+    if job.status == DONE and job.tolerances:
+        cap = int(job.config["iterations"])
+        if job.converged:
+            st.caption(f"Auto Iterations: precise enough after {job.iterations_completed:,} of up to {cap:,} iterations")
+        else:
+            st.caption(f"Auto Iterations: used all {cap:,} iterations without reaching the tolerances")
+    if job.status == DONE:
+        with collect_timings(timings), timed("render"):
+            render(job.result)
+    elif job.status == CANCELLED:
+        if job.result:
+            if job.task is not None:
+                st.info(f"Stopped early after {job.progress_text}")
+            else:
+                st.info(f"Stopped early after {job.iterations_completed:,} iterations")
+            with collect_timings(timings), timed("render"):
+                render(job.result)
+        else:
+            st.info("Simulation cancelled")
+    else:
+        st.error(job.error)
+        if job.response_text:
+            st.error(f"Server response: {job.response_text}")
+    display_timings(timings)
+
+
+def _poll_job(job_id: str, owner: str, render: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """Status of a queued or running job; reruns the app once it finishes"""
+    queue = get_job_queue()
+    client = get_client_id()
+    job = queue.get(job_id, client)
+    if job is None or job.finished:
+        st.rerun()
+
+    total = int(job.config["iterations"])
+    if job.status == QUEUED:
+        st.info(f"Queued: number {queue.position(job_id) or 1} in line")
+    elif job.task is not None:
+        st.progress(job.progress, text=job.progress_text or "Starting...")
+    elif job.gate_position:
+        st.info(f"The simulation server is busy. You are number {job.gate_position} in line.")
+    elif job.tolerances:
+        done = job.iterations_completed
+        st.progress(done / total, text=f"{done:,} iterations so far (at most {total:,}, stops when precise enough)")
+    elif job.progressive:
+        done = job.iterations_completed
+        st.progress(done / total, text=f"{done:,} / {total:,} iterations")
+    else:
+        st.info(f"Running simulation ({total:,} iterations)...")
+
+    st.button("Stop", key=f"{owner}_job_stop", on_click=queue.cancel, args=(job_id, client))
+
+    if (job.progressive or job.task is not None) and job.result:
+        with timed("render"):
+            (render or display_results)(job.result)
+
+
+def display_job(owner: str, render: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """
+    Show the form's current job: live status while it is queued or
+    running (polled in a fragment, so only this part reruns), then the
+    result, which stays available across reruns and page refreshes.
+    render: shows the job's result instead of display_results, e.g. the
+    table of a sweep task; task results are also shown while they grow.
+    """
+    job_id = current_job_id(owner)
+    if not job_id:
+        return
+
+    job = get_job_queue().get(job_id, get_client_id())
+    if job is None:
+        st.info("The previous result has expired. Run the simulation again to see it.")
+        forget_job(owner)
+        return
+
+    if job.finished:
+        _display_finished(job, render)
+    else:
+        st.fragment(_poll_job, run_every=JOB_POLL_SECONDS)(job_id, owner, render)
@@ -0,0 +1,118 @@
+import streamlit as st
+from typing import Any, Dict
+from components.compare import display_result_comparison
+from components.jobs import display_job, forget_job, remember_job
+from config.accounts import ACCOUNT_LABELS, ACCOUNT_OPTIONS
+from utils.jobs import get_job_queue
+from utils.security import get_client_id
+
+
+def _paired_key(owner: str) -> str:
+    return f"{owner}_paired"
+
+
+def forget_paired(owner: str):
+    forget_job(_paired_key(owner))
+
+
+def display_variant_parameters(params: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Inputs of the what-if variant, defaulting to the baseline's; returns its config overrides"""
+    st.markdown("#### Variant")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        account_type = st.selectbox(
+            "Variant Account Type",
+            options=ACCOUNT_OPTIONS,
+            format_func=ACCOUNT_LABELS.__getitem__,
+            index=ACCOUNT_OPTIONS.index(params["account_type"]),
+            key=f"{prefix}variant_account_type"
+        )
+
+    with col2:
+        round_trip_cost = st.number_input(
+            "Variant Round Trip Cost",
+            min_value=0.0,
+            max_value=100.0,
+            value=float(params["round_trip_cost"]),
+            step=0.01,
+            key=f"{prefix}variant_round_trip_cost"
+        )
+
+    with col3:
+        multiplier = st.number_input(
+            "Variant Multiplier",
+            min_value=1,
+            max_value=2000,
+            value=int(params["multiplier"]),
+            step=1,
+            key=f"{prefix}variant_multiplier"
+        )
+
+    return {"account_type": account_type, "round_trip_cost": round_trip_cost, "multiplier": float(multiplier)}
+
+
+def run_paired_comparison(owner: str, baseline_config: Dict[str, Any], variant_config: Dict[str, Any]):
+    """
+    Queue the baseline and the variant on common random numbers (local
+    engine only); display_paired follows the job. Raises JobQueueFullError.
+    """
+    # NumPy and the local engine are imported only once a comparison is run
+    from utils.paired import paired_task
+
+    job_id = get_job_queue().submit(
+        baseline_config,
+        engine="local",
+        client=get_client_id(),
+        task=paired_task(baseline_config, variant_config),
+    )
+    remember_job(_paired_key(owner), job_id)
+
+
+def display_paired_result(comparison: Dict[str, Any]):
+    """Paired differences with their confidence intervals, then both runs side by side"""
+    import pandas as pd
+
+    st.markdown("### Paired What-If")
+    condition = comparison["condition_end_state"]
+    subset = "over all iterations" if condition == "All" else (
+        f"over all iterations, except balance and days over each side's iterations ending {condition}"
+    )
+    st.caption(
+        f"Baseline and variant ran {comparison['iterations']:,} iterations each on the local engine, "
+        f"on the same random paths (seed {comparison['seed']}). Differences are variant minus baseline "
+        f"{subset}, with 95% confidence intervals."
+    )
+
+    balance = comparison["differences"]["Mean Balance"]
+    if abs(balance["difference"]) > balance["halfwidth"]:
+        st.info(f"The variant changes the mean balance by {balance['difference']:,.2f} ± {balance['halfwidth']:,.2f}")
+    else:
+        st.info(f"No change in mean balance is detectable at this precision (± {balance['halfwidth']:,.2f})")
+
+    table = pd.DataFrame(
+        [
+            {
+                "Baseline": d["baseline"],
+                "Variant": d["variant"],
+                "Difference": d["difference"],
+                "± 95%": d["halfwidth"],
+                "± 95% (independent runs)": d["unpaired_halfwidth"],
+            }
+            for d in comparison["differences"].values()
+        ],
+        index=pd.Index(list(comparison["differences"]), name="Statistic"),
+    )
+    st.dataframe(table.round(2), use_container_width=True)
+    if comparison["unpaired_iterations"] != float("inf"):
+        st.caption(
+            f"Two independent runs would need about {comparison['unpaired_iterations']:,.0f} iterations each "
+            f"for the same precision on the mean balance."
+        )
+
+    display_result_comparison({"Baseline": comparison["baseline"], "Variant": comparison["variant"]}, "Run")
+
+
+def display_paired(owner: str):
+    """The form's current paired what-if: progress while it runs, then the comparison"""
+    display_job(_paired_key(owner), render=display_paired_result)
@@ -1,16 +1,136 @@
 import streamlit as st
-import plotly.io as pio
 import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+from config.settings import HISTOGRAM_MAX_BINS
+
+
+def downsample_bins(
+    edges: Sequence[float],
+    counts: Sequence[float],
+    max_bins: int = HISTOGRAM_MAX_BINS
+) -> Tuple[list, list]:
+    """
+    Trim empty outer bins, then merge adjacent bins until at most
+    max_bins remain. Merging keeps total counts and the overall range.
+    """
+    counts = list(counts)
+    edges = list(edges)
+    first = next((i for i, c in enumerate(counts) if c), 0)
+    last = next((i for i in range(len(counts) - 1, -1, -1) if counts[i]), len(counts) - 1)
+    counts = counts[first:last + 1]
+    edges = edges[first:last + 2]
+
+    if len(counts) <= max_bins:
+        return edges, counts
+
+    factor = math.ceil(len(counts) / max_bins)
+    merged_counts = [sum(counts[i:i + factor]) for i in range(0, len(counts), factor)]
+    merged_edges = edges[::factor]
+    if len(merged_edges) < len(merged_counts) + 1:
+        merged_edges.append(edges[-1])
+    return merged_edges, merged_counts
+
+
+def _bar_figure(edges: Sequence[float], heights: Sequence[float], y_title: str) -> Dict[str, Any]:
+    """Plotly figure dict of bars spanning each [edge, next edge) interval"""
+    centers = [(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])]
+    widths = [hi - lo for lo, hi in zip(edges[:-1], edges[1:])]
+    return {
+        "data": [{"type": "bar", "x": centers, "y": list(heights), "width": widths}],
+        "layout": {
+            "xaxis": {"title": {"text": "Final Balance"}},
+            "yaxis": {"title": {"text": y_title}},
+            "bargap": 0,
+        },
+    }
+
+
+@lru_cache(maxsize=32)
+def _figure_from_json(histogram_json: str) -> Dict[str, Any]:
+    return json.loads(histogram_json)
+
+
+@lru_cache(maxsize=32)
+def _figure_from_bins(edges: Tuple[float, ...], counts: Tuple[float, ...]) -> Dict[str, Any]:
+    edges, counts = downsample_bins(edges, counts)
+    return _bar_figure(edges, counts, "Count")
+
+
+@lru_cache(maxsize=32)
+def _figure_from_quantiles(probabilities: Tuple[float, ...], values: Tuple[float, ...]) -> Dict[str, Any]:
+    # Probability mass between consecutive quantiles, spread over their interval
+    edges, density = [values[0]], []
+    for i in range(1, len(values)):
+        width = values[i] - values[i - 1]
+        if width <= 0:
+            continue
+        density.append((probabilities[i] - probabilities[i - 1]) / width)
+        edges.append(values[i])
+    return _bar_figure(edges, density, "Density")
+
+
+def histogram_figure(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build the balance histogram from whichever representation the result
+    carries. Figures are memoized by content, so Streamlit reruns showing
+    the same result do not decode or rebuild it again. Callers must treat
+    the returned figure as read-only.
+    """
+    bins = results.get("histogram_bins")
+    if bins:
+        return _figure_from_bins(tuple(bins["edges"]), tuple(bins["counts"]))
+
+    quantiles = results.get("balance_quantiles")
+    if quantiles:
+        return _figure_from_quantiles(tuple(quantiles["probabilities"]), tuple(quantiles["values"]))
+
+    if results.get("histogram_plotly_json"):
+        return _figure_from_json(results["histogram_plotly_json"])
+
+    return None
+
+
+# Shown with every result the local engine computed (see config.accounts.ACCOUNT_RULES)
+LOCAL_ENGINE_NOTE = "the local engine, whose account rules only approximate the backend's"
+
+
+def display_engine_notice(which: Optional[str] = None, fallback: bool = False):
+    """
+    Mark results computed by the local engine; which names them when only
+    some of those shown are. fallback: the backend was selected but could
+    not be reached, which is a warning rather than a note.
+    """
+    message = f"Computed by {LOCAL_ENGINE_NOTE}"
+    if fallback:
+        message += ", because the backend could not be reached"
+    if which:
+        message += f": {which}"
+    if fallback:
+        st.warning(message)
+    else:
+        st.caption(message)
+
 
 def display_results(results):
     """Display simulation results with a nice layout"""
-    
+    if results.get("engine") == "local":
+        display_engine_notice(fallback=bool(results.get("fallback")))
+
+    # 95% confidence half-widths, present on results merged from batches
+    precision = results.get("precision") or {}
+    end_state_precision = precision.get("end_state_percentages", {})
+
     # Create three columns for statistics
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
         st.markdown("### Balance Statistics")
-        st.metric("Mean Balance", f"${results['mean_balance']:.2f}")
+        mean_balance = f"${results['mean_balance']:.2f}"
+        if math.isfinite(precision.get("mean_balance", math.inf)):
+            mean_balance += f" ± {precision['mean_balance']:.2f}"
+        st.metric("Mean Balance", mean_balance)
         st.metric("Median Balance", f"${results['median_balance']:.2f}")
         st.metric("Standard Deviation", f"${results['std_dev']:.2f}")
         st.metric("Positive Balance", f"{results['positive_balance_percentage']:.1f}%")
@@ -25,14 +145,20 @@ def display_results(results):
     with col3:
         st.markdown("### End States")
         for state, percentage in results['end_state_percentages'].items():
-            st.metric(state, f"{percentage:.1f}%")
+            if state in end_state_precision:
+                st.metric(state, f"{percentage:.1f}% ± {end_state_precision[state]:.1f}")
+            else:
+                st.metric(state, f"{percentage:.1f}%")
+
+    if precision:
+        st.caption(f"{results['iterations_completed']:,} iterations; ± values are 95% confidence intervals")
 
     # Display histogram if available
-    if 'histogram_plotly_json' in results and results['histogram_plotly_json']:
+    try:
+        fig = histogram_figure(results)
+    except Exception as e:
+        st.error(f"Error displaying histogram: {str(e)}")
+        fig = None
+    if fig is not None:
         st.markdown("### Distribution of Final Account Balances")
-        try:
-            fig_json = json.loads(results['histogram_plotly_json'])
-            st.plotly_chart(fig_json, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error displaying histogram: {str(e)}")
-
+        st.plotly_chart(fig, use_container_width=True)
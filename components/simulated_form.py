@@ -1,19 +1,45 @@
 import streamlit as st
+from components.compare import display_comparison, forget_comparison, run_account_comparison
 from components.core_parameters import display_core_parameters
-from components.results import display_results
-from utils.api import run_simulation
+from components.jobs import auto_tolerances, display_job, forget_job, remember_job
+from components.paired import display_paired, display_variant_parameters, forget_paired, run_paired_comparison
+from config.accounts import ACCOUNT_OPTIONS
+from config.settings import SIMULATION_ENGINE, HISTOGRAM_FORMAT
+from utils.api import ENGINES
+from utils.jobs import JobQueueFullError, PRIORITY_LOW, PRIORITY_NORMAL, get_job_queue
 from utils.security import (
     check_rate_limit,
+    get_client_id,
+    rate_limit_message,
     display_challenge,
     init_session_state,
     clear_session_state,
 )
 
+ENGINE_LABELS = {
+    "backend": "Backend",
+    "local": "Local",
+    "auto": "Backend, local fallback",
+}
 
+@st.fragment
 def display_simulated_form():
     # Initialize session state
     init_session_state()
 
+    sweep_mode = st.toggle(
+        "Parameter Sweep Mode",
+        value=False,
+        help="Run a grid of strategy parameters concurrently",
+        key="simulated_sweep_mode"
+    )
+    if sweep_mode:
+        # Sweeps pull in pandas and NumPy; import them only once asked for
+        from components.sweep_form import display_sweep_form
+
+        display_sweep_form()
+        return
+
     st.markdown("### Simulate with Strategy Parameters")
     st.markdown("Enter your trading strategy parameters for the simulation")
 
@@ -63,6 +89,39 @@ def display_simulated_form():
     # Core parameters
     params = display_core_parameters(prefix="simulated_")
 
+    engine = st.radio(
+        "Simulation Engine",
+        options=list(ENGINES),
+        format_func=ENGINE_LABELS.get,
+        index=ENGINES.index(SIMULATION_ENGINE) if SIMULATION_ENGINE in ENGINES else 0,
+        horizontal=True,
+        help="Local runs an in-process estimate of the backend's account rules",
+        key="simulated_engine"
+    )
+
+    compare_accounts = st.checkbox(
+        "Compare All Accounts",
+        value=False,
+        help="Run this strategy on every account at once and compare the results",
+        key="simulated_compare_accounts"
+    )
+
+    # Common random numbers are only available in the local engine
+    what_if = st.checkbox(
+        "Paired What-If",
+        value=False,
+        disabled=engine != "local",
+        help="Compare with another account, cost or multiplier on the same random paths; "
+             "small differences show up with far fewer iterations than two separate runs",
+        key="simulated_what_if"
+    )
+    variant = None
+    if engine != "local":
+        st.caption("Paired What-If runs on the local engine only; select Local to use it")
+    elif what_if:
+        st.caption("Paired runs ignore Compare All Accounts")
+        variant = display_variant_parameters(params, prefix="simulated_")
+
     run_button = st.button("Run Simulation", type="primary", key="simulated_run_button")
 
     # Store parameters in session state when button is clicked
@@ -72,14 +131,19 @@ def display_simulated_form():
             "avg_trades": avg_trades,
             "stop_loss": stop_loss,
             "take_profit": take_profit,
-            "win_percentage": win_percentage
+            "win_percentage": win_percentage,
+            "engine": engine,
+            "compare_accounts": compare_accounts,
+            "variant": variant
         }
 
     # Check if we should run the simulation
     if (run_button or st.session_state.run_simulation) and st.session_state.current_params is not None:
-        # Check rate limit
-        if not check_rate_limit():
-            st.error("Rate limit exceeded. Please wait before trying again.")
+        # Check rate limit: a comparison counts one run per account
+        strategy = st.session_state.current_strategy or {}
+        compare = strategy.get("compare_accounts") and strategy.get("variant") is None
+        if not check_rate_limit(len(ACCOUNT_OPTIONS) if compare else 1):
+            st.error(rate_limit_message())
             return
 
         # Show challenge dialog if not verified
@@ -114,11 +178,35 @@ def display_simulated_form():
                 "win_percentage": float(strategy["win_percentage"])
             }
 
-            # Run simulation
-            with st.spinner("Running simulation..."):
-                results = run_simulation(config)
-                if results:
-                    display_results(results)
+            if params["seed"]:
+                config["seed"] = int(params["seed"])
+            if HISTOGRAM_FORMAT != "plotly":
+                config["histogram_format"] = HISTOGRAM_FORMAT
+
+            if strategy["variant"] is not None:
+                forget_job("simulated")
+                forget_comparison("simulated")
+                run_paired_comparison("simulated", config, dict(config, **strategy["variant"]))
+            elif strategy["compare_accounts"]:
+                forget_job("simulated")
+                forget_paired("simulated")
+                run_account_comparison("simulated", config, engine=strategy["engine"])
+            else:
+                # Queue the run; display_job below follows it across reruns
+                job_id = get_job_queue().submit(
+                    config,
+                    engine=strategy["engine"],
+                    priority=PRIORITY_LOW if params["progressive"] else PRIORITY_NORMAL,
+                    progressive=params["progressive"],
+                    tolerances=auto_tolerances(params),
+                    client=get_client_id(),
+                )
+                remember_job("simulated", job_id)
+                forget_comparison("simulated")
+                forget_paired("simulated")
+
+        except JobQueueFullError as e:
+            st.error(str(e))
 
         except Exception as e:
             st.error(f"Error running simulation: {str(e)}")
@@ -126,3 +214,7 @@ def display_simulated_form():
         finally:
             # Clear stored parameters after simulation
             clear_session_state()
+
+    display_comparison("simulated")
+    display_paired("simulated")
+    display_job("simulated")
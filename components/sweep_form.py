@@ -0,0 +1,333 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from components.core_parameters import display_core_parameters
+from components.jobs import display_job, remember_job
+from components.results import display_engine_notice
+from config.settings import (
+    OPTIMIZER_MAX_POINTS,
+    OPTIMIZER_MIN_ITERATIONS,
+    SWEEP_MAX_CONCURRENCY,
+    SWEEP_MAX_POINTS,
+)
+from utils.jobs import JobQueueFullError, PRIORITY_LOW, get_job_queue
+from utils.limiter import get_rate_limiter
+from utils.optimizer import OBJECTIVES, candidate_runs, halving_search_task
+from utils.security import (
+    check_rate_limit,
+    get_client_id,
+    rate_limit_message,
+    display_challenge,
+    init_session_state,
+    clear_session_state,
+)
+from utils.sweep import (
+    SWEEP_PARAMETERS,
+    build_sweep_grid,
+    grid_sweep_task,
+    value_range,
+)
+
+# (min, max, default, step) for each sweepable input, matching the single-run form
+SWEEP_INPUT_LIMITS = {
+    "avg_trades_per_day": (0.1, 100.0, 10.0, 0.1),
+    "stop_loss": (1.0, 1000.0, 40.0, 1.0),
+    "take_profit": (1.0, 1000.0, 40.0, 1.0),
+    "win_percentage": (0.0, 100.0, 50.0, 0.1),
+}
+
+SEARCH_MODES = {
+    "grid": "Full Grid",
+    "halving": "Successive Halving",
+}
+
+METRIC_LABELS = {
+    "mean_balance": "Mean Balance",
+    "bust_rate": "Bust Rate (%)",
+    "max_payouts_rate": "MaxPayouts Rate (%)",
+}
+
+
+def display_sweep_ranges():
+    """Display From/To/Step inputs for each sweepable strategy parameter"""
+    ranges = {}
+    for key, (min_value, max_value, default, step) in SWEEP_INPUT_LIMITS.items():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start = st.number_input(
+                f"{SWEEP_PARAMETERS[key]} From",
+                min_value=min_value,
+                max_value=max_value,
+                value=default,
+                step=step,
+                key=f"sweep_{key}_from"
+            )
+        with col2:
+            stop = st.number_input(
+                f"{SWEEP_PARAMETERS[key]} To",
+                min_value=min_value,
+                max_value=max_value,
+                value=default,
+                step=step,
+                key=f"sweep_{key}_to"
+            )
+        with col3:
+            increment = st.number_input(
+                f"{SWEEP_PARAMETERS[key]} Step",
+                min_value=0.0,
+                max_value=max_value,
+                value=0.0,
+                step=step,
+                key=f"sweep_{key}_step"
+            )
+        ranges[key] = value_range(start, stop, increment)
+    return ranges
+
+
+def _display_local_points(df):
+    """Note which rows of a sweep table the local engine computed"""
+    local = df["engine"].fillna("").str.startswith("local")
+    if local.any():
+        which = None if local[df["engine"].notna()].all() else "the points marked local in the engine column"
+        display_engine_notice(which, fallback=(df["engine"] == "local fallback").any())
+
+
+def display_sweep_results(rows):
+    """Display the sweep table and, when two or more inputs vary, a heatmap"""
+    if not rows:
+        return
+
+    df = pd.DataFrame(rows).sort_values("point").set_index("point")
+    st.dataframe(df, use_container_width=True)
+    _display_local_points(df)
+
+    swept_keys = [key for key in SWEEP_INPUT_LIMITS if df[key].nunique() > 1]
+
+    if len(swept_keys) < 2:
+        return
+
+    ok = df.dropna(subset=["mean_balance"])
+    if ok.empty:
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        x_key = st.selectbox("Heatmap X", swept_keys, index=0,
+                             format_func=SWEEP_PARAMETERS.get, key="sweep_heatmap_x")
+    with col2:
+        y_options = [k for k in swept_keys if k != x_key]
+        y_key = st.selectbox("Heatmap Y", y_options, index=0,
+                             format_func=SWEEP_PARAMETERS.get, key="sweep_heatmap_y")
+    with col3:
+        metric = st.selectbox("Heatmap Metric", list(METRIC_LABELS), index=0,
+                              format_func=METRIC_LABELS.get, key="sweep_heatmap_metric")
+
+    # Other swept inputs are averaged out
+    pivot = ok.pivot_table(index=y_key, columns=x_key, values=metric, aggfunc="mean")
+    fig = go.Figure(go.Heatmap(
+        z=pivot.values,
+        x=pivot.columns.tolist(),
+        y=pivot.index.tolist(),
+        colorbar={"title": METRIC_LABELS[metric]},
+    ))
+    fig.update_layout(
+        xaxis_title=SWEEP_PARAMETERS[x_key],
+        yaxis_title=SWEEP_PARAMETERS[y_key],
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def display_search_options():
+    """Objective and schedule of a successive-halving search"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        objective = st.selectbox("Objective", list(OBJECTIVES), index=0,
+                                 format_func=OBJECTIVES.get, key="sweep_objective")
+    with col2:
+        eta = st.selectbox("Keep 1 in", [2, 3, 4], index=1,
+                           help="Share of candidates that advance to each larger rung",
+                           key="sweep_eta")
+    with col3:
+        max_bust_rate = st.number_input(
+            "Max Bust Rate (%)",
+            min_value=0.0,
+            max_value=100.0,
+            value=50.0,
+            step=1.0,
+            disabled=objective != "constrained_balance",
+            key="sweep_max_bust_rate"
+        )
+    return {"objective": objective, "eta": eta, "max_bust_rate": max_bust_rate}
+
+
+def display_search_results(search):
+    """Leaderboard of a successive-halving search and its cost against the full grid"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Iterations Spent", f"{search['spent']:,}")
+    with col2:
+        st.metric("Full Grid Would Spend", f"{search['full_grid']:,}")
+    with col3:
+        st.metric("Saved", f"{100 * (1 - search['spent'] / search['full_grid']):.1f}%")
+
+    st.markdown("### Leaderboard")
+    df = pd.DataFrame(search["rows"]).set_index("rank")
+    df = df.rename(columns={"objective": OBJECTIVES[search["objective"]]})
+    st.dataframe(df, use_container_width=True)
+    _display_local_points(df)
+
+
+def display_sweep_job(result):
+    """Results so far of a sweep job: a grid (see grid_sweep_task) or a search (see halving_search_task)"""
+    if "objective" in result:
+        display_search_results(result)
+        return
+    display_sweep_results(result["rows"])
+    if result["errors"]:
+        st.warning(f"{result['errors']} of {result['points']} points failed.")
+
+
+def display_sweep_form():
+    # Initialize session state
+    init_session_state()
+
+    st.markdown("### Parameter Sweep")
+    st.markdown("Enter a range for each strategy parameter (Step 0 keeps a single value)")
+
+    ranges = display_sweep_ranges()
+
+    # Core parameters
+    params = display_core_parameters(prefix="sweep_")
+
+    search = st.radio(
+        "Search",
+        options=list(SEARCH_MODES),
+        format_func=SEARCH_MODES.get,
+        horizontal=True,
+        help="Successive halving screens every point with a few iterations and "
+             "gives the full Iterations only to the most promising ones",
+        key="sweep_search_mode"
+    )
+    search_options = display_search_options() if search == "halving" else {}
+
+    concurrency = st.slider(
+        "Concurrent Requests",
+        min_value=1,
+        max_value=SWEEP_MAX_CONCURRENCY,
+        value=SWEEP_MAX_CONCURRENCY,
+        key="sweep_concurrency"
+    )
+
+    point_count = 1
+    for values in ranges.values():
+        point_count *= len(values)
+    # Runs toward the rate limit: one per grid point, or one per candidate
+    # simulated at each rung of a search
+    max_cost = int(get_rate_limiter().max_tokens())
+    if search == "halving":
+        max_points = OPTIMIZER_MAX_POINTS
+        cost = candidate_runs(point_count, int(params["iterations"]), OPTIMIZER_MIN_ITERATIONS, search_options["eta"])
+        st.caption(f"{point_count} grid points (limit {max_points})")
+        st.caption(f"Candidates start at {min(OPTIMIZER_MIN_ITERATIONS, params['iterations']):,} iterations; "
+                   f"the best reach {params['iterations']:,}. Up to {cost} candidate runs, "
+                   f"each counting as one run (limit {max_cost})")
+    else:
+        # Each point counts as one run, so the rate-limit burst usually caps
+        # the grid well below SWEEP_MAX_POINTS
+        max_points = min(SWEEP_MAX_POINTS, max_cost)
+        cost = point_count
+        if max_cost < SWEEP_MAX_POINTS:
+            st.caption(f"{point_count} grid points (limit {max_points}). Each point counts as one run, "
+                       f"so the limit is your rate-limit budget of {max_cost} runs")
+        else:
+            st.caption(f"{point_count} grid points (limit {max_points}); each point counts as one run")
+
+    run_button = st.button("Run Sweep", type="primary", key="sweep_run_button")
+
+    # Store parameters in session state when button is clicked
+    if run_button:
+        if point_count > max_points:
+            st.error(f"Sweep has {point_count} points; the limit is {max_points}. "
+                     f"Use fewer values or a larger Step.")
+            return
+        if cost > max_cost:
+            st.error(f"Search needs up to {cost} candidate runs; the limit is {max_cost}. "
+                     f"Use fewer grid points or a larger Keep 1 in.")
+            return
+        st.session_state.current_params = params
+        st.session_state.current_sweep = {
+            "ranges": ranges,
+            "concurrency": concurrency,
+            "search": search,
+            "cost": cost,
+            **search_options
+        }
+
+    # Check if we should run the sweep
+    if (run_button or st.session_state.run_simulation) and st.session_state.current_sweep is not None:
+        # Check rate limit
+        if not check_rate_limit(st.session_state.current_sweep["cost"]):
+            st.error(rate_limit_message())
+            return
+
+        # Show challenge dialog if not verified
+        if not st.session_state.get('challenge_verified'):
+            display_challenge()
+            return
+
+        # Clear the run flag
+        st.session_state.run_simulation = False
+
+        try:
+            params = st.session_state.current_params
+            sweep = st.session_state.current_sweep
+
+            base_config = {
+                "iterations": int(params["iterations"]),
+                "max_simulation_days": int(params["max_simulation_days"]),
+                "account_type": str(params["account_type"]),
+                "multiplier": float(params["multiplier"]),
+                "round_trip_cost": float(params["round_trip_cost"]),
+                "histogram": False,
+                "condition_end_state": str(params["condition_end_state"]),
+                "max_payouts": 12
+            }
+
+            if params["seed"]:
+                base_config["seed"] = int(params["seed"])
+
+            grid = build_sweep_grid(base_config, sweep["ranges"])
+
+            if sweep["search"] == "halving":
+                task = halving_search_task(
+                    grid,
+                    sweep["objective"],
+                    base_config["iterations"],
+                    eta=sweep["eta"],
+                    max_bust_rate=sweep["max_bust_rate"],
+                    max_workers=sweep["concurrency"],
+                )
+            else:
+                task = grid_sweep_task(grid, sweep["concurrency"])
+
+            # Queue the sweep; display_job below follows it across reruns
+            job_id = get_job_queue().submit(
+                base_config,
+                priority=PRIORITY_LOW,
+                client=get_client_id(),
+                task=task,
+            )
+            remember_job("sweep", job_id)
+
+        except JobQueueFullError as e:
+            st.error(str(e))
+
+        except Exception as e:
+            st.error(f"Error running sweep: {str(e)}")
+
+        finally:
+            # Clear stored parameters after the sweep
+            clear_session_state()
+
+    # Results of the last sweep stay visible across reruns (e.g. heatmap controls)
+    display_job("sweep", render=display_sweep_job)
@@ -0,0 +1,28 @@
+import streamlit as st
+from config.settings import SHOW_TIMINGS
+from utils.metrics import StageTimings
+
+
+def display_timings(timings: StageTimings):
+    """Collapsed table of where one simulation spent its time (if PROPSIM_SHOW_TIMINGS is on)"""
+    if not SHOW_TIMINGS or not timings.stages:
+        return
+
+    totals = timings.totals()
+    counts = {}
+    for stage, _ in timings.stages:
+        counts[stage] = counts.get(stage, 0) + 1
+
+    import pandas as pd
+
+    with st.expander("Timings"):
+        st.dataframe(
+            pd.DataFrame({
+                "Stage": list(totals),
+                "Milliseconds": [round(seconds * 1000, 1) for seconds in totals.values()],
+                "Calls": [counts[stage] for stage in totals],
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption("Batched runs sum each stage over all batches, so stages may overlap in wall time")
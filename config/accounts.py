@@ -30,3 +30,70 @@ COMMON_MULTIPLIERS = [
     {"value": 1000, "label": "UB - Ultra Bond (1000)"}
 ]
 
+
+# Account rules used by the local simulation engine (utils/local_engine.py).
+# The backend's rule definitions are not part of this repository and it
+# does not publish them (its API only accepts an account_type), so these
+# are approximations for offline estimates. The backend is the source of
+# truth, so every local result is marked as such in the UI
+# (components.results.display_engine_notice) and in the run history.
+# Amounts are dollars; "start" is the starting balance, which the local
+# engine tracks balances relative to, so the account size is not needed.
+# Field, meaning, and where its values come from:
+#   drawdown          end-of-day trailing drawdown. Taken from the "DD"
+#                     amount in each account's label in ACCOUNT_TYPES above,
+#                     the figure the backend's accounts are offered under.
+#   drawdown_lock     profit above start at which the drawdown floor stops
+#                     trailing. Assumed: start + $100 for Fast Track
+#                     Trading, start itself for Topstep.
+#   payout_threshold  profit above start required before a payout. Assumed
+#                     equal to the drawdown.
+#   payout_fraction   share of profit above start withdrawn per payout.
+#                     Assumed 50% for every account.
+#   payout_cap        largest single payout. Assumed round figures that
+#                     grow with account size; not a firm's published cap.
+ACCOUNT_RULES = {
+    "ftt:Rally": {
+        "drawdown": 1250, "drawdown_lock": 100,
+        "payout_threshold": 1250, "payout_fraction": 0.5, "payout_cap": 1000,
+    },
+    "ftt:Daytona": {
+        "drawdown": 2500, "drawdown_lock": 100,
+        "payout_threshold": 2500, "payout_fraction": 0.5, "payout_cap": 2000,
+    },
+    "ftt:GT": {
+        "drawdown": 7500, "drawdown_lock": 100,
+        "payout_threshold": 7500, "payout_fraction": 0.5, "payout_cap": 5000,
+    },
+    "ftt:LeMans": {
+        "drawdown": 15000, "drawdown_lock": 100,
+        "payout_threshold": 15000, "payout_fraction": 0.5, "payout_cap": 10000,
+    },
+    "topstep:Fifty": {
+        "drawdown": 2000, "drawdown_lock": 0,
+        "payout_threshold": 2000, "payout_fraction": 0.5, "payout_cap": 5000,
+    },
+    "topstep:OneHundred": {
+        "drawdown": 3000, "drawdown_lock": 0,
+        "payout_threshold": 3000, "payout_fraction": 0.5, "payout_cap": 6000,
+    },
+    "topstep:OneFifty": {
+        "drawdown": 4500, "drawdown_lock": 0,
+        "payout_threshold": 4500, "payout_fraction": 0.5, "payout_cap": 9000,
+    },
+}
+
+
+# Selectbox tables, built once per process so reruns only index into them
+ACCOUNT_OPTIONS = [
+    account["value"] for info in ACCOUNT_TYPES.values() for account in info["accounts"]
+]
+ACCOUNT_LABELS = {
+    account["value"]: f"{info['label']} - {account['label']}"
+    for info in ACCOUNT_TYPES.values() for account in info["accounts"]
+}
+# Multipliers are selected by position since several share a value (ES/RTY,
+# MES/M2K, CL/UB); the extra last position is the custom entry
+MULTIPLIER_LABELS = [m["label"] for m in COMMON_MULTIPLIERS] + ["Custom Value..."]
+MULTIPLIER_POSITIONS = list(range(len(MULTIPLIER_LABELS)))
+CUSTOM_MULTIPLIER = len(COMMON_MULTIPLIERS)
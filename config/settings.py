@@ -0,0 +1,147 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# Settings are read from the environment (or a local .env file) so the
+# systemd unit can tune them without code changes.
+load_dotenv()
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Backend. PROPSIM_API_URLS lists several simulator nodes (comma
+# separated); requests are balanced across them with failover.
+API_URL = os.getenv("PROPSIM_API_URL", "http://localhost:8080")
+API_URLS = [url.strip() for url in os.getenv("PROPSIM_API_URLS", API_URL).split(",") if url.strip()]
+BACKEND_HEALTH_INTERVAL_SECONDS = _env_float("PROPSIM_BACKEND_HEALTH_INTERVAL_SECONDS", 10.0)
+BACKEND_EJECT_AFTER_FAILURES = _env_int("PROPSIM_BACKEND_EJECT_AFTER_FAILURES", 3)
+BACKEND_EJECT_SECONDS = _env_float("PROPSIM_BACKEND_EJECT_SECONDS", 30.0)  # doubles on each repeat ejection
+BACKEND_FAILOVER_ATTEMPTS = _env_int("PROPSIM_BACKEND_FAILOVER_ATTEMPTS", 2)  # other nodes tried after a failure
+
+# HTTP transport
+HTTP_CONNECT_TIMEOUT = _env_float("PROPSIM_HTTP_CONNECT_TIMEOUT", 5.0)
+HTTP_READ_TIMEOUT = _env_float("PROPSIM_HTTP_READ_TIMEOUT", 300.0)  # matches nginx proxy_read_timeout
+HTTP_POOL_SIZE = _env_int("PROPSIM_HTTP_POOL_SIZE", 20)
+HTTP_MAX_RETRIES = _env_int("PROPSIM_HTTP_MAX_RETRIES", 3)
+HTTP_BACKOFF_FACTOR = _env_float("PROPSIM_HTTP_BACKOFF_FACTOR", 0.5)
+HTTP_GZIP_UPLOADS = _env_bool("PROPSIM_HTTP_GZIP_UPLOADS", False)
+HTTP_GZIP_MIN_BYTES = _env_int("PROPSIM_HTTP_GZIP_MIN_BYTES", 1024)
+
+# Result cache
+CACHE_MAX_MB = _env_float("PROPSIM_CACHE_MAX_MB", 64.0)
+CACHE_TTL_SECONDS = _env_float("PROPSIM_CACHE_TTL_SECONDS", 3600.0)
+CACHE_DISK_DIR = os.getenv("PROPSIM_CACHE_DISK_DIR", "")  # empty disables the disk tier
+CACHE_DISK_MAX_MB = _env_float("PROPSIM_CACHE_DISK_MAX_MB", 512.0)
+
+# Uploaded trade file profiles (st.cache_resource, keyed by content hash)
+CSV_PROFILE_CACHE_ENTRIES = _env_int("PROPSIM_CSV_PROFILE_CACHE_ENTRIES", 64)
+CSV_PROFILE_TTL_SECONDS = _env_float("PROPSIM_CSV_PROFILE_TTL_SECONDS", 3600.0)
+
+# Uploaded files, stored once per content hash for all sessions. Files of
+# UPLOAD_STORE_SPILL_MB or more (and the oldest ones once the memory budget
+# is used up) are written to UPLOAD_STORE_DIR and read back memory-mapped.
+UPLOAD_STORE_DIR = os.getenv("PROPSIM_UPLOAD_STORE_DIR", os.path.join(tempfile.gettempdir(), "propsim-uploads"))
+UPLOAD_STORE_SPILL_MB = _env_float("PROPSIM_UPLOAD_STORE_SPILL_MB", 1.0)
+UPLOAD_STORE_MEMORY_MB = _env_float("PROPSIM_UPLOAD_STORE_MEMORY_MB", 64.0)
+UPLOAD_STORE_MAX_MB = _env_float("PROPSIM_UPLOAD_STORE_MAX_MB", 2048.0)  # memory plus disk
+UPLOAD_STORE_IDLE_SECONDS = _env_float("PROPSIM_UPLOAD_STORE_IDLE_SECONDS", 3600.0)  # session references expire
+
+# Run history: completed runs are written to an SQLite file in batches
+# by a background thread; an empty path disables the history
+HISTORY_DB_PATH = os.getenv("PROPSIM_HISTORY_DB_PATH", os.path.join(tempfile.gettempdir(), "propsim-history.sqlite3"))
+HISTORY_BATCH_SIZE = _env_int("PROPSIM_HISTORY_BATCH_SIZE", 200)
+HISTORY_FLUSH_SECONDS = _env_float("PROPSIM_HISTORY_FLUSH_SECONDS", 1.0)  # longest a run waits to be written
+HISTORY_MAX_PENDING = _env_int("PROPSIM_HISTORY_MAX_PENDING", 10000)  # runs beyond this are dropped, not waited on
+HISTORY_MAX_RUNS = _env_int("PROPSIM_HISTORY_MAX_RUNS", 100000)  # oldest runs are deleted; 0 keeps all
+HISTORY_QUERY_LIMIT = _env_int("PROPSIM_HISTORY_QUERY_LIMIT", 1000)
+# Users only see their own runs; this lets them list every client's runs too
+HISTORY_SHOW_ALL_CLIENTS = _env_bool("PROPSIM_HISTORY_SHOW_ALL_CLIENTS", False)
+
+# Parameter sweeps
+SWEEP_MAX_CONCURRENCY = _env_int("PROPSIM_SWEEP_MAX_CONCURRENCY", 4)
+SWEEP_MAX_POINTS = _env_int("PROPSIM_SWEEP_MAX_POINTS", 400)
+# Configs sharing a trade file are sent to /simulate_batch, at most this
+# many per request, when the backend advertises batch_max_configs at
+# /capabilities; 0 always sends one request per config
+BATCH_MAX_CONFIGS = _env_int("PROPSIM_BATCH_MAX_CONFIGS", 32)
+# Successive-halving search: candidates start at OPTIMIZER_MIN_ITERATIONS and
+# only the best continue, so far larger grids are affordable than a full sweep
+OPTIMIZER_MIN_ITERATIONS = _env_int("PROPSIM_OPTIMIZER_MIN_ITERATIONS", 1000)
+OPTIMIZER_MAX_POINTS = _env_int("PROPSIM_OPTIMIZER_MAX_POINTS", 2000)
+
+# Simulation engine: "backend", "local" or "auto" (backend, falling back to local)
+SIMULATION_ENGINE = os.getenv("PROPSIM_SIMULATION_ENGINE", "backend")
+LOCAL_TICK_SIZE = _env_float("PROPSIM_LOCAL_TICK_SIZE", 0.25)  # points per tick
+
+# Trade upload format: "auto" sends the compact binary encoding when the
+# backend advertises it at /capabilities, "csv" always sends the raw file
+TRADE_UPLOAD_FORMAT = os.getenv("PROPSIM_TRADE_UPLOAD_FORMAT", "auto")
+TRADE_PAYLOAD_CACHE_MB = _env_float("PROPSIM_TRADE_PAYLOAD_CACHE_MB", 64.0)  # binary encodings kept by file hash
+CAPABILITIES_TTL_SECONDS = _env_float("PROPSIM_CAPABILITIES_TTL_SECONDS", 300.0)
+
+# Histogram format requested from the backend: "plotly" (a serialized
+# figure), "bins" (edges and counts) or "quantiles"; compact formats are
+# turned into figures by the frontend
+HISTOGRAM_FORMAT = os.getenv("PROPSIM_HISTOGRAM_FORMAT", "plotly")
+HISTOGRAM_MAX_BINS = _env_int("PROPSIM_HISTOGRAM_MAX_BINS", 100)
+
+# Progressive runs: iterations are split into batches with distinct seeds
+PROGRESSIVE_FIRST_BATCH = _env_int("PROPSIM_PROGRESSIVE_FIRST_BATCH", 1000)
+PROGRESSIVE_BATCH_ITERATIONS = _env_int("PROPSIM_PROGRESSIVE_BATCH_ITERATIONS", 5000)
+PROGRESSIVE_CONCURRENCY = _env_int("PROPSIM_PROGRESSIVE_CONCURRENCY", 2)
+
+# Auto iterations: batches run until the 95% confidence intervals are within
+# the user's tolerances, or the Iterations value (the cap) is reached
+ADAPTIVE_BATCH_ITERATIONS = _env_int("PROPSIM_ADAPTIVE_BATCH_ITERATIONS", 2000)
+ADAPTIVE_MIN_ITERATIONS = _env_int("PROPSIM_ADAPTIVE_MIN_ITERATIONS", 2000)
+
+# Observability: per-stage latency histograms are served at /metrics
+# (Prometheus text) and /metrics.json on METRICS_PORT; 0 disables the endpoint
+METRICS_HOST = os.getenv("PROPSIM_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = _env_int("PROPSIM_METRICS_PORT", 0)
+SHOW_TIMINGS = _env_bool("PROPSIM_SHOW_TIMINGS", False)
+LOG_LEVEL = os.getenv("PROPSIM_LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = _env_float("PROPSIM_LOG_SAMPLE_RATE", 0.01)  # share of hot-path records kept
+
+# Admission control, shared by all sessions in the process. Each client
+# (by address, see TRUSTED_PROXIES) gets RATE_LIMIT_CLIENT_REQUESTS runs
+# per window; the global bucket caps the run rate of the whole process.
+RATE_LIMIT_CLIENT_REQUESTS = _env_int("PROPSIM_RATE_LIMIT_CLIENT_REQUESTS", 10)
+RATE_LIMIT_CLIENT_WINDOW_SECONDS = _env_float("PROPSIM_RATE_LIMIT_CLIENT_WINDOW_SECONDS", 3600.0)
+RATE_LIMIT_GLOBAL_PER_SECOND = _env_float("PROPSIM_RATE_LIMIT_GLOBAL_PER_SECOND", 1.0)
+RATE_LIMIT_GLOBAL_BURST = _env_int("PROPSIM_RATE_LIMIT_GLOBAL_BURST", 30)
+RATE_LIMIT_MAX_CLIENTS = _env_int("PROPSIM_RATE_LIMIT_MAX_CLIENTS", 10000)
+# Proxies whose X-Real-IP / X-Forwarded-For headers name the client. From
+# any other peer the headers are ignored and the socket address is used,
+# so clients cannot pick their own identity. Loopback covers nginx on the
+# same host; empty trusts no proxy.
+TRUSTED_PROXIES = [
+    address.strip() for address in os.getenv("PROPSIM_TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if address.strip()
+]
+# Concurrent /simulate requests; excess requests wait in a bounded queue
+BACKEND_MAX_CONCURRENCY = _env_int("PROPSIM_BACKEND_MAX_CONCURRENCY", 8)
+BACKEND_MAX_QUEUE = _env_int("PROPSIM_BACKEND_MAX_QUEUE", 64)
+BACKEND_QUEUE_TIMEOUT_SECONDS = _env_float("PROPSIM_BACKEND_QUEUE_TIMEOUT_SECONDS", 120.0)
+
+# Background jobs: runs are queued and executed by a worker pool so the
+# Streamlit script thread never blocks on the backend
+JOB_WORKERS = _env_int("PROPSIM_JOB_WORKERS", 4)
+JOB_MAX_QUEUED = _env_int("PROPSIM_JOB_MAX_QUEUED", 100)
+JOB_RETENTION_SECONDS = _env_float("PROPSIM_JOB_RETENTION_SECONDS", 3600.0)
+JOB_MAX_RETAINED = _env_int("PROPSIM_JOB_MAX_RETAINED", 500)
+JOB_POLL_SECONDS = _env_float("PROPSIM_JOB_POLL_SECONDS", 1.0)
@@ -1,54 +1,657 @@
 # utils/api.py
-import requests
 import json
+import copy
+import contextvars
+import gzip
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple, Union
 import streamlit as st
+from config.settings import (
+    API_URLS,
+    BACKEND_FAILOVER_ATTEMPTS,
+    BATCH_MAX_CONFIGS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_GZIP_UPLOADS,
+    HTTP_GZIP_MIN_BYTES,
+    SIMULATION_ENGINE,
+    SWEEP_MAX_CONCURRENCY,
+    TRADE_UPLOAD_FORMAT,
+    TRADE_PAYLOAD_CACHE_MB,
+    CAPABILITIES_TTL_SECONDS,
+)
+from utils.cache import get_result_cache, hash_bytes, make_cache_key, is_deterministic
+from utils.endpoints import get_endpoint_pool
+from utils.limiter import QueueFullError, get_backend_gate
+from utils.metrics import get_registry, log_event, timed
+from utils.singleflight import SingleFlight
+from utils import payload
+
+# requests and the local engine (NumPy) are imported on first use, which
+# keeps them off the app's startup path
+if TYPE_CHECKING:
+    import pandas as pd
+    import requests
+
+ENGINES = ("backend", "local", "auto")
+
+GATEWAY_ERRORS = (502, 503, 504)
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-API_URL = "http://localhost:8080"
+# Shared, process-wide HTTP session (one per Streamlit server process)
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
 
-def run_simulation(
+# Backend capabilities, refreshed every CAPABILITIES_TTL_SECONDS
+_capabilities: Dict[str, Any] = {}
+_capabilities_checked_at = float("-inf")
+_capabilities_lock = threading.Lock()
+
+# Identical backend requests in flight at the same time share one call
+_inflight = SingleFlight()
+
+# Binary encodings of trade files by CSV digest (least recently used
+# first), so all requests over one upload share a single encoding
+_encoded_trades: "OrderedDict[str, bytes]" = OrderedDict()
+_encoded_trades_bytes = 0
+_encoded_trades_lock = threading.Lock()
+_encoding = SingleFlight()
+
+
+def _build_session() -> "requests.Session":
+    """
+    Build a keep-alive session with a bounded connection pool and retries.
+    /simulate is a pure function of its inputs, so POSTs are safe to retry
+    on connection failures and gateway errors. Read timeouts are not
+    retried since the backend has already spent the full budget on them.
+    With several endpoints, failover to another node replaces retrying
+    the same one.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retries = HTTP_MAX_RETRIES if len(API_URLS) == 1 else 0
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> "requests.Session":
+    """Return the shared HTTP session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _send(request: "requests.Request", stream: bool = False) -> "requests.Response":
+    """
+    Send a request through the shared session, gzipping large bodies if enabled.
+    With stream=True the body is read on first access of response.content.
+    """
+    session = get_session()
+    prepared = session.prepare_request(request)
+
+    body = prepared.body
+    if HTTP_GZIP_UPLOADS and body is not None and len(body) >= HTTP_GZIP_MIN_BYTES:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        prepared.body = gzip.compress(body, compresslevel=5)
+        prepared.headers["Content-Encoding"] = "gzip"
+        prepared.headers["Content-Length"] = str(len(prepared.body))
+
+    return session.send(prepared, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=stream)
+
+
+def get_backend_capabilities() -> Dict[str, Any]:
+    """
+    Fetch what the backend advertises at /capabilities, e.g.
+    {"trade_formats": ["csv", "propsim-columnar-v1"]}.
+    Backends without the endpoint report no capabilities. With several
+    endpoints, all nodes are expected to run the same backend version.
+    """
+    import requests
+
+    global _capabilities, _capabilities_checked_at
+    with _capabilities_lock:
+        if time.monotonic() - _capabilities_checked_at < CAPABILITIES_TTL_SECONDS:
+            return _capabilities
+        try:
+            url = (get_endpoint_pool().healthy_urls() or API_URLS)[0]
+            response = get_session().get(f"{url}/capabilities", timeout=(HTTP_CONNECT_TIMEOUT, 5))
+            _capabilities = response.json() if response.ok else {}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.debug(f"Capabilities probe failed: {str(e)}")
+            _capabilities = {}
+        _capabilities_checked_at = time.monotonic()
+        return _capabilities
+
+
+def _use_binary_trades(trades: Optional["pd.DataFrame"]) -> bool:
+    """Send the compact trade encoding when we have parsed trades and the backend accepts it"""
+    if trades is None or TRADE_UPLOAD_FORMAT != "auto":
+        return False
+    return payload.FORMAT_NAME in get_backend_capabilities().get("trade_formats", [])
+
+
+def batch_limit() -> int:
+    """Most configs one /simulate_batch request may carry; 0 when the backend has no batch endpoint"""
+    try:
+        advertised = int(get_backend_capabilities().get("batch_max_configs") or 0)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(advertised, BATCH_MAX_CONFIGS))
+
+
+@dataclass(frozen=True)
+class TradeUpload:
+    """
+    Trade file part of a /simulate request, encoded and hashed once so that
+    requests over the same file (e.g. an account comparison) reuse it
+    """
+    field: str
+    filename: str
+    data: bytes
+    content_type: str
+    # hash_bytes() of the original CSV, used in result cache keys
+    digest: str
+
+
+def prepare_upload(
+    csv_file: Optional[bytes],
+    trades: Optional["pd.DataFrame"] = None,
+    digest: Optional[str] = None
+) -> Optional[TradeUpload]:
+    """
+    Encode the trade file for /simulate: the compact binary encoding when
+    possible, else the raw CSV. Returns None when there is no trade file.
+    """
+    digest = digest if digest is not None else hash_bytes(csv_file)
+    if _use_binary_trades(trades):
+        return TradeUpload("trades_file", "trades.bin", _encode_trades(trades, digest), payload.CONTENT_TYPE, digest)
+    if csv_file is not None:
+        return TradeUpload("csv_file", "trades.csv", csv_file, "text/csv", digest)
+    return None
+
+
+def _encode_trades(trades: "pd.DataFrame", digest: str) -> bytes:
+    """
+    Binary encoding of trades, made once per CSV digest while it stays in
+    the TRADE_PAYLOAD_CACHE_MB budget; concurrent misses share one encode
+    """
+    global _encoded_trades_bytes
+    if not digest:
+        with timed("encode_trades"):
+            return payload.encode_trades(trades)
+
+    with _encoded_trades_lock:
+        blob = _encoded_trades.get(digest)
+        if blob is not None:
+            _encoded_trades.move_to_end(digest)
+            return blob
+
+    def encode() -> bytes:
+        with timed("encode_trades"):
+            return payload.encode_trades(trades)
+
+    blob, _ = _encoding.do(digest, encode)
+    with _encoded_trades_lock:
+        if digest not in _encoded_trades:
+            _encoded_trades[digest] = blob
+            _encoded_trades_bytes += len(blob)
+        _encoded_trades.move_to_end(digest)
+        while _encoded_trades_bytes > TRADE_PAYLOAD_CACHE_MB * 1024 * 1024 and _encoded_trades:
+            _, evicted = _encoded_trades.popitem(last=False)
+            _encoded_trades_bytes -= len(evicted)
+    return blob
+
+
+class SimulationError(Exception):
+    """Raised when the backend cannot produce a result"""
+
+    def __init__(self, message: str, response_text: Optional[str] = None):
+        super().__init__(message)
+        self.response_text = response_text
+
+
+def simulate(
     config: Dict[str, Any],
-    csv_file: Optional[bytes] = None
+    csv_file: Optional[bytes] = None,
+    engine: str = SIMULATION_ENGINE,
+    trades: Optional["pd.DataFrame"] = None,
+    on_queue: Optional[Callable[[int], None]] = None,
+    upload: Optional[TradeUpload] = None
 ) -> Dict[str, Any]:
     """
-    Run a simulation through the API
+    Run a simulation, raising SimulationError on failure.
+    engine: "backend" (the API), "local" (in-process NumPy engine) or
+    "auto" (the API, falling back to the local engine when it is unreachable;
+    such results carry the backend's error as "fallback").
+    trades: the validated frame for csv_file; when given, it may be sent in
+    the compact binary encoding instead of the raw CSV.
+    on_queue(position) is called while the request waits for a backend slot.
+    upload: csv_file already encoded by prepare_upload(), shared between
+    calls over the same file.
+    Safe to call from worker threads (no Streamlit calls).
     """
+    if engine not in ENGINES:
+        raise SimulationError(f"Unknown simulation engine: {engine}")
+
+    if engine == "local":
+        return _simulate_local(config, csv_file)
+
     try:
-        # Convert config to JSON string
-        config_json = json.dumps(config)
+        return _simulate_backend(config, csv_file, trades, on_queue, upload)
+    except SimulationError as e:
+        from utils import local_engine
 
-        # Log the request for debugging
-        logger.debug(f"Request config: {config_json}")
+        if engine == "auto" and local_engine.supports(config, csv_file):
+            return _simulate_fallback(config, csv_file, e)
+        raise
 
-        # Prepare multipart form data
-        files = {
-            'config': ('config.json', config_json, 'application/json')
-        }
 
-        if csv_file is not None:
-            files['csv_file'] = ('trades.csv', csv_file, 'text/csv')
+def _simulate_local(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes] = None
+) -> Dict[str, Any]:
+    """Run a simulated-strategy config on the in-process engine"""
+    from utils import local_engine
+
+    if not local_engine.supports(config, csv_file):
+        raise SimulationError("The local engine only supports simulated strategies on known accounts")
+    with timed("local_engine"):
+        return local_engine.simulate_strategy(config)
+
+
+def _simulate_fallback(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes],
+    error: SimulationError
+) -> Dict[str, Any]:
+    """Local run in place of a failed backend request ("auto"); results["fallback"] says why"""
+    log_event(logger, "local_fallback", level=logging.WARNING, sampled=False, error=str(error))
+    results = _simulate_local(config, csv_file)
+    results["fallback"] = str(error)
+    return results
+
+
+def engine_label(results: Dict[str, Any]) -> str:
+    """Which engine computed results: "backend", "local", or "local fallback" after a backend failure"""
+    if results.get("engine") != "local":
+        return "backend"
+    return "local fallback" if results.get("fallback") else "local"
+
+
+def _simulate_backend(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    on_queue: Optional[Callable[[int], None]] = None,
+    upload: Optional[TradeUpload] = None
+) -> Dict[str, Any]:
+    """
+    Run a simulation through the API.
+    Identical seeded config + CSV pairs are served from the result cache;
+    identical calls share the backend request of one already in flight.
+    The rest wait for a slot in the process-wide backend gate.
+    """
+    cache = get_result_cache()
+    with timed("cache_lookup"):
+        digest = upload.digest if upload is not None else hash_bytes(csv_file)
+        cache_key = make_cache_key(config, csv_digest=digest)
+        # Unseeded runs are fresh samples and are never cached
+        cached = cache.get(cache_key) if is_deterministic(config) else None
+    if cached is not None:
+        log_event(logger, "result_cache_hit", cache_key=cache_key[:16])
+        return copy.deepcopy(cached)
+
+    def request() -> Dict[str, Any]:
+        # Encoded only on a miss, by the caller that makes the request
+        return _request_simulation(config, upload or prepare_upload(csv_file, trades, digest), on_queue, cache_key)
+
+    with timed("backend_request"):
+        results, shared = _inflight.do(cache_key, request)
+    get_registry().increment("backend_requests_total", role="collapsed" if shared else "leader")
+    if shared:
+        log_event(logger, "request_collapsed", cache_key=cache_key[:16])
+    return copy.deepcopy(results)
+
+
+def _request_simulation(
+    config: Dict[str, Any],
+    upload: Optional[TradeUpload],
+    on_queue: Optional[Callable[[int], None]],
+    cache_key: str
+) -> Dict[str, Any]:
+    """POST one simulation to the backend and cache the result"""
+    import requests
 
+    # A call that finished just before this one started may have cached it
+    cached = get_result_cache().get(cache_key) if is_deterministic(config) else None
+    if cached is not None:
+        return cached
+
+    # Convert config to JSON string
+    config_json = json.dumps(config)
+
+    # Prepare multipart form data
+    files = {
+        'config': ('config.json', config_json, 'application/json')
+    }
+
+    if upload is not None:
+        files[upload.field] = (upload.filename, upload.data, upload.content_type)
+
+    gate = get_backend_gate()
+    try:
+        with timed("queue_wait"):
+            gate.acquire(on_queue)
+    except QueueFullError as e:
+        get_registry().increment("backend_queue_rejected_total")
+        raise SimulationError(str(e)) from e
+
+    try:
         # Make the request
-        response = requests.post(f"{API_URL}/simulate", files=files)
+        response, content = _post_with_failover(files)
 
         # Check for errors
         response.raise_for_status()
 
-        return response.json()
+        with timed("decode_json"):
+            results = response.json()
+    except requests.exceptions.RequestException as e:
+        response_text = None
+        if getattr(e, 'response', None) is not None:
+            response_text = e.response.text
+        raise SimulationError(
+            f"Error communicating with the simulation server: {str(e)}", response_text
+        ) from e
+    except ValueError as e:
+        raise SimulationError(f"Invalid response from the simulation server: {str(e)}") from e
+    finally:
+        gate.release()
+
+    log_event(
+        logger, "simulate",
+        cache_key=cache_key[:16],
+        iterations=config.get("iterations"),
+        request_bytes=len(response.request.body or b""),
+        response_bytes=len(content),
+        status=response.status_code,
+    )
+    if is_deterministic(config):
+        get_result_cache().put(cache_key, results)
+    return results
+
+
+def simulate_batch(
+    configs: List[Dict[str, Any]],
+    csv_file: Optional[bytes] = None,
+    engine: str = SIMULATION_ENGINE,
+    trades: Optional["pd.DataFrame"] = None,
+    on_queue: Optional[Callable[[int], None]] = None,
+    upload: Optional[TradeUpload] = None
+) -> List[Union[Dict[str, Any], SimulationError]]:
+    """
+    Run several configs over the same trade file. Returns one entry per
+    config, in order: its results, or the SimulationError it failed with.
+    Cached configs are served from the result cache and duplicates run
+    once. With a batch-capable backend the rest go to /simulate_batch, at
+    most batch_limit() per request with the trade file attached once;
+    otherwise they are sent as concurrent individual requests over the
+    shared keep-alive session.
+    engine, trades, on_queue and upload are as in simulate(); with "auto",
+    configs the backend failed fall back to the local engine.
+    Safe to call from worker threads (no Streamlit calls).
+    """
+    if engine not in ENGINES:
+        raise SimulationError(f"Unknown simulation engine: {engine}")
+
+    if engine == "local":
+        return [_capture(_simulate_local, config, csv_file) for config in configs]
+
+    cache = get_result_cache()
+    with timed("cache_lookup"):
+        digest = upload.digest if upload is not None else hash_bytes(csv_file)
+        keys = [make_cache_key(config, csv_digest=digest) for config in configs]
+        outcomes = {key: cache.get(key) if is_deterministic(config) else None
+                    for key, config in zip(keys, configs)}
+    missing = {key: config for key, config in zip(keys, configs) if outcomes[key] is None}
+
+    limit = batch_limit() if len(missing) > 1 else 0
+    if limit:
+        upload = upload or prepare_upload(csv_file, trades, digest)
+        chunks = list(missing.items())
+        for start in range(0, len(chunks), limit):
+            chunk = chunks[start:start + limit]
+            with timed("backend_request"):
+                answered = _request_batch(chunk, upload, on_queue)
+            if answered is None:
+                # Advertised but not served (e.g. a node not yet upgraded)
+                break
+            outcomes.update(answered)
+    unanswered = {key: config for key, config in missing.items() if outcomes[key] is None}
+    if unanswered:
+        outcomes.update(_pipeline(unanswered, csv_file, trades, on_queue, upload))
+
+    if engine == "auto":
+        from utils import local_engine
+
+        for key, config in zip(keys, configs):
+            if isinstance(outcomes[key], SimulationError) and local_engine.supports(config, csv_file):
+                outcomes[key] = _capture(_simulate_fallback, config, csv_file, outcomes[key])
+
+    return [
+        outcomes[key] if isinstance(outcomes[key], SimulationError) else copy.deepcopy(outcomes[key])
+        for key in keys
+    ]
+
+
+def _capture(function: Callable[..., Dict[str, Any]], *args, **kwargs) -> Union[Dict[str, Any], SimulationError]:
+    try:
+        return function(*args, **kwargs)
+    except SimulationError as e:
+        return e
+
+
+def _pipeline(
+    configs: Dict[str, Dict[str, Any]],
+    csv_file: Optional[bytes],
+    trades: Optional["pd.DataFrame"],
+    on_queue: Optional[Callable[[int], None]],
+    upload: Optional[TradeUpload]
+) -> Dict[str, Union[Dict[str, Any], SimulationError]]:
+    """
+    Fallback of simulate_batch: configs (by cache key) sent as individual
+    /simulate requests, up to SWEEP_MAX_CONCURRENCY at a time over the
+    pooled keep-alive connections, with the trade file encoded once
+    """
+    upload = upload or prepare_upload(csv_file, trades)
+    workers = max(1, min(len(configs), SWEEP_MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        # Each request runs in a copy of the caller's context so stage timings reach its collector
+        futures = {
+            key: pool.submit(
+                contextvars.copy_context().run, _capture, _simulate_backend, config, csv_file, trades, on_queue, upload
+            )
+            for key, config in configs.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
 
+
+def _request_batch(
+    chunk: List[Tuple[str, Dict[str, Any]]],
+    upload: Optional[TradeUpload],
+    on_queue: Optional[Callable[[int], None]]
+) -> Optional[Dict[str, Union[Dict[str, Any], SimulationError]]]:
+    """
+    POST (cache key, config) pairs to /simulate_batch and cache each
+    result. The backend answers {"results": [...]} in request order, each
+    entry a result or {"error": message}. Returns None if the endpoint
+    does not exist.
+    """
+    import requests
+
+    files = {
+        'configs': ('configs.json', json.dumps([config for _, config in chunk]), 'application/json')
+    }
+    if upload is not None:
+        files[upload.field] = (upload.filename, upload.data, upload.content_type)
+
+    gate = get_backend_gate()
+    try:
+        with timed("queue_wait"):
+            gate.acquire(on_queue)
+    except QueueFullError as e:
+        get_registry().increment("backend_queue_rejected_total")
+        return {key: SimulationError(str(e)) for key, _ in chunk}
+
+    try:
+        response, content = _post_with_failover(files, "/simulate_batch")
+        if response.status_code in (404, 405):
+            return None
+        response.raise_for_status()
+
+        with timed("decode_json"):
+            entries = response.json()["results"]
+        if len(entries) != len(chunk):
+            raise ValueError(f"expected {len(chunk)} results, got {len(entries)}")
     except requests.exceptions.RequestException as e:
-        st.error(f"Error communicating with the simulation server: {str(e)}")
-        if hasattr(e, 'response') and hasattr(e.response, 'text'):
-            st.error(f"Server response: {e.response.text}")
+        response_text = None
+        if getattr(e, 'response', None) is not None:
+            response_text = e.response.text
+        error = SimulationError(f"Error communicating with the simulation server: {str(e)}", response_text)
+        return {key: error for key, _ in chunk}
+    except (ValueError, KeyError, TypeError) as e:
+        error = SimulationError(f"Invalid response from the simulation server: {str(e)}")
+        return {key: error for key, _ in chunk}
+    finally:
+        gate.release()
+
+    log_event(
+        logger, "simulate_batch",
+        configs=len(chunk),
+        request_bytes=len(response.request.body or b""),
+        response_bytes=len(content),
+        status=response.status_code,
+    )
+    get_registry().increment("backend_requests_total", role="batch")
+
+    outcomes = {}
+    for (key, config), entry in zip(chunk, entries):
+        if not isinstance(entry, dict) or "error" in entry:
+            message = entry.get("error") if isinstance(entry, dict) else entry
+            outcomes[key] = SimulationError(f"The simulation server could not run this config: {message}")
+        else:
+            if is_deterministic(config):
+                get_result_cache().put(key, entry)
+            outcomes[key] = entry
+    return outcomes
+
+
+def _post_with_failover(files: Dict[str, Any], path: str = "/simulate") -> Tuple["requests.Response", bytes]:
+    """
+    POST to `path` on an endpoint from the pool. If the node refuses or
+    drops the connection, or answers with a gateway error, the request is
+    sent to a node not tried yet, up to BACKEND_FAILOVER_ATTEMPTS more
+    times; a failed node is never tried again for the same request (with
+    a single node, the session's own retries are the only ones).
+    Returns the response and its body.
+    """
+    import requests
+
+    # Failures that indicate a bad node rather than a bad request; the
+    # request is retried on another endpoint
+    node_failures = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)
+    pool = get_endpoint_pool()
+    failovers = min(BACKEND_FAILOVER_ATTEMPTS, len(pool.endpoints) - 1)
+    tried = []
+    while True:
+        endpoint = pool.acquire(exclude=tried)
+        tried.append(endpoint)
+        start = time.perf_counter()
+        failed = False
+        try:
+            # Streamed so the wait for the headers (upload, backend compute
+            # and any retries) is timed apart from reading the body
+            with timed("backend"):
+                response = _send(requests.Request("POST", f"{endpoint.url}{path}", files=files), stream=True)
+            with timed("download"):
+                content = response.content
+            failed = response.status_code in GATEWAY_ERRORS
+        except node_failures:
+            failed = True
+            if len(tried) > failovers:
+                raise
+        finally:
+            pool.release(endpoint, None if failed else time.perf_counter() - start, failed=failed)
+
+        if not failed or len(tried) > failovers:
+            return response, content
+        get_registry().increment("backend_failover_total")
+        log_event(logger, "failover", level=logging.WARNING, sampled=False, endpoint=endpoint.url)
+
+
+def run_simulation(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    engine: str = SIMULATION_ENGINE,
+    trades: Optional["pd.DataFrame"] = None
+) -> Dict[str, Any]:
+    """
+    Run a simulation, reporting errors and the queue position in the UI
+    Returns None on failure.
+    """
+    metrics = get_registry()
+    queue_status = st.empty()
+
+    def show_position(position: int):
+        queue_status.info(f"The simulation server is busy. You are number {position} in line.")
+
+    try:
+        with timed("simulate"):
+            results = simulate(config, csv_file, engine, trades, on_queue=show_position)
+        queue_status.empty()
+        metrics.increment("simulations_total", engine=engine, outcome="ok")
+        return results
+
+    except SimulationError as e:
+        metrics.increment("simulations_total", engine=engine, outcome="error")
+        st.error(str(e))
+        if e.response_text:
+            st.error(f"Server response: {e.response_text}")
         logger.error(f"API error: {str(e)}")
         return None
     except Exception as e:
+        metrics.increment("simulations_total", engine=engine, outcome="error")
         st.error(f"Error: {str(e)}")
         logger.error(f"General error: {str(e)}")
         return None
-
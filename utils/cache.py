@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config.settings import CACHE_DISK_DIR, CACHE_DISK_MAX_MB, CACHE_MAX_MB, CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def hash_bytes(data: Optional[bytes]) -> str:
+    """SHA-256 of raw bytes, or an empty string when there is no data"""
+    if data is None:
+        return ""
+    return hashlib.sha256(data).hexdigest()
+
+
+def canonical_config(config: Dict[str, Any]) -> str:
+    """Serialize a config so logically equal dicts produce identical strings"""
+    return json.dumps(config, sort_keys=True, separators=(",", ":"))
+
+
+def make_cache_key(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    csv_digest: Optional[str] = None
+) -> str:
+    """
+    Content address of a simulation: canonical config plus CSV content hash.
+    csv_digest: hash_bytes(csv_file) computed earlier, so a file shared by
+    many requests is hashed once.
+    """
+    digest = hashlib.sha256()
+    digest.update(canonical_config(config).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update((csv_digest if csv_digest is not None else hash_bytes(csv_file)).encode("ascii"))
+    return digest.hexdigest()
+
+
+def is_deterministic(config: Dict[str, Any]) -> bool:
+    """A config with a fixed seed always produces the same result, so only these are cached"""
+    return config.get("seed") is not None
+
+
+class ResultCache:
+    """
+    Two-tier cache of simulation results, keyed by make_cache_key.
+    Callers only store seeded configs (see is_deterministic): an unseeded
+    run is a fresh random sample and is never served again.
+    Both tiers are bounded by bytes (the size of each result's JSON) and
+    evict the least recently used results first.
+    Memory tier: entries expire after a TTL.
+    Disk tier (optional): JSON files that survive restarts. The budget is
+    kept per process; files another process adds are counted once read.
+    """
+
+    def __init__(self, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+                 ttl_seconds: float = CACHE_TTL_SECONDS,
+                 disk_dir: Optional[str] = CACHE_DISK_DIR or None,
+                 disk_max_bytes: int = int(CACHE_DISK_MAX_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        # Disk tier index: key -> file size, least recently used first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._index_disk()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _index_disk(self):
+        """Index the files left by earlier runs, oldest first, and trim to the budget"""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, entry.name[:-len(".json")], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._files[key] = size
+                self._disk_bytes += size
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete least recently used files until the disk tier fits; caller holds the lock"""
+        while self._disk_bytes > self.disk_max_bytes and self._files:
+            key, size = self._files.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove cache file for {key}: {str(e)}")
+
+    def _touch_disk(self, key: str, size: int):
+        """Mark a file most recently used; caller holds the lock"""
+        self._disk_bytes += size - self._files.pop(key, 0)
+        self._files[key] = size
+        self._trim_disk()
+
+    def _store(self, key: str, value: Dict[str, Any], size: int):
+        """Insert into the memory tier; caller holds the lock"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result, promoting disk hits into memory"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, size = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r") as f:
+                    text = f.read()
+                value = json.loads(text)
+            except FileNotFoundError:
+                value = None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable cache file for {key}: {str(e)}")
+                value = None
+            if value is not None:
+                try:
+                    # Recency survives a restart (see _index_disk)
+                    os.utime(path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self._store(key, value, len(text))
+                    self._touch_disk(key, len(text))
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result in memory and, when enabled, on disk"""
+        text = json.dumps(value)
+        with self._lock:
+            self._store(key, value, len(text))
+
+        if self.disk_dir and len(text) <= self.disk_max_bytes:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write cache file for {key}: {str(e)}")
+                return
+            with self._lock:
+                self._touch_disk(key, len(text))
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left in place)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_files": len(self._files),
+                "disk_bytes": self._disk_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache, creating it on first use"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
@@ -0,0 +1,97 @@
+"""
+Account comparison: one strategy or trade file simulated on every account
+in config.accounts. The per-account configs run concurrently through
+run_sweep, and the trade file is encoded once for the batch (and hashed
+once, unless the caller already knows its digest).
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from config.accounts import ACCOUNT_OPTIONS
+from config.settings import SWEEP_MAX_CONCURRENCY, SIMULATION_ENGINE
+from utils.api import engine_label, prepare_upload
+from utils.history import record_run
+from utils.sweep import SweepPoint, run_sweep
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from utils.jobs import Job
+
+# Statistics of display_results compared across accounts, in table order
+BALANCE_STATISTICS = {
+    "mean_balance": "Mean Balance",
+    "median_balance": "Median Balance",
+    "std_dev": "Standard Deviation",
+    "positive_balance_percentage": "Positive Balance (%)",
+    "mean_days": "Mean Days",
+}
+
+
+def build_account_configs(base_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """base_config once per account, in ACCOUNT_OPTIONS order"""
+    return [dict(base_config, account_type=account) for account in ACCOUNT_OPTIONS]
+
+
+def summarize_account(results: Dict[str, Any]) -> Dict[str, float]:
+    """One comparison table row: balance statistics, end state percentages, then the engine"""
+    row = {label: results.get(key) for key, label in BALANCE_STATISTICS.items()}
+    for state, percentage in results.get("end_state_percentages", {}).items():
+        row[f"{state} (%)"] = percentage
+    row["Engine"] = engine_label(results)
+    return row
+
+
+def run_comparison(
+    base_config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    engine: str = SIMULATION_ENGINE,
+    max_workers: int = SWEEP_MAX_CONCURRENCY,
+    cancel_event: Optional[threading.Event] = None,
+    csv_digest: Optional[str] = None
+) -> Iterator[SweepPoint]:
+    """
+    Run base_config on every account concurrently and yield each account's
+    point as it completes (point.config["account_type"] identifies it).
+    csv_digest: content hash of csv_file, if already known.
+    """
+    upload = prepare_upload(csv_file, trades, csv_digest) if engine != "local" else None
+    return run_sweep(
+        build_account_configs(base_config),
+        csv_file,
+        max_workers,
+        cancel_event,
+        engine=engine,
+        trades=trades,
+        upload=upload,
+    )
+
+
+def comparison_task(base_config: Dict[str, Any]) -> Callable[["Job"], None]:
+    """
+    Job task (see JobQueue.submit) running base_config on every account
+    with the job's trade file and engine. job.result is {"results": {account:
+    results}, "errors": {account: message}}, refreshed as accounts
+    complete. Every account's run is recorded in the run history.
+    """
+    def task(job: "Job"):
+        results, errors = {}, {}
+        total = len(ACCOUNT_OPTIONS)
+        # run_sweep sets the event it is given when it finishes, so the
+        # job's cancel_event is only read
+        stop = threading.Event()
+        points = run_comparison(base_config, job.csv_file, job.trades, job.engine,
+                                cancel_event=stop, csv_digest=job.csv_digest)
+        for done, point in enumerate(points, start=1):
+            if job.cancel_event.is_set():
+                stop.set()
+            account = point.config["account_type"]
+            if point.results is not None:
+                results[account] = point.results
+                record_run(point.config, point.results, job.csv_digest, job.client)
+            else:
+                errors[account] = point.error
+            # New dicts each time: the script thread may be rendering the last ones
+            job.result = {"results": dict(results), "errors": dict(errors)}
+            job.progress = done / total
+            job.progress_text = f"{done} / {total} accounts"
+    return task
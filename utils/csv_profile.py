@@ -0,0 +1,94 @@
+"""
+Profile of an uploaded trade file, built once per file content.
+
+The profile carries the validation outcome and the validated trades, so
+reruns with new core parameters reuse it instead of parsing the file
+again, plus the summary statistics shown as a preview before any run.
+Cached profiles are shared by every session that uploads the same
+content and must not be modified.
+"""
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+import streamlit as st
+from config.settings import CSV_PROFILE_CACHE_ENTRIES, CSV_PROFILE_TTL_SECONDS
+from utils.cache import hash_bytes
+from utils.security import validate_csv_file
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Quantiles reported for the return and excursion distributions
+PROFILE_QUANTILES = {"p05": 0.05, "p25": 0.25, "median": 0.5, "p75": 0.75, "p95": 0.95}
+
+
+@dataclass
+class CsvProfile:
+    """Validation status and summary of one trade file"""
+    digest: str
+    valid: bool
+    error: Optional[str] = None
+    # The validated frame, as validate_csv_file returns it
+    trades: Optional["pd.DataFrame"] = None
+    rows: int = 0
+    start: Optional["pd.Timestamp"] = None
+    end: Optional["pd.Timestamp"] = None
+    trading_days: int = 0
+    trades_per_day: float = 0.0
+    win_rate: float = 0.0
+    returns: Dict[str, float] = field(default_factory=dict)
+    excursions: Dict[str, float] = field(default_factory=dict)
+
+
+def describe(values: "pd.Series") -> Dict[str, float]:
+    """Mean, spread and quantiles of one numeric column"""
+    quantiles = values.quantile(list(PROFILE_QUANTILES.values())).to_numpy()
+    summary = {"mean": float(values.mean()), "std": float(values.std()), "min": float(values.min())}
+    summary.update({name: float(q) for name, q in zip(PROFILE_QUANTILES, quantiles)})
+    summary["max"] = float(values.max())
+    return summary
+
+
+def build_profile(file, digest: Optional[str] = None) -> CsvProfile:
+    """
+    Validate a file (anything validate_csv_file accepts) and summarize it.
+    digest: hash_bytes() of the content when the caller already has it.
+    """
+    if digest is None:
+        digest = hash_bytes(file.getvalue())
+    is_valid, error_msg, df = validate_csv_file(file)
+    if not is_valid:
+        return CsvProfile(digest, False, error_msg)
+    if df.empty:
+        return CsvProfile(digest, False, "File contains no trades")
+
+    trading_days = int(df["DateTime"].dt.normalize().nunique())
+    return CsvProfile(
+        digest,
+        True,
+        trades=df,
+        rows=len(df),
+        start=df["DateTime"].min(),
+        end=df["DateTime"].max(),
+        trading_days=trading_days,
+        trades_per_day=len(df) / trading_days,
+        win_rate=float((df["Return"] > 0).mean() * 100),
+        returns=describe(df["Return"]),
+        excursions=describe(df["Max Opposite Excursion"]),
+    )
+
+
+@st.cache_resource(max_entries=CSV_PROFILE_CACHE_ENTRIES, ttl=CSV_PROFILE_TTL_SECONDS, show_spinner=False)
+def _cached_profile(digest: str, _open_file: Callable[[], Any]) -> CsvProfile:
+    # Keyed by digest only; Streamlit does not hash underscore arguments.
+    # cache_resource returns the cached object itself: cache_data would
+    # pickle the trades frame and unpickle a new copy on every rerun.
+    return build_profile(_open_file(), digest)
+
+
+def get_csv_profile(digest: str, open_file: Callable[[], Any]) -> CsvProfile:
+    """
+    Profile of the file with content hash digest (see utils.upload_store),
+    built the first time that content is seen and then served from cache.
+    open_file() returns the file and is only called on a cache miss.
+    """
+    return _cached_profile(digest, open_file)
@@ -0,0 +1,188 @@
+"""
+Pool of simulator backends.
+
+Requests go to the healthy endpoint with the lowest expected wait. That
+is its outstanding requests plus one, times its smoothed latency, so
+least-outstanding routing is weighted by how fast each node has been.
+An endpoint that fails BACKEND_EJECT_AFTER_FAILURES times in a row is
+ejected. Each repeat ejection doubles the ejection time. A background
+thread probes every endpoint, ejected ones included, and a successful
+probe brings a node back early.
+"""
+import logging
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional, Sequence
+from config.settings import (
+    API_URLS,
+    HTTP_CONNECT_TIMEOUT,
+    BACKEND_HEALTH_INTERVAL_SECONDS,
+    BACKEND_EJECT_AFTER_FAILURES,
+    BACKEND_EJECT_SECONDS,
+)
+from utils.metrics import get_registry, log_event
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+# Latency assumed for an endpoint until its first response replaces it
+INITIAL_LATENCY = 0.1
+MAX_EJECT_SECONDS = 600.0
+
+
+class Endpoint:
+    """Routing state of one backend"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.latency = INITIAL_LATENCY
+        self.samples = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def score(self) -> float:
+        return (self.outstanding + 1) * self.latency
+
+
+class EndpointPool:
+    """Thread-safe endpoint selection with health tracking"""
+
+    def __init__(
+        self,
+        urls: Sequence[str] = API_URLS,
+        eject_after: int = BACKEND_EJECT_AFTER_FAILURES,
+        eject_seconds: float = BACKEND_EJECT_SECONDS
+    ):
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """
+        Pick an endpoint and count a request as outstanding on it; pair
+        with release(). Endpoints in `exclude` (already tried) are skipped
+        while others remain. If every candidate is ejected, the one
+        due back soonest is used rather than failing outright.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            healthy = [e for e in candidates if not e.ejected(now)]
+            if healthy:
+                best = min(e.score() for e in healthy)
+                endpoint = random.choice([e for e in healthy if e.score() == best])
+            else:
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, seconds: Optional[float] = None, failed: bool = False):
+        """
+        Finish a request started with acquire(). seconds: how long the
+        backend took, for the latency estimate. failed: the node itself
+        misbehaved (connection refused or reset, gateway error).
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if seconds is not None:
+                weight = LATENCY_SMOOTHING if endpoint.samples else 1.0
+                endpoint.latency += weight * (seconds - endpoint.latency)
+                endpoint.samples += 1
+        if failed:
+            self.mark_failure(endpoint)
+        else:
+            self.mark_success(endpoint)
+
+    def mark_success(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.failures = 0
+            if endpoint.ejected_until:
+                endpoint.ejected_until = 0.0
+                endpoint.ejections = 0
+                log_event(logger, "endpoint_recovered", sampled=False, endpoint=endpoint.url)
+
+    def mark_failure(self, endpoint: Endpoint):
+        now = time.monotonic()
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures < self.eject_after or endpoint.ejected(now):
+                return
+            endpoint.ejections += 1
+            duration = min(self.eject_seconds * 2 ** (endpoint.ejections - 1), MAX_EJECT_SECONDS)
+            endpoint.ejected_until = now + duration
+            endpoint.failures = 0
+        get_registry().increment("backend_ejections_total", endpoint=endpoint.url)
+        log_event(logger, "endpoint_ejected", level=logging.WARNING, sampled=False,
+                  endpoint=endpoint.url, seconds=duration)
+
+    def probe(self, session: "requests.Session"):
+        """
+        Check every endpoint once. Any HTTP answer below 500 counts as
+        alive, so backends without a /health route still pass.
+        """
+        import requests
+
+        for endpoint in self.endpoints:
+            try:
+                response = session.get(f"{endpoint.url}/health", timeout=(HTTP_CONNECT_TIMEOUT, 5))
+                alive = response.status_code < 500
+            except requests.exceptions.RequestException:
+                alive = False
+            if alive:
+                self.mark_success(endpoint)
+            else:
+                self.mark_failure(endpoint)
+
+    def healthy_urls(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [e.url for e in self.endpoints if not e.ejected(now)]
+
+
+def _probe_forever(pool: EndpointPool, interval: float):
+    import requests
+
+    # Own session: probes must not wait behind simulations for pooled connections
+    session = requests.Session()
+    while True:
+        time.sleep(interval)
+        try:
+            pool.probe(session)
+        except Exception as e:
+            logger.error(f"Health probe failed: {str(e)}")
+
+
+_pool: Optional[EndpointPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_endpoint_pool() -> EndpointPool:
+    """
+    Return the process-wide endpoint pool, creating it on first use.
+    Health probes run only when there is more than one endpoint.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = EndpointPool()
+                if len(pool.endpoints) > 1 and BACKEND_HEALTH_INTERVAL_SECONDS > 0:
+                    threading.Thread(
+                        target=_probe_forever,
+                        args=(pool, BACKEND_HEALTH_INTERVAL_SECONDS),
+                        name="endpoint-probe",
+                        daemon=True,
+                    ).start()
+                _pool = pool
+    return _pool
@@ -0,0 +1,372 @@
+"""
+Local run history.
+
+Every completed run (a job, or a point of a sweep, search, account
+comparison or paired what-if) is recorded in an SQLite file. A record holds the
+config, the trade file's content hash and the summary statistics. It
+also holds timing and the histogram as a zlib-compressed blob. Account,
+multiplier, strategy parameters and time are indexed columns, so the
+history view filters thousands of runs in milliseconds.
+
+record() only queues a run and returns at once. A writer thread
+serializes the queued runs and inserts them in batches, so a job never
+waits on the database.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
+from config.settings import (
+    HISTORY_DB_PATH,
+    HISTORY_BATCH_SIZE,
+    HISTORY_FLUSH_SECONDS,
+    HISTORY_MAX_PENDING,
+    HISTORY_MAX_RUNS,
+    HISTORY_QUERY_LIMIT,
+)
+from utils.metrics import get_registry
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Result keys holding the balance distribution; stored compressed
+HISTOGRAM_KEYS = ("histogram_plotly_json", "histogram_bins", "balance_quantiles")
+
+# Config values copied into indexed columns
+CONFIG_COLUMNS = (
+    "account_type",
+    "multiplier",
+    "stop_loss",
+    "take_profit",
+    "win_percentage",
+    "avg_trades_per_day",
+    "max_simulation_days",
+    "condition_end_state",
+    "seed",
+)
+# Statistics copied into columns, so the view lists runs without decoding JSON
+RESULT_COLUMNS = ("mean_balance", "median_balance", "std_dev", "positive_balance_percentage", "mean_days")
+END_STATE_COLUMNS = {"Busted": "busted", "TimeOut": "timeout", "MaxPayouts": "max_payouts"}
+
+# Columns query() can filter by range
+RANGE_COLUMNS = ("multiplier", "stop_loss", "take_profit", "win_percentage", "avg_trades_per_day", "recorded_at")
+
+SUMMARY_COLUMNS = (
+    ("id", "INTEGER PRIMARY KEY"),
+    ("recorded_at", "REAL NOT NULL"),
+    ("client", "TEXT"),
+    ("engine", "TEXT"),
+    ("account_type", "TEXT"),
+    ("multiplier", "REAL"),
+    ("stop_loss", "REAL"),
+    ("take_profit", "REAL"),
+    ("win_percentage", "REAL"),
+    ("avg_trades_per_day", "REAL"),
+    ("max_simulation_days", "INTEGER"),
+    ("condition_end_state", "TEXT"),
+    ("seed", "INTEGER"),
+    ("csv_digest", "TEXT"),
+    ("iterations", "INTEGER"),
+    ("mean_balance", "REAL"),
+    ("median_balance", "REAL"),
+    ("std_dev", "REAL"),
+    ("positive_balance_percentage", "REAL"),
+    ("mean_days", "REAL"),
+    ("busted", "REAL"),
+    ("timeout", "REAL"),
+    ("max_payouts", "REAL"),
+    ("queue_seconds", "REAL"),
+    ("run_seconds", "REAL"),
+)
+SUMMARY_NAMES = [name for name, _ in SUMMARY_COLUMNS[1:]]
+# Kept in a table of their own, so filtering runs only reads compact rows
+DATA_NAMES = ["config", "results", "histogram"]
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs ({})".format(", ".join(f"{name} {kind}" for name, kind in SUMMARY_COLUMNS)),
+    "CREATE TABLE IF NOT EXISTS run_data (id INTEGER PRIMARY KEY, config TEXT, results TEXT, histogram BLOB)",
+    "CREATE INDEX IF NOT EXISTS runs_account ON runs (account_type, multiplier, recorded_at)",
+    "CREATE INDEX IF NOT EXISTS runs_strategy ON runs (stop_loss, take_profit, win_percentage)",
+    "CREATE INDEX IF NOT EXISTS runs_recorded ON runs (recorded_at)",
+    "CREATE INDEX IF NOT EXISTS runs_client ON runs (client, recorded_at)",
+    "CREATE INDEX IF NOT EXISTS runs_csv ON runs (csv_digest)",
+]
+
+INSERT_RUN = f"INSERT INTO runs ({', '.join(SUMMARY_NAMES)}) VALUES ({', '.join('?' * len(SUMMARY_NAMES))})"
+INSERT_DATA = f"INSERT INTO run_data (id, {', '.join(DATA_NAMES)}) VALUES (?, {', '.join('?' * len(DATA_NAMES))})"
+
+
+def client_hash(client: Optional[str]) -> Optional[str]:
+    """Stored in place of the client id (an IP address), so none is kept in plain text"""
+    if not client:
+        return None
+    return hashlib.sha256(client.encode("utf-8")).hexdigest()[:16]
+
+
+def _row(
+    recorded_at: float,
+    config: Dict[str, Any],
+    results: Dict[str, Any],
+    csv_digest: Optional[str],
+    client: Optional[str],
+    queue_seconds: Optional[float],
+    run_seconds: Optional[float]
+) -> Tuple[Tuple, Tuple]:
+    """The runs and run_data rows of one run, without ids; runs on the writer thread"""
+    end_states = results.get("end_state_percentages", {})
+    histogram = {key: results[key] for key in HISTOGRAM_KEYS if results.get(key)}
+    summary = {key: value for key, value in results.items() if key not in HISTOGRAM_KEYS}
+    values = {
+        "recorded_at": recorded_at,
+        "client": client_hash(client),
+        "engine": results.get("engine", "backend"),
+        "csv_digest": csv_digest,
+        "iterations": int(results.get("iterations_completed") or config.get("iterations", 0)),
+        "queue_seconds": queue_seconds,
+        "run_seconds": run_seconds,
+        "config": json.dumps(config, sort_keys=True),
+        "results": json.dumps(summary),
+        "histogram": zlib.compress(json.dumps(histogram).encode("utf-8")) if histogram else None,
+    }
+    values.update({key: config.get(key) for key in CONFIG_COLUMNS})
+    values.update({key: results.get(key) for key in RESULT_COLUMNS})
+    values.update({column: end_states.get(state) for state, column in END_STATE_COLUMNS.items()})
+    return tuple(values[name] for name in SUMMARY_NAMES), tuple(values[name] for name in DATA_NAMES)
+
+
+class RunHistory:
+    """SQLite store of completed runs with a batching background writer"""
+
+    def __init__(
+        self,
+        path: str = HISTORY_DB_PATH,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_seconds: float = HISTORY_FLUSH_SECONDS,
+        max_pending: int = HISTORY_MAX_PENDING,
+        max_runs: int = HISTORY_MAX_RUNS
+    ):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_runs = max_runs
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            # Readers see the last committed batch while the writer appends
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="run-history-writer", daemon=True)
+                self._writer.start()
+
+    def record(
+        self,
+        config: Dict[str, Any],
+        results: Dict[str, Any],
+        csv_digest: Optional[str] = None,
+        client: Optional[str] = None,
+        queue_seconds: Optional[float] = None,
+        run_seconds: Optional[float] = None
+    ) -> bool:
+        """
+        Queue a completed run for writing and return at once. The dicts
+        must not be modified afterwards. Returns False, dropping the run,
+        when HISTORY_MAX_PENDING runs are already waiting.
+        """
+        self._start_writer()
+        try:
+            self._pending.put_nowait((time.time(), config, results, csv_digest, client, queue_seconds, run_seconds))
+        except queue.Full:
+            self.dropped += 1
+            get_registry().increment("history_dropped_total")
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every run queued so far is written; False on timeout"""
+        self._start_writer()
+        done = threading.Event()
+        self._pending.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            runs = [item for item in batch if not isinstance(item, threading.Event)]
+            if runs:
+                self._write(conn, runs)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, conn: sqlite3.Connection, runs: Iterable[Tuple]):
+        start = time.perf_counter()
+        try:
+            rows = [_row(*run) for run in runs]
+            with conn:
+                for summary, data in rows:
+                    run_id = conn.execute(INSERT_RUN, summary).lastrowid
+                    conn.execute(INSERT_DATA, (run_id,) + data)
+                if self.max_runs > 0:
+                    oldest_kept = conn.execute("SELECT max(id) FROM runs").fetchone()[0] - self.max_runs
+                    conn.execute("DELETE FROM runs WHERE id <= ?", (oldest_kept,))
+                    conn.execute("DELETE FROM run_data WHERE id <= ?", (oldest_kept,))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Could not record {len(runs)} runs in the history: {str(e)}")
+            get_registry().increment("history_dropped_total", len(runs))
+            return
+        self.written += len(rows)
+        registry = get_registry()
+        registry.increment("history_runs_written_total", len(rows))
+        registry.observe("history_write", time.perf_counter() - start)
+
+    def query(
+        self,
+        account_types: Optional[Iterable[str]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        client: Optional[str] = None,
+        csv_digest: Optional[str] = None,
+        trade_file: Optional[bool] = None,
+        limit: int = HISTORY_QUERY_LIMIT
+    ) -> "pd.DataFrame":
+        """
+        Summary columns of matching runs, newest first.
+        ranges: {column: (low, high)} for columns in RANGE_COLUMNS; either
+        bound may be None.
+        trade_file: True for historical-data runs only, False for
+        simulated-parameter runs only.
+        """
+        where, params = [], []
+        account_types = list(account_types or [])
+        if account_types:
+            where.append(f"account_type IN ({', '.join('?' * len(account_types))})")
+            params.extend(account_types)
+        for column, (low, high) in (ranges or {}).items():
+            if column not in RANGE_COLUMNS:
+                raise ValueError(f"Cannot filter runs by {column}")
+            if low is not None:
+                where.append(f"{column} >= ?")
+                params.append(low)
+            if high is not None:
+                where.append(f"{column} <= ?")
+                params.append(high)
+        if client is not None:
+            where.append("client = ?")
+            params.append(client_hash(client))
+        if csv_digest is not None:
+            where.append("csv_digest = ?")
+            params.append(csv_digest)
+        if trade_file is not None:
+            where.append("csv_digest IS NOT NULL" if trade_file else "csv_digest IS NULL")
+
+        # The newest matches are picked from the index first, so only the
+        # returned rows are read in full and sorted
+        matches = "SELECT id FROM runs"
+        if where:
+            matches += " WHERE " + " AND ".join(where)
+        matches += " ORDER BY recorded_at DESC LIMIT ?"
+        params.append(limit)
+        columns = [name for name, _ in SUMMARY_COLUMNS]
+        sql = f"SELECT {', '.join(columns)} FROM runs WHERE id IN ({matches}) ORDER BY recorded_at DESC"
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        import pandas as pd
+
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def load(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """
+        The stored run as {"config": ..., "results": ...}, with the histogram
+        restored so components.results.display_results can show it again.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT config, results, histogram FROM run_data WHERE id = ?", (run_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        config, results, histogram = row
+        results = json.loads(results)
+        if histogram is not None:
+            results.update(json.loads(zlib.decompress(histogram)))
+        return {"config": json.loads(config), "results": results}
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {"pending": self._pending.qsize(), "written": self.written, "dropped": self.dropped}
+
+
+_run_history: Optional[RunHistory] = None
+_run_history_lock = threading.Lock()
+
+
+def get_run_history() -> Optional[RunHistory]:
+    """Return the process-wide run history, or None when HISTORY_DB_PATH is empty"""
+    global _run_history
+    if _run_history is None and HISTORY_DB_PATH:
+        with _run_history_lock:
+            if _run_history is None:
+                try:
+                    _run_history = RunHistory()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Run history disabled, could not open {HISTORY_DB_PATH}: {str(e)}")
+                    return None
+    return _run_history
+
+
+def record_run(
+    config: Dict[str, Any],
+    results: Dict[str, Any],
+    csv_digest: Optional[str] = None,
+    client: Optional[str] = None,
+    queue_seconds: Optional[float] = None,
+    run_seconds: Optional[float] = None
+) -> bool:
+    """Queue a completed run for the history (see RunHistory.record); False if it is disabled or full"""
+    history = get_run_history()
+    if history is None:
+        return False
+    return history.record(config, results, csv_digest, client, queue_seconds, run_seconds)
@@ -0,0 +1,319 @@
+"""
+Background simulation jobs.
+
+submit() returns a job id at once. A bounded pool of worker threads runs
+queued jobs in priority order (lower value first, FIFO within a priority),
+so Streamlit script threads never block on the backend. Jobs and their
+results live in process memory: they survive reruns and page refreshes
+(looked up by id) but not a server restart.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from config.settings import (
+    JOB_WORKERS,
+    JOB_MAX_QUEUED,
+    JOB_RETENTION_SECONDS,
+    JOB_MAX_RETAINED,
+    SIMULATION_ENGINE,
+)
+from utils.api import simulate, SimulationError
+from utils.history import record_run
+from utils.metrics import StageTimings, collect_timings, get_registry, record_stage
+from utils.progressive import is_converged, run_adaptive, run_progressive
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting"""
+
+
+@dataclass
+class Job:
+    """A submitted simulation and, once it has run, its outcome"""
+    id: str
+    config: Dict[str, Any]
+    csv_file: Optional[bytes] = None
+    trades: Optional["pd.DataFrame"] = None
+    # Content hash of csv_file and the submitting client, kept for the run history
+    csv_digest: Optional[str] = None
+    client: Optional[str] = None
+    engine: str = SIMULATION_ENGINE
+    priority: int = PRIORITY_NORMAL
+    progressive: bool = False
+    # Auto iterations: {"mean_balance": ±$, "end_state_percentages": ±points};
+    # config["iterations"] is then the cap
+    tolerances: Optional[Dict[str, float]] = None
+    # Whether an auto iterations run reached its tolerances
+    converged: Optional[bool] = None
+    # Runs instead of a simulation (e.g. a parameter sweep) on the worker
+    # thread: sets job.result, updated while it runs if partial results are
+    # useful, reports job.progress, stops once job.cancel_event is set and
+    # records its runs in the history itself
+    task: Optional[Callable[["Job"], None]] = None
+    # Share done (0-1) and a status line of a task
+    progress: float = 0.0
+    progress_text: Optional[str] = None
+    status: str = QUEUED
+    # Final result, or the latest merged estimate of a progressive job
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    response_text: Optional[str] = None
+    iterations_completed: int = 0
+    # Place in line at the backend gate while the request waits for a slot
+    gate_position: Optional[int] = None
+    timings: StageTimings = field(default_factory=StageTimings)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+
+class JobQueue:
+    """Priority queue of jobs, a worker pool, and a bounded store of finished jobs"""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+        max_retained: int = JOB_MAX_RETAINED
+    ):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self._heap = []
+        self._sequence = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        config: Dict[str, Any],
+        csv_file: Optional[bytes] = None,
+        trades: Optional["pd.DataFrame"] = None,
+        engine: str = SIMULATION_ENGINE,
+        priority: int = PRIORITY_NORMAL,
+        progressive: bool = False,
+        timings: Optional[StageTimings] = None,
+        tolerances: Optional[Dict[str, float]] = None,
+        csv_digest: Optional[str] = None,
+        client: Optional[str] = None,
+        task: Optional[Callable[[Job], None]] = None
+    ) -> str:
+        """
+        Queue a simulation and return its job id.
+        timings: stages already measured for this run (e.g. CSV validation).
+        tolerances: run batches only until the results are this precise
+        (see Job.tolerances).
+        csv_digest, client: recorded with the run in the history.
+        task: run this instead of simulating config (see Job.task); config
+        then only describes the job.
+        Raises JobQueueFullError when JOB_MAX_QUEUED jobs are waiting.
+        """
+        job = Job(
+            id=uuid.uuid4().hex,
+            config=config,
+            csv_file=csv_file,
+            trades=trades,
+            engine=engine,
+            priority=priority,
+            progressive=progressive,
+            timings=timings or StageTimings(),
+            tolerances=tolerances,
+            csv_digest=csv_digest,
+            client=client,
+            task=task,
+        )
+        with self._cond:
+            if self._queued >= self.max_queued:
+                raise JobQueueFullError("Too many simulations are waiting. Please try again shortly.")
+            self._prune()
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, next(self._sequence), job.id))
+            self._queued += 1
+            self._start_workers()
+            self._cond.notify()
+        get_registry().increment("jobs_total", status="submitted")
+        return job.id
+
+    def get(self, job_id: str, client: Optional[str] = None) -> Optional[Job]:
+        """The job, or None if it is unknown or (with client) another client submitted it"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is None or (client is not None and job.client != client):
+            return None
+        return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place among queued jobs in run order, or None if not queued"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return None
+            # Cancelled jobs stay in the heap until a worker pops them and
+            # may already have been pruned from _jobs
+            queued = (entry for entry in self._heap if entry[2] in self._jobs)
+            ahead = sorted(entry for entry in queued if self._jobs[entry[2]].status == QUEUED)
+            for rank, entry in enumerate(ahead, start=1):
+                if entry[2] == job_id:
+                    return rank
+        return None
+
+    def cancel(self, job_id: str, client: Optional[str] = None) -> bool:
+        """
+        Cancel a job. A queued job never runs; a running progressive job
+        stops after its in-flight batches and keeps its partial estimate.
+        With client, jobs of other clients are left alone.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished or (client is not None and job.client != client):
+                return False
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return True
+
+    def _finish(self, job: Job, status: str):
+        """Record the outcome; caller holds the lock"""
+        if job.status == QUEUED:
+            self._queued -= 1
+        job.status = status
+        job.finished_at = time.time()
+        # Inputs are not needed any more and can be large
+        job.csv_file = None
+        job.trades = None
+        get_registry().increment("jobs_total", status=status)
+
+    def _prune(self):
+        """Drop expired finished jobs, and the oldest finished ones beyond max_retained"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_retained
+        for job in finished:
+            if excess > 0 or now - job.finished_at > self.retention_seconds:
+                del self._jobs[job.id]
+                excess -= 1
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                if job is None or job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._queued -= 1
+            self._run(job)
+
+    def _run(self, job: Job):
+        with collect_timings(job.timings):
+            record_stage("job_queue_wait", job.started_at - job.submitted_at)
+            status = DONE
+            try:
+                if job.task is not None:
+                    job.task(job)
+                elif job.tolerances:
+                    self._run_adaptive(job)
+                elif job.progressive:
+                    for snapshot in run_progressive(job.config, job.csv_file, job.trades, job.engine, job.cancel_event):
+                        job.result = snapshot
+                        job.iterations_completed = snapshot["iterations_completed"]
+                else:
+                    job.result = simulate(
+                        job.config, job.csv_file, job.engine, job.trades,
+                        on_queue=lambda position: setattr(job, "gate_position", position),
+                    )
+                    job.iterations_completed = int(job.config["iterations"])
+                if job.cancel_event.is_set():
+                    status = CANCELLED
+            except SimulationError as e:
+                status = FAILED
+                job.error = str(e)
+                job.response_text = e.response_text
+                logger.error(f"API error: {str(e)}")
+            except Exception as e:
+                status = FAILED
+                job.error = f"Error: {str(e)}"
+                logger.error(f"Job {job.id} failed: {str(e)}")
+
+        job.gate_position = None
+        with self._cond:
+            self._finish(job, status)
+        if status == DONE and job.task is None:
+            self._record(job)
+
+    def _record(self, job: Job):
+        """Queue a completed job for the run history (does not wait on the database)"""
+        record_run(
+            job.config, job.result, job.csv_digest, job.client,
+            queue_seconds=job.started_at - job.submitted_at,
+            run_seconds=job.finished_at - job.started_at,
+        )
+
+    def _run_adaptive(self, job: Job):
+        balance_tolerance = job.tolerances["mean_balance"]
+        end_state_tolerance = job.tolerances["end_state_percentages"]
+        for snapshot in run_adaptive(
+            job.config, balance_tolerance, end_state_tolerance,
+            job.csv_file, job.trades, job.engine, job.cancel_event,
+        ):
+            job.result = snapshot
+            job.iterations_completed = snapshot["iterations_completed"]
+        job.converged = is_converged(job.result, balance_tolerance, end_state_tolerance)
+        get_registry().increment(
+            "adaptive_iterations_saved_total", int(job.config["iterations"]) - job.iterations_completed
+        )
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,238 @@
+"""
+Process-wide admission control shared by every Streamlit session.
+
+RateLimiter holds a token bucket per client plus one global bucket, so a
+user cannot multiply their budget by opening tabs. ConcurrencyGate caps
+in-flight /simulate requests. Excess callers wait in a bounded FIFO queue
+and can report their position while they wait.
+All operations are O(1) apart from waking waiters on release.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from config.settings import (
+    RATE_LIMIT_CLIENT_REQUESTS,
+    RATE_LIMIT_CLIENT_WINDOW_SECONDS,
+    RATE_LIMIT_GLOBAL_PER_SECOND,
+    RATE_LIMIT_GLOBAL_BURST,
+    RATE_LIMIT_MAX_CLIENTS,
+    BACKEND_MAX_CONCURRENCY,
+    BACKEND_MAX_QUEUE,
+    BACKEND_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+class TokenBucket:
+    """
+    Holds up to `capacity` tokens, refilled continuously at `rate` per
+    second. Refill is computed lazily from the last update, so a bucket
+    costs nothing while idle. Not thread-safe; RateLimiter locks around it.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def try_take(self, now: float, tokens: float = 1.0) -> bool:
+        self._refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def refund(self, tokens: float = 1.0):
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def retry_after(self, now: float, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available"""
+        self._refill(now)
+        if self.tokens >= tokens or self.rate <= 0:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-client and global token buckets. A request is admitted only if
+    both buckets have a token; a client token taken for a request the
+    global bucket rejects is refunded.
+    Client buckets are kept in LRU order and the least recently seen one
+    is dropped beyond `max_clients`.
+    """
+
+    def __init__(
+        self,
+        client_rate: float = RATE_LIMIT_CLIENT_REQUESTS / RATE_LIMIT_CLIENT_WINDOW_SECONDS,
+        client_burst: float = RATE_LIMIT_CLIENT_REQUESTS,
+        global_rate: float = RATE_LIMIT_GLOBAL_PER_SECOND,
+        global_burst: float = RATE_LIMIT_GLOBAL_BURST,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS
+    ):
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self._global = TokenBucket(global_rate, global_burst)
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client_id: str, now: Optional[float] = None, tokens: float = 1.0) -> Tuple[bool, str, float]:
+        """
+        Try to admit a request from client_id costing `tokens` runs (e.g.
+        one per point of a parameter sweep); at most max_tokens() can ever
+        be admitted at once.
+        Returns (allowed, scope, retry_after): scope is "client" or "global"
+        when rejected and retry_after the seconds until a retry can succeed.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._clients.get(client_id)
+            if bucket is None:
+                bucket = self._clients[client_id] = TokenBucket(self.client_rate, self.client_burst, now)
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client_id)
+
+            if not bucket.try_take(now, tokens):
+                return False, "client", bucket.retry_after(now, tokens)
+            if not self._global.try_take(now, tokens):
+                bucket.refund(tokens)
+                return False, "global", self._global.retry_after(now, tokens)
+            return True, "", 0.0
+
+    def max_tokens(self) -> float:
+        """Largest cost acquire() can admit: the smaller of the two bursts"""
+        return min(self.client_burst, self._global.capacity)
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+class QueueFullError(Exception):
+    """Raised when the wait queue is full or a waiter times out"""
+
+
+class ConcurrencyGate:
+    """
+    Counting semaphore with a bounded FIFO wait queue.
+    Waiters take consecutive tickets and are admitted strictly in ticket
+    order. A waiter that times out marks its ticket abandoned so the queue
+    skips over it.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = BACKEND_MAX_CONCURRENCY,
+        max_queue: int = BACKEND_MAX_QUEUE,
+        timeout: float = BACKEND_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._next_ticket = 0
+        self._next_admit = 0
+        self._abandoned = set()
+        self._cond = threading.Condition()
+
+    def _skip_abandoned(self):
+        while self._next_admit in self._abandoned:
+            self._abandoned.remove(self._next_admit)
+            self._next_admit += 1
+
+    def acquire(self, on_wait: Optional[Callable[[int], None]] = None):
+        """
+        Take a slot, waiting in line if all are busy. on_wait(position) is
+        called from this thread whenever the caller's place in line changes
+        (1 = next to be admitted).
+        Raises QueueFullError if the queue is full or the wait times out.
+        """
+        with self._cond:
+            if self.waiting == 0 and self.active < self.max_concurrent:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise QueueFullError("The simulation server is at capacity. Please try again shortly.")
+
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self.waiting += 1
+            deadline = time.monotonic() + self.timeout
+            last_position = None
+            try:
+                while not (ticket == self._next_admit and self.active < self.max_concurrent):
+                    position = ticket - self._next_admit + 1
+                    if on_wait is not None and position != last_position:
+                        last_position = position
+                        # Report without holding the lock (the callback may redraw the UI)
+                        self._cond.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._cond.acquire()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise QueueFullError("Timed out waiting for the simulation server. Please try again.")
+                    self._cond.wait(remaining)
+
+                self._next_admit += 1
+                self._skip_abandoned()
+                self.active += 1
+            except BaseException:
+                # Timed out, or interrupted (e.g. a Streamlit rerun): give up the place in line
+                self._abandoned.add(ticket)
+                self._skip_abandoned()
+                self._cond.notify_all()
+                raise
+            finally:
+                self.waiting -= 1
+            # The next in line may also fit if several slots are free
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_gate: Optional[ConcurrencyGate] = None
+_singleton_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _singleton_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def get_backend_gate() -> ConcurrencyGate:
+    """Return the process-wide gate in front of /simulate, creating it on first use"""
+    global _gate
+    if _gate is None:
+        with _singleton_lock:
+            if _gate is None:
+                _gate = ConcurrencyGate()
+    return _gate
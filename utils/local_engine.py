@@ -0,0 +1,290 @@
+"""
+In-process Monte Carlo engine for the simulated-strategy case.
+
+All iterations advance together one trading day at a time as NumPy arrays:
+each day's P&L is drawn for every live iteration at once from a precomputed
+alias table of daily outcomes, so the cost is O(days) vectorized steps rather than a Python
+loop per trade. Drawdown is checked at end of day.
+"""
+import logging
+import math
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import plotly.graph_objects as go
+from config.accounts import ACCOUNT_RULES
+from config.settings import LOCAL_TICK_SIZE
+
+logger = logging.getLogger(__name__)
+
+END_STATES = ("Busted", "TimeOut", "MaxPayouts")
+BUSTED, TIMEOUT, MAX_PAYOUTS = range(len(END_STATES))
+
+HISTOGRAM_MAX_BINS = 100
+
+
+class LocalEngineError(ValueError):
+    """Raised when a config cannot be simulated locally"""
+
+
+def supports(config: Dict[str, Any], csv_file: Optional[bytes] = None) -> bool:
+    """The local engine only handles simulated strategies on known accounts"""
+    return (
+        csv_file is None
+        and config.get("account_type") in ACCOUNT_RULES
+        and all(key in config for key in ("avg_trades_per_day", "stop_loss", "take_profit", "win_percentage"))
+    )
+
+
+def _poisson_pmf(lam: float) -> np.ndarray:
+    """Poisson probabilities for k = 0..K, truncated where the tail is negligible"""
+    if lam <= 0:
+        return np.ones(1)
+    k = np.arange(int(lam + 12 * math.sqrt(lam) + 12) + 1)
+    log_pmf = k * math.log(lam) - lam - np.array([math.lgamma(x + 1) for x in k])
+    return np.exp(log_pmf)
+
+
+def _alias_table(probabilities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Walker/Vose alias table for O(1) sampling from a discrete distribution"""
+    n = probabilities.size
+    scaled = probabilities * n / probabilities.sum()
+    accept = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        accept[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return accept, alias
+
+
+class DailyPnl:
+    """
+    Distribution of one day's P&L for a strategy config.
+    With Poisson trade counts, wins and losses are independent Poisson
+    variables (rate * p and rate * (1 - p)), so a day's outcome is fully
+    described by the joint (wins, losses) table. Sampling a day for every
+    live iteration is then one uniform draw per iteration plus an alias
+    table lookup.
+    """
+
+    MIN_PROBABILITY = 1e-15
+    GUIDE_SIZE = 1 << 16
+
+    def __init__(self, config: Dict[str, Any]):
+        tick_value = float(config["multiplier"]) * LOCAL_TICK_SIZE
+        cost = float(config["round_trip_cost"])
+        win_pnl = float(config["take_profit"]) * tick_value - cost
+        loss_pnl = -float(config["stop_loss"]) * tick_value - cost
+        win_probability = float(config["win_percentage"]) / 100.0
+        avg_trades = float(config["avg_trades_per_day"])
+
+        win_pmf = _poisson_pmf(avg_trades * win_probability)
+        loss_pmf = _poisson_pmf(avg_trades * (1.0 - win_probability))
+
+        probabilities = np.outer(win_pmf, loss_pmf).ravel()
+        values = np.add.outer(np.arange(win_pmf.size) * win_pnl, np.arange(loss_pmf.size) * loss_pnl).ravel()
+
+        keep = probabilities >= self.MIN_PROBABILITY
+        self.values = values[keep]
+        self.accept, self.alias = _alias_table(probabilities[keep])
+
+        # Inverse CDF over the sorted outcomes, for draws that must move
+        # monotonically with their uniform (see quantile)
+        order = np.argsort(self.values, kind="stable")
+        self.sorted_values = self.values[order]
+        self.cdf = np.cumsum(probabilities[keep][order])
+        self.cdf /= self.cdf[-1]
+        # Guide table: the outcome at each of GUIDE_SIZE evenly spaced
+        # uniforms, so most lookups need no search
+        self.guide = np.searchsorted(self.cdf, np.arange(self.GUIDE_SIZE + 1) / self.GUIDE_SIZE, side="right")
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Draw `size` daily P&L values"""
+        scaled = rng.random(size) * self.values.size
+        index = scaled.astype(np.intp)
+        np.minimum(index, self.values.size - 1, out=index)
+        chosen = np.where(scaled - index < self.accept[index], index, self.alias[index])
+        return self.values[chosen]
+
+    def quantile(self, uniforms: np.ndarray) -> np.ndarray:
+        """
+        Daily P&L at the given uniforms through the inverse CDF. Slower than
+        sample, but the same uniform maps to the same rank of outcome under
+        any config, which keeps paired runs of two configs in step.
+        """
+        bucket = (uniforms * self.GUIDE_SIZE).astype(np.intp)
+        index = self.guide[bucket]
+        # Only buckets that straddle a step of the CDF need the search
+        straddle = index != self.guide[bucket + 1]
+        if straddle.any():
+            index[straddle] = np.searchsorted(self.cdf, uniforms[straddle], side="right")
+        np.minimum(index, self.sorted_values.size - 1, out=index)
+        return self.sorted_values[index]
+
+
+def simulate_paths(
+    config: Dict[str, Any],
+    common_random_numbers: bool = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simulate every iteration of a strategy config.
+    Returns (final_balance, days, end_state) arrays, one entry per iteration.
+    final_balance is trading P&L relative to the starting balance, payouts included.
+
+    With common_random_numbers, iteration i draws the same uniform on day d
+    under any config with the same seed, whichever iterations have already
+    finished, and maps it through DailyPnl.quantile. Two configs run this
+    way differ path by path only through the change between them.
+    """
+    if not supports(config):
+        raise LocalEngineError(f"Config cannot be simulated locally: {config.get('account_type')}")
+
+    rules = ACCOUNT_RULES[config["account_type"]]
+    iterations = int(config["iterations"])
+    max_days = int(config["max_simulation_days"])
+    max_payouts = int(config.get("max_payouts", 12))
+
+    drawdown = float(rules["drawdown"])
+    lock_level = float(rules["drawdown_lock"])
+    payout_threshold = float(rules["payout_threshold"])
+    payout_fraction = float(rules["payout_fraction"])
+    payout_cap = float(rules["payout_cap"])
+
+    daily_pnl = DailyPnl(config)
+    rng = np.random.default_rng(config.get("seed"))
+
+    final_balance = np.zeros(iterations)
+    days = np.full(iterations, max_days, dtype=np.int32)
+    end_state = np.full(iterations, TIMEOUT, dtype=np.int8)
+
+    # State of the live iterations only; finished ones are compacted away.
+    # Balances are tracked relative to the starting balance.
+    live = np.arange(iterations)
+    balance = np.zeros(iterations)
+    withdrawn = np.zeros(iterations)
+    threshold = np.full(iterations, -drawdown)
+    payouts = np.zeros(iterations, dtype=np.int32)
+
+    for day in range(1, max_days + 1):
+        if live.size == 0:
+            break
+
+        if common_random_numbers:
+            balance += daily_pnl.quantile(rng.random(iterations)[live])
+        else:
+            balance += daily_pnl.sample(rng, live.size)
+
+        busted = balance <= threshold
+
+        # Trail the drawdown behind the end-of-day high, up to the lock level
+        np.maximum(threshold, np.minimum(balance - drawdown, lock_level), out=threshold)
+
+        eligible = ~busted & (balance >= payout_threshold)
+        if eligible.any():
+            amount = np.minimum(balance[eligible] * payout_fraction, payout_cap)
+            balance[eligible] -= amount
+            withdrawn[eligible] += amount
+            payouts[eligible] += 1
+
+        finished = busted | (payouts >= max_payouts)
+        if finished.any():
+            ids = live[finished]
+            final_balance[ids] = balance[finished] + withdrawn[finished]
+            days[ids] = day
+            end_state[ids] = np.where(busted[finished], BUSTED, MAX_PAYOUTS)
+
+            keep = ~finished
+            live, balance, withdrawn = live[keep], balance[keep], withdrawn[keep]
+            threshold, payouts = threshold[keep], payouts[keep]
+
+    # Iterations still live after max_days keep the TIMEOUT state
+    final_balance[live] = balance + withdrawn
+    return final_balance, days, end_state
+
+
+def histogram_bins(values: np.ndarray) -> Dict[str, list]:
+    """Equal-width bin edges and counts of the values"""
+    counts, edges = np.histogram(values, bins=min(HISTOGRAM_MAX_BINS, max(1, int(np.sqrt(values.size)))))
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def balance_quantiles(values: np.ndarray, points: int = 101) -> Dict[str, list]:
+    """Evenly spaced quantiles of the values"""
+    probabilities = np.linspace(0.0, 1.0, points)
+    return {"probabilities": probabilities.tolist(), "values": np.quantile(values, probabilities).tolist()}
+
+
+def _histogram_json(values: np.ndarray) -> str:
+    """Plotly bar chart of pre-binned values (much smaller than raw samples)"""
+    bins = histogram_bins(values)
+    edges = np.asarray(bins["edges"])
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(go.Bar(x=centers.tolist(), y=bins["counts"], width=float(edges[1] - edges[0])))
+    fig.update_layout(xaxis_title="Final Balance", yaxis_title="Count", bargap=0)
+    return fig.to_json()
+
+
+def summarize(
+    final_balance: np.ndarray,
+    days: np.ndarray,
+    end_state: np.ndarray,
+    condition_end_state: str = "All",
+    histogram: bool = True,
+    histogram_format: str = "plotly"
+) -> Dict[str, Any]:
+    """Build the result schema consumed by components.results.display_results"""
+    counts = np.bincount(end_state, minlength=len(END_STATES))
+    end_state_percentages = {
+        name: 100.0 * float(counts[code]) / end_state.size for code, name in enumerate(END_STATES)
+    }
+
+    # Balance statistics are conditioned on the selected end state
+    if condition_end_state in END_STATES:
+        mask = end_state == END_STATES.index(condition_end_state)
+        final_balance, days = final_balance[mask], days[mask]
+    if final_balance.size == 0:
+        final_balance = np.zeros(1)
+        days = np.zeros(1)
+
+    mean = float(final_balance.mean())
+    median = float(np.median(final_balance))
+    q1, q3 = np.percentile(final_balance, [25, 75])
+
+    results = {
+        "mean_balance": mean,
+        "median_balance": median,
+        "std_dev": float(final_balance.std()),
+        "positive_balance_percentage": 100.0 * float((final_balance > 0).mean()),
+        "mean_days": float(days.mean()),
+        "mad": float(np.abs(final_balance - mean).mean()),
+        "iqr": float(q3 - q1),
+        "mad_median": float(np.median(np.abs(final_balance - median))),
+        "end_state_percentages": end_state_percentages,
+    }
+    if histogram:
+        if histogram_format == "bins":
+            results["histogram_bins"] = histogram_bins(final_balance)
+        elif histogram_format == "quantiles":
+            results["balance_quantiles"] = balance_quantiles(final_balance)
+        else:
+            results["histogram_plotly_json"] = _histogram_json(final_balance)
+    return results
+
+
+def simulate_strategy(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a simulated-strategy config locally and return backend-shaped results"""
+    final_balance, days, end_state = simulate_paths(config)
+    results = summarize(
+        final_balance,
+        days,
+        end_state,
+        condition_end_state=config.get("condition_end_state", "All"),
+        histogram=bool(config.get("histogram", True)),
+        histogram_format=config.get("histogram_format", "plotly"),
+    )
+    results["engine"] = "local"
+    return results
@@ -0,0 +1,231 @@
+"""
+Per-stage latency histograms, counters and sampled structured logs.
+
+Code wraps each stage of a simulation in `timed(stage)`. The duration goes
+into the process-wide registry, which backs the Prometheus/JSON metrics
+endpoint. It also goes into the StageTimings of the current run, if one is
+open via `collect_timings()`; that feeds the "Timings" expander.
+"""
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.settings import METRICS_HOST, METRICS_PORT, LOG_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket catches the read timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus sum and count, as Prometheus expects"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe stage-duration histograms and event counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1.0, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-dict copy of all metrics (the JSON endpoint's body)"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "sum_seconds": round(h.sum, 6),
+                    "buckets": {str(bound): count for bound, count in zip(h.buckets, h.counts)},
+                }
+                for stage, h in self._histograms.items()
+            }
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {"stage_duration_seconds": stages, "counters": counters}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            "# HELP propsim_stage_duration_seconds Duration of each simulation stage",
+            "# TYPE propsim_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f'propsim_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'propsim_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'propsim_stage_duration_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'propsim_stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE propsim_{name} counter")
+                    typed.add(name)
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"propsim_{name}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    return _registry
+
+
+class StageTimings:
+    """Durations of the stages of one simulation, in the order they ran"""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages.append((stage, seconds))
+
+    def copy(self) -> "StageTimings":
+        copied = StageTimings()
+        with self._lock:
+            copied.stages = list(self.stages)
+        return copied
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage; stages that ran more than once are summed"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for stage, seconds in self.stages:
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+
+_current_timings: contextvars.ContextVar[Optional[StageTimings]] = contextvars.ContextVar(
+    "propsim_stage_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings(timings: Optional[StageTimings] = None) -> Iterator[StageTimings]:
+    """Collect the stages timed on this thread while the block runs (into `timings` if given)"""
+    timings = timings if timings is not None else StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float):
+    """Record a duration measured elsewhere (e.g. response.elapsed)"""
+    _registry.observe(stage, seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the block as `stage`, whether it returns or raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def log_event(log: logging.Logger, event: str, level: int = logging.INFO, sampled: bool = True, **fields: Any):
+    """
+    Emit one JSON log record. Sampled records are kept with probability
+    LOG_SAMPLE_RATE so hot paths stay cheap; pass sampled=False for errors.
+    """
+    if sampled and random.random() >= LOG_SAMPLE_RATE:
+        return
+    if not log.isEnabledFor(level):
+        return
+    log.log(level, json.dumps({"event": event, **fields}, default=str, separators=(",", ":")))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = _registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = json.dumps(_registry.snapshot()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a daemon thread.
+    Safe to call on every Streamlit rerun; only the first call starts it.
+    Port 0 leaves the endpoint disabled.
+    """
+    global _server
+    if not port:
+        return None
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                try:
+                    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+                except OSError as e:
+                    logger.error(f"Metrics endpoint could not bind {host}:{port}: {str(e)}")
+                    return None
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+                _server = server
+    return _server
@@ -0,0 +1,242 @@
+"""
+Successive-halving search over strategy parameters.
+
+Every candidate is first simulated with a small iteration budget. After
+each rung only the best 1/eta candidates by the objective continue, with
+eta times the iterations of the rung before, until the survivors reach
+the full budget. Candidates keep their earlier iterations: each rung runs
+only the difference and merges it with ResultAccumulator. All candidates
+of a rung share one seed, which makes a search reproducible, but neither
+the backend nor the local engine's default sampling turns a shared seed
+into shared paths across different parameters (only the paired what-if
+uses common random numbers). Candidates are therefore ranked on
+independent samples, and close calls at the early, small rungs are noisy.
+Each rung runs concurrently through run_sweep.
+"""
+import math
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from config.settings import OPTIMIZER_MIN_ITERATIONS, SWEEP_MAX_CONCURRENCY, SIMULATION_ENGINE
+from utils.api import engine_label
+from utils.history import record_run
+from utils.stats import ResultAccumulator
+from utils.sweep import SUMMARY_METRICS, SWEEP_PARAMETERS, run_sweep, summarize_point
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from utils.jobs import Job
+
+SEED_MODULUS = 2**32
+
+OBJECTIVES = {
+    "max_payouts_rate": "P(MaxPayouts) (%)",
+    "mean_balance": "Mean Balance",
+    "constrained_balance": "Mean Balance, Bust Rate Capped",
+}
+
+
+def objective_value(objective: str, results: Dict[str, Any], max_bust_rate: float = 100.0) -> float:
+    """
+    Score of a result, higher is better. For "constrained_balance", points
+    busting more than max_bust_rate percent of the time score -inf.
+    """
+    end_states = results.get("end_state_percentages", {})
+    if objective == "max_payouts_rate":
+        return end_states.get("MaxPayouts", 0.0)
+    if objective == "mean_balance":
+        return results["mean_balance"]
+    if objective == "constrained_balance":
+        return results["mean_balance"] if end_states.get("Busted", 0.0) <= max_bust_rate else -math.inf
+    raise ValueError(f"Unknown objective: {objective}")
+
+
+def rung_budgets(max_iterations: int, min_iterations: int, eta: int) -> List[int]:
+    """Cumulative iterations per candidate at each rung: min, min*eta, ..., max"""
+    budgets = []
+    budget = min(min_iterations, max_iterations)
+    while budget < max_iterations:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_iterations)
+    return budgets
+
+
+def candidate_runs(points: int, max_iterations: int, min_iterations: int, eta: int) -> int:
+    """
+    Most candidate simulations successive_halving makes for `points` configs:
+    the candidates alive at each rung, summed over the rungs.
+    """
+    eta = max(2, eta)
+    alive, runs = points, 0
+    for _ in rung_budgets(max_iterations, min_iterations, eta):
+        runs += alive
+        if alive <= 1:
+            break
+        alive = max(1, math.ceil(alive / eta))
+    return runs
+
+
+@dataclass
+class Candidate:
+    """One grid point and everything simulated for it so far"""
+    index: int
+    config: Dict[str, Any]
+    accumulator: ResultAccumulator
+    score: float = -math.inf
+    rung: int = -1
+    error: Optional[str] = None
+
+    @property
+    def iterations(self) -> int:
+        return self.accumulator.iterations
+
+    def results(self) -> Dict[str, Any]:
+        return self.accumulator.snapshot()
+
+
+@dataclass
+class RungReport:
+    """State after a completed rung; candidates are ranked best first"""
+    rung: int
+    rungs: int
+    budget: int
+    survivors: int
+    iterations_spent: int
+    candidates: List[Candidate] = field(default_factory=list)
+
+
+def _rank(candidates: List[Candidate]) -> List[Candidate]:
+    """
+    Best first: furthest rung reached, then score, then (for equal or
+    -inf scores) lower bust rate. Failed candidates come last.
+    """
+    def key(candidate: Candidate):
+        if candidate.error is not None or candidate.rung < 0:
+            return (-1, -math.inf, -math.inf)
+        bust = candidate.results()["end_state_percentages"].get("Busted", 0.0)
+        return (candidate.rung, candidate.score, -bust)
+    return sorted(candidates, key=key, reverse=True)
+
+
+def successive_halving(
+    configs: List[Dict[str, Any]],
+    objective: str,
+    max_iterations: int,
+    min_iterations: int = OPTIMIZER_MIN_ITERATIONS,
+    eta: int = 3,
+    max_bust_rate: float = 100.0,
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    engine: str = SIMULATION_ENGINE,
+    max_workers: int = SWEEP_MAX_CONCURRENCY,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[RungReport]:
+    """
+    Rank configs by objective with successive halving and yield a report
+    after each rung. cancel_event stops the search after the rung in flight.
+    """
+    if not configs:
+        return
+    eta = max(2, eta)
+    cancel_event = cancel_event or threading.Event()
+    candidates = [
+        Candidate(i, config, ResultAccumulator(config.get("condition_end_state", "All")))
+        for i, config in enumerate(configs)
+    ]
+    base_seed = configs[0].get("seed") or random.randrange(1, SEED_MODULUS)
+    budgets = rung_budgets(max_iterations, min_iterations, eta)
+    alive = candidates
+    spent = 0
+
+    for rung, budget in enumerate(budgets):
+        if len(alive) == 1:
+            # Nothing left to compare; take the winner straight to the full budget
+            budget = budgets[-1]
+        seed = (base_seed + rung) % SEED_MODULUS or 1
+        batch = [dict(c.config, iterations=budget - c.iterations, seed=seed) for c in alive]
+
+        # run_sweep sets the event it is given when it finishes, so the
+        # caller's cancel_event is only read
+        stop = threading.Event()
+        for point in run_sweep(batch, csv_file, max_workers, stop, engine, trades):
+            if cancel_event.is_set():
+                stop.set()
+            candidate = alive[point.index]
+            if point.results is None:
+                candidate.error = point.error
+                continue
+            spent += point.config["iterations"]
+            candidate.accumulator.add(point.results, point.config["iterations"])
+            candidate.score = objective_value(objective, candidate.results(), max_bust_rate)
+            candidate.rung = rung
+
+        done = budget == budgets[-1] or cancel_event.is_set()
+        if not done:
+            ranked = [c for c in _rank(alive) if c.error is None]
+            alive = ranked[:max(1, math.ceil(len(alive) / eta))]
+        yield RungReport(rung, len(budgets), budget, len(alive), spent, _rank(candidates))
+        if done:
+            return
+
+
+def leaderboard_rows(candidates: List[Candidate]) -> List[Dict[str, Any]]:
+    """Table rows of ranked candidates: rank, swept inputs, iterations, score, metrics and engine"""
+    rows = []
+    for rank, candidate in enumerate(candidates, start=1):
+        row = {"rank": rank, "point": candidate.index}
+        row.update({key: candidate.config[key] for key in SWEEP_PARAMETERS})
+        row["iterations"] = candidate.iterations
+        scored = candidate.error is None and candidate.rung >= 0
+        row["objective"] = candidate.score if scored and math.isfinite(candidate.score) else None
+        if scored:
+            row.update(summarize_point(candidate.results()))
+            row["engine"] = engine_label(candidate.results())
+        else:
+            row.update(dict.fromkeys(SUMMARY_METRICS + ("engine",)))
+        rows.append(row)
+    return rows
+
+
+def halving_search_task(
+    configs: List[Dict[str, Any]],
+    objective: str,
+    max_iterations: int,
+    eta: int = 3,
+    max_bust_rate: float = 100.0,
+    max_workers: int = SWEEP_MAX_CONCURRENCY
+) -> Callable[["Job"], None]:
+    """
+    Job task (see JobQueue.submit) running successive_halving on
+    job.engine. After each rung job.result is {"rows": leaderboard_rows(),
+    "objective", "spent": iterations so far, "full_grid": iterations a full
+    sweep would take}; a stopped search keeps the ranking of its last rung.
+    Each scored candidate is recorded in the run history once the search
+    ends, with all the iterations it received.
+    """
+    def task(job: "Job"):
+        job.progress_text = "Screening candidates..."
+        report = None
+        for report in successive_halving(
+            configs, objective, max_iterations,
+            eta=eta,
+            max_bust_rate=max_bust_rate,
+            engine=job.engine,
+            max_workers=max_workers,
+            cancel_event=job.cancel_event,
+        ):
+            job.result = {
+                "rows": leaderboard_rows(report.candidates),
+                "objective": objective,
+                "spent": report.iterations_spent,
+                "full_grid": len(configs) * max_iterations,
+            }
+            job.progress = (report.rung + 1) / report.rungs
+            job.progress_text = (f"Rung {report.rung + 1} / {report.rungs} done at {report.budget:,} iterations; "
+                                 f"{report.survivors} candidates continue")
+        for candidate in report.candidates if report else []:
+            if candidate.error is None and candidate.rung >= 0:
+                record_run(dict(candidate.config, iterations=candidate.iterations), candidate.results(),
+                           client=job.client)
+    return task
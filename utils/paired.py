@@ -0,0 +1,160 @@
+"""
+Paired what-if comparison with common random numbers.
+
+The baseline and the variant config are simulated by the local engine
+from one seed, with common_random_numbers so that each iteration follows
+the same market path under both. A change of round-trip cost, multiplier
+or account rules then moves each path rather than redrawing it. The
+per-iteration differences vary far less than two independent runs do,
+so their mean is pinned down with a fraction of the iterations.
+
+Balance statistics are conditioned on condition_end_state, as in
+local_engine.summarize, so each side averages over its own subset of the
+paths. Their differences are compared through the delta method: each
+iteration's contribution to the two conditional means is paired instead
+of the raw values.
+"""
+import math
+import random
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+import numpy as np
+from utils import local_engine
+from utils.history import record_run
+from utils.stats import CONFIDENCE_Z
+
+if TYPE_CHECKING:
+    from utils.jobs import Job
+
+# Statistics that, like local_engine.summarize, only cover the iterations
+# ending in condition_end_state; end-state percentages cover all of them
+CONDITIONED = ("Mean Balance", "Positive Balance (%)", "Mean Days")
+
+
+def _influence(values: np.ndarray, kept: Optional[np.ndarray]):
+    """
+    Mean of values over the kept iterations and each iteration's
+    contribution to its error (the linearized ratio estimator), or
+    (0.0, None) when no iteration is kept, as summarize reports it.
+    """
+    if kept is None:
+        mean = float(values.mean())
+        return mean, values - mean
+    share = float(kept.mean())
+    if share == 0:
+        return 0.0, None
+    mean = float(values[kept].mean())
+    return mean, np.where(kept, values - mean, 0.0) / share
+
+
+def paired_difference(
+    baseline: np.ndarray,
+    variant: np.ndarray,
+    baseline_kept: Optional[np.ndarray] = None,
+    variant_kept: Optional[np.ndarray] = None
+) -> Dict[str, float]:
+    """
+    Mean of variant - baseline over paired iterations, with its 95%
+    half-width, and the half-width two independent runs of the same size
+    would have had. With masks, each side's mean covers only its kept
+    iterations; the half-widths are infinite if a side keeps none.
+    """
+    n = baseline.size
+    baseline_mean, baseline_error = _influence(baseline, baseline_kept)
+    variant_mean, variant_error = _influence(variant, variant_kept)
+    if n > 1 and baseline_error is not None and variant_error is not None:
+        paired = CONFIDENCE_Z * float((variant_error - baseline_error).std(ddof=1)) / math.sqrt(n)
+        unpaired = CONFIDENCE_Z * math.sqrt((float(baseline_error.var(ddof=1)) + float(variant_error.var(ddof=1))) / n)
+    else:
+        paired = unpaired = math.inf
+    return {
+        "baseline": baseline_mean,
+        "variant": variant_mean,
+        "difference": variant_mean - baseline_mean,
+        "halfwidth": paired,
+        "unpaired_halfwidth": unpaired,
+    }
+
+
+def _per_iteration(final_balance: np.ndarray, days: np.ndarray, end_state: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-iteration values whose means are the compared statistics, keyed by table label"""
+    values = {
+        "Mean Balance": final_balance,
+        "Positive Balance (%)": 100.0 * (final_balance > 0),
+        "Mean Days": days.astype(float),
+    }
+    for code, state in enumerate(local_engine.END_STATES):
+        values[f"{state} (%)"] = 100.0 * (end_state == code)
+    return values
+
+
+def run_paired(baseline_config: Dict[str, Any], variant_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Simulate both configs on common random numbers and compare them.
+    The baseline's seed and condition_end_state are used for both, or a
+    random seed if it has none.
+    Returns each side's results (display_results schema), the paired
+    differences by statistic, and how many iterations per run two
+    independent runs would need for the same precision on the mean balance.
+    Raises local_engine.LocalEngineError for configs the local engine
+    cannot simulate.
+    """
+    seed = baseline_config.get("seed") or random.randrange(1, 2**32)
+    condition = baseline_config.get("condition_end_state", "All")
+    runs = {}
+    for side, config in (("baseline", baseline_config), ("variant", variant_config)):
+        config = dict(config, seed=seed)
+        paths = local_engine.simulate_paths(config, common_random_numbers=True)
+        results = local_engine.summarize(
+            *paths,
+            condition_end_state=condition,
+            histogram=bool(config.get("histogram", True)),
+            histogram_format="bins",
+        )
+        results["engine"] = "local"
+        kept = None
+        if condition in local_engine.END_STATES:
+            kept = paths[2] == local_engine.END_STATES.index(condition)
+        runs[side] = {"results": results, "values": _per_iteration(*paths), "kept": kept}
+
+    baseline, variant = runs["baseline"], runs["variant"]
+    differences = {
+        label: paired_difference(
+            baseline["values"][label],
+            variant["values"][label],
+            *((baseline["kept"], variant["kept"]) if label in CONDITIONED else ()),
+        )
+        for label in baseline["values"]
+    }
+    balance = differences["Mean Balance"]
+    iterations = int(baseline_config["iterations"])
+    if balance["halfwidth"] > 0:
+        equivalent = iterations * (balance["unpaired_halfwidth"] / balance["halfwidth"]) ** 2
+    else:
+        equivalent = math.inf
+    return {
+        "seed": seed,
+        "iterations": iterations,
+        "condition_end_state": condition,
+        "baseline": baseline["results"],
+        "variant": variant["results"],
+        "differences": differences,
+        "unpaired_iterations": equivalent,
+    }
+
+
+def paired_task(baseline_config: Dict[str, Any], variant_config: Dict[str, Any]) -> Callable[["Job"], None]:
+    """
+    Job task (see JobQueue.submit) setting job.result to run_paired() and
+    recording both runs in the history. A job stopped while it runs
+    discards the comparison.
+    """
+    def task(job: "Job"):
+        job.progress_text = "Simulating the baseline and the variant on the same random paths..."
+        comparison = run_paired(baseline_config, variant_config)
+        if job.cancel_event.is_set():
+            return
+        job.result = comparison
+        job.progress = 1.0
+        for side, config in (("baseline", baseline_config), ("variant", variant_config)):
+            record_run(dict(config, seed=comparison["seed"]), comparison[side], client=job.client)
+    return task
@@ -0,0 +1,137 @@
+import random
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from config.settings import (
+    ADAPTIVE_BATCH_ITERATIONS,
+    ADAPTIVE_MIN_ITERATIONS,
+    HISTOGRAM_FORMAT,
+    PROGRESSIVE_BATCH_ITERATIONS,
+    PROGRESSIVE_CONCURRENCY,
+    PROGRESSIVE_FIRST_BATCH,
+    SIMULATION_ENGINE,
+)
+from utils.api import SimulationError
+from utils.sweep import run_sweep
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SEED_MODULUS = 2**32
+
+
+def plan_batches(
+    iterations: int,
+    first_batch: int = PROGRESSIVE_FIRST_BATCH,
+    batch_iterations: int = PROGRESSIVE_BATCH_ITERATIONS
+) -> List[int]:
+    """
+    Split a run into batch sizes summing exactly to `iterations`.
+    A small first batch gives an early estimate; the rest are full size.
+    """
+    batches = [min(first_batch, iterations)]
+    remaining = iterations - batches[0]
+    while remaining > 0:
+        batches.append(min(batch_iterations, remaining))
+        remaining -= batches[-1]
+    return batches
+
+
+def batch_configs(config: Dict[str, Any], batches: List[int]) -> List[Dict[str, Any]]:
+    """
+    One config per batch with distinct seeds. A seeded config gets
+    reproducible batch seeds (seed, seed + 1, ...).
+    """
+    base_seed = config.get("seed") or random.randrange(1, SEED_MODULUS)
+    configs = []
+    for i, iterations in enumerate(batches):
+        batch = dict(config, iterations=iterations, seed=(base_seed + i) % SEED_MODULUS or 1)
+        if batch.get("histogram") and HISTOGRAM_FORMAT != "plotly":
+            # Bins merge across batches; quantile lists do not
+            batch["histogram_format"] = "bins"
+        configs.append(batch)
+    return configs
+
+
+def is_converged(
+    snapshot: Dict[str, Any],
+    balance_tolerance: float,
+    end_state_tolerance: float,
+    min_iterations: int = ADAPTIVE_MIN_ITERATIONS
+) -> bool:
+    """
+    True once the mean balance is known to within ±balance_tolerance and
+    every end-state percentage to within ±end_state_tolerance points
+    (95% confidence), after at least min_iterations iterations
+    """
+    precision = snapshot["precision"]
+    return (
+        snapshot["iterations_completed"] >= min_iterations
+        and precision["mean_balance"] <= balance_tolerance
+        and all(width <= end_state_tolerance for width in precision["end_state_percentages"].values())
+    )
+
+
+def run_progressive(
+    config: Dict[str, Any],
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    engine: str = SIMULATION_ENGINE,
+    cancel_event: Optional[threading.Event] = None,
+    batches: Optional[List[int]] = None,
+    converged: Optional[Callable[[Dict[str, Any]], bool]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run config["iterations"] as batches and yield the merged estimate after
+    each completed batch. Total work equals a single full run.
+    cancel_event (set by the caller) or converged(snapshot) returning True
+    stops new batches; batches already in flight are still merged.
+    Raises SimulationError if any batch fails.
+    """
+    from utils.stats import ResultAccumulator
+
+    accumulator = ResultAccumulator(config.get("condition_end_state", "All"))
+    configs = batch_configs(config, batches or plan_batches(int(config["iterations"])))
+    # Separate from cancel_event, which run_sweep sets when it finishes
+    stop = threading.Event()
+
+    for point in run_sweep(
+        configs,
+        csv_file,
+        max_workers=PROGRESSIVE_CONCURRENCY,
+        cancel_event=stop,
+        engine=engine,
+        trades=trades,
+    ):
+        if point.error is not None:
+            raise SimulationError(point.error)
+        accumulator.add(point.results, point.config["iterations"])
+        snapshot = accumulator.snapshot()
+        if (cancel_event is not None and cancel_event.is_set()) or (converged is not None and converged(snapshot)):
+            stop.set()
+        yield snapshot
+
+
+def run_adaptive(
+    config: Dict[str, Any],
+    balance_tolerance: float,
+    end_state_tolerance: float,
+    csv_file: Optional[bytes] = None,
+    trades: Optional["pd.DataFrame"] = None,
+    engine: str = SIMULATION_ENGINE,
+    cancel_event: Optional[threading.Event] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run batches until the estimate is within the tolerances (see
+    is_converged) or config["iterations"], the cap, is reached. Yields
+    the merged estimate after each batch, like run_progressive.
+    """
+    cap = int(config["iterations"])
+    return run_progressive(
+        config,
+        csv_file,
+        trades,
+        engine,
+        cancel_event,
+        batches=plan_batches(cap, batch_iterations=ADAPTIVE_BATCH_ITERATIONS),
+        converged=lambda snapshot: is_converged(snapshot, balance_tolerance, end_state_tolerance),
+    )
@@ -1,52 +1,160 @@
 import streamlit as st
-import pandas as pd
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Tuple, Optional
 import hashlib
+import math
 import time
 import random
 import string
+import uuid
+from config.settings import TRUSTED_PROXIES
+from utils.limiter import get_rate_limiter
+from utils.metrics import get_registry
+
+# pandas is imported by the CSV functions on first use, so sessions that
+# never upload a file do not wait for it
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Constants
 MAX_CSV_SIZE_MB = 10
 MAX_ROWS = 10000
 REQUIRED_COLUMNS = ["DateTime", "Return", "Max Opposite Excursion"]
+NUMERIC_COLUMNS = ["Return", "Max Opposite Excursion"]
+MAX_ABS_VALUE = 1000
+CSV_CHUNK_ROWS = 50000
 CHALLENGE_TIMEOUT = 300  # 5 minutes
 
 
-def validate_csv_file(file) -> Tuple[bool, Optional[str], Optional[pd.DataFrame]]:
+def _infer_datetime_format(values: "pd.Series") -> str:
+    """Guess the DateTime format once from the first non-empty value"""
+    from pandas.tseries.api import guess_datetime_format
+
+    first = values.dropna()
+    if not first.empty:
+        datetime_format = guess_datetime_format(str(first.iloc[0]).strip())
+        if datetime_format is not None:
+            return datetime_format
+    # Unrecognized layouts fall back to pandas' per-element parser
+    return "mixed"
+
+
+def _locate_invalid_number(file, raw_columns, first_row: int, error: Exception) -> str:
+    """
+    Find the first non-numeric value in the chunk starting at data row
+    first_row. Only runs on the failure path, so it can afford string parsing.
+    """
+    import pandas as pd
+
+    file.seek(0)
+    chunk = pd.read_csv(
+        file,
+        usecols=[raw_columns[col] for col in NUMERIC_COLUMNS],
+        dtype=str,
+        skiprows=range(1, first_row),
+        nrows=CSV_CHUNK_ROWS,
+        engine="c",
+    )
+    chunk.columns = chunk.columns.str.strip()
+    for col in NUMERIC_COLUMNS:
+        bad = pd.to_numeric(chunk[col], errors="coerce").isna() & chunk[col].notna()
+        if bad.any():
+            position = int(bad.to_numpy().argmax())
+            return f"Invalid number '{chunk[col].iloc[position]}' in column '{col}' on row {first_row + position}"
+    return f"Invalid data types in CSV: {str(error)}"
+
+
+def _check_chunk(chunk: "pd.DataFrame", first_row: int, datetime_format: str) -> Optional[str]:
+    """
+    Parse DateTime and range-check the numeric columns of one chunk in place.
+    Returns an error message naming the first bad row, or None.
+    """
+    import pandas as pd
+
+    raw_datetimes = chunk["DateTime"]
+    parsed = pd.to_datetime(raw_datetimes, format=datetime_format, errors="coerce")
+    bad = parsed.isna() & raw_datetimes.notna()
+    if bad.any():
+        position = int(bad.to_numpy().argmax())
+        return f"Invalid DateTime '{raw_datetimes.iloc[position]}' on row {first_row + position}"
+    chunk["DateTime"] = parsed
+
+    # Check for reasonable values
+    out_of_range = (chunk[NUMERIC_COLUMNS].abs() > MAX_ABS_VALUE).to_numpy()
+    if out_of_range.any():
+        position, col = divmod(int(out_of_range.argmax()), len(NUMERIC_COLUMNS))
+        column = NUMERIC_COLUMNS[col]
+        return (f"Values outside reasonable range: {column} = {chunk[column].iloc[position]} "
+                f"on row {first_row + position}")
+
+    return None
+
+
+def validate_csv_file(file, max_rows: int = MAX_ROWS) -> Tuple[bool, Optional[str], Optional["pd.DataFrame"]]:
     """
     Validate CSV file contents and structure
+    The file is parsed once, in chunks, with fixed column dtypes; the first
+    bad chunk stops the scan and the error names the offending row
+    (1-based, excluding the header).
     Returns: (is_valid, error_message, dataframe)
     """
+    import pandas as pd
+
     try:
         # Check file size
         file_size_mb = file.size / (1024 * 1024)
         if file_size_mb > MAX_CSV_SIZE_MB:
             return False, f"File size exceeds {MAX_CSV_SIZE_MB}MB limit", None
 
-        # Read CSV and perform validations
-        df = pd.read_csv(file)
-
-        # Strip whitespace from column names
-        df.columns = df.columns.str.strip()
+        # Read the header and map stripped column names to the raw ones
+        file.seek(0)
+        header = pd.read_csv(file, nrows=0, engine="c")
+        raw_columns = {col.strip(): col for col in header.columns}
 
         # Verify required columns
-        missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in raw_columns]
         if missing_cols:
             return False, f"Missing required columns: {', '.join(missing_cols)}", None
 
-        # Validate data types
-        try:
-            df["Return"] = pd.to_numeric(df["Return"])
-            df["Max Opposite Excursion"] = pd.to_numeric(df["Max Opposite Excursion"])
-            pd.to_datetime(df["DateTime"])
-        except Exception as e:
-            return False, f"Invalid data types in CSV: {str(e)}", None
-
-        # Check for reasonable values
-        if df["Return"].abs().max() > 1000 or df["Max Opposite Excursion"].abs().max() > 1000:
-            return False, "Values outside reasonable range", None
-
+        file.seek(0)
+        reader = pd.read_csv(
+            file,
+            usecols=[raw_columns[col] for col in REQUIRED_COLUMNS],
+            dtype={
+                raw_columns["DateTime"]: object,
+                raw_columns["Return"]: "float64",
+                raw_columns["Max Opposite Excursion"]: "float64",
+            },
+            engine="c",
+            chunksize=CSV_CHUNK_ROWS,
+        )
+
+        chunks = []
+        rows = 0
+        datetime_format = None
+        with reader:
+            while True:
+                first_row = rows + 1
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    break
+                except ValueError as e:
+                    return False, _locate_invalid_number(file, raw_columns, first_row, e), None
+
+                rows += len(chunk)
+                if rows > max_rows:
+                    return False, f"File exceeds the {max_rows:,} row limit", None
+
+                chunk.columns = chunk.columns.str.strip()
+                if datetime_format is None:
+                    datetime_format = _infer_datetime_format(chunk["DateTime"])
+
+                error = _check_chunk(chunk, first_row, datetime_format)
+                if error:
+                    return False, error, None
+                chunks.append(chunk)
+
+        df = pd.concat(chunks, ignore_index=True)[REQUIRED_COLUMNS]
         return True, None, df
 
     except pd.errors.EmptyDataError:
@@ -55,6 +163,8 @@ def validate_csv_file(file) -> Tuple[bool, Optional[str], Optional[pd.DataFrame]
         return False, "Invalid CSV format", None
     except Exception as e:
         return False, f"Error processing file: {str(e)}", None
+    finally:
+        file.seek(0)
 
 
 class ChallengeSystem:
@@ -118,30 +228,58 @@ def init_challenge_system():
     return st.session_state.challenge_system
 
 
-def check_rate_limit() -> bool:
+def get_client_id() -> str:
+    """
+    Identify the client across browser tabs: the address a trusted proxy
+    forwards (see TRUSTED_PROXIES), else the socket peer, else (no request
+    context, or a local connection) this session.
+    """
+    # Streamlit reports loopback peers (e.g. nginx on this host) as None
+    ip_address = st.context.ip_address
+    peer = ip_address if isinstance(ip_address, str) and ip_address else None
+    headers = st.context.headers or {}
+    if headers and _is_trusted_proxy(peer):
+        # nginx overwrites X-Real-IP; of X-Forwarded-For only the last
+        # entry is the proxy's own, earlier ones come from the client
+        forwarded = headers.get("X-Real-IP") or (headers.get("X-Forwarded-For") or "").split(",")[-1].strip()
+        if forwarded:
+            return forwarded
+    if peer:
+        return peer
+    if 'client_id' not in st.session_state:
+        st.session_state.client_id = f"session-{uuid.uuid4().hex}"
+    return st.session_state.client_id
+
+
+def _is_trusted_proxy(peer: Optional[str]) -> bool:
+    """Whether the socket peer (None for loopback) may name the client in headers"""
+    if peer is None:
+        return any(address in ("127.0.0.1", "::1", "localhost") for address in TRUSTED_PROXIES)
+    return peer in TRUSTED_PROXIES
+
+
+def check_rate_limit(cost: int = 1) -> bool:
     """
-    Simple rate limiting based on session state
+    Rate limiting shared by all sessions of the process: a per-client
+    token bucket (so extra tabs do not add budget) and a global one.
+    cost: runs this request counts as, e.g. the points of a sweep.
     Returns: True if allowed, False if limit exceeded
     """
-    current_time = time.time()
+    allowed, scope, retry_after = get_rate_limiter().acquire(get_client_id(), tokens=cost)
+    if not allowed:
+        get_registry().increment("rate_limited_total", scope=scope)
+        st.session_state.rate_limit_retry_after = retry_after
+    return allowed
 
-    if 'last_request_time' not in st.session_state:
-        st.session_state.last_request_time = current_time
-        st.session_state.request_count = 1
-        return True
-
-    # Reset counter after 1 hour
-    if current_time - st.session_state.last_request_time > 3600:
-        st.session_state.last_request_time = current_time
-        st.session_state.request_count = 1
-        return True
-
-    # Limit to 10 requests per hour
-    if st.session_state.request_count >= 10:
-        return False
 
-    st.session_state.request_count += 1
-    return True
+def rate_limit_message() -> str:
+    """Explain the last rejection from check_rate_limit"""
+    wait = math.ceil(st.session_state.get("rate_limit_retry_after", 0.0))
+    if wait <= 0:
+        return "Rate limit exceeded. Please wait before trying again."
+    if wait < 120:
+        return f"Rate limit exceeded. Please try again in {wait} seconds."
+    return f"Rate limit exceeded. Please try again in {math.ceil(wait / 60)} minutes."
 
 
 def init_session_state():
@@ -154,14 +292,17 @@ def init_session_state():
         st.session_state.current_params = None
     if 'current_strategy' not in st.session_state:
         st.session_state.current_strategy = None
-    if 'current_csv' not in st.session_state:
-        st.session_state.current_csv = None
+    if 'current_csv_digest' not in st.session_state:
+        st.session_state.current_csv_digest = None
+    if 'current_sweep' not in st.session_state:
+        st.session_state.current_sweep = None
 
 def clear_session_state():
     """Clear simulation-related session state variables"""
     st.session_state.current_params = None
     st.session_state.current_strategy = None
-    st.session_state.current_csv = None
+    st.session_state.current_csv_digest = None
+    st.session_state.current_sweep = None
     st.session_state.run_simulation = False
 
 
@@ -0,0 +1,69 @@
+"""
+Request coalescing ("singleflight").
+
+Concurrent calls for the same key share one execution: the first caller
+(the leader) runs the function, later callers wait for it and receive the
+same result or exception. Once the call completes, the key is free again,
+so this never serves stale results; caching is left to ResultCache.
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; counts leaders and collapsed calls"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() unless a call for key is already in flight, in which case
+        wait for that call instead. Returns (result, shared) where shared
+        is True for callers that received another caller's result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.collapsed += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException as e:
+            # The leader was interrupted (e.g. a Streamlit rerun); followers
+            # get an ordinary error rather than the control-flow exception
+            call.error = RuntimeError(f"The shared request was interrupted: {type(e).__name__}")
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
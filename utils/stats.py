@@ -0,0 +1,224 @@
+"""
+Mergeable statistics for combining per-batch simulation results.
+
+Each backend result summarizes one batch. ResultAccumulator folds batches
+together: mean and standard deviation with Chan's parallel form of
+Welford's update, end-state percentages as counts, and the balance
+distribution as a HistogramSketch from which median, IQR and MAD are read.
+Snapshots also carry the 95% confidence half-widths of the mean balance
+and of each end-state percentage.
+"""
+import json
+import math
+from typing import Any, Dict, Optional
+import numpy as np
+from config.settings import HISTOGRAM_MAX_BINS
+
+# Two-sided 95% normal quantile
+CONFIDENCE_Z = 1.96
+
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations; merges exactly"""
+
+    def __init__(self):
+        self.count = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def merge(self, count: float, mean: float, std: float):
+        """Fold in a batch summarized by (count, mean, population std)"""
+        if count <= 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += std * std * count + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class HistogramSketch:
+    """
+    Mergeable approximation of a distribution as counts over bin edges.
+    Values are assumed uniform within a bin, so the CDF is piecewise
+    linear; merging re-bins both sketches onto a common grid covering
+    their combined range.
+    """
+
+    def __init__(self, resolution: int = 4 * HISTOGRAM_MAX_BINS):
+        self.resolution = resolution
+        self.edges: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _cdf(edges: np.ndarray, counts: np.ndarray, points: np.ndarray) -> np.ndarray:
+        cumulative = np.concatenate(([0.0], np.cumsum(counts, dtype=float)))
+        return np.interp(points, edges, cumulative, left=0.0, right=cumulative[-1])
+
+    def merge(self, edges, counts):
+        """Add a histogram given by bin edges and counts"""
+        edges = np.asarray(edges, dtype=float)
+        counts = np.asarray(counts, dtype=float)
+        if counts.size == 0 or counts.sum() <= 0:
+            return
+        if self.edges is None:
+            low, high = edges[0], edges[-1]
+        else:
+            low, high = min(self.edges[0], edges[0]), max(self.edges[-1], edges[-1])
+        if high <= low:
+            high = low + 1.0
+
+        grid = np.linspace(low, high, self.resolution + 1)
+        merged = np.diff(self._cdf(edges, counts, grid))
+        if self.edges is not None:
+            merged += np.diff(self._cdf(self.edges, self.counts, grid))
+        self.edges, self.counts = grid, merged
+
+    @property
+    def total(self) -> float:
+        return float(self.counts.sum()) if self.counts is not None else 0.0
+
+    def quantile(self, q: float) -> float:
+        cumulative = np.concatenate(([0.0], np.cumsum(self.counts)))
+        return float(np.interp(q * cumulative[-1], cumulative, self.edges))
+
+    def mean_abs_deviation(self, center: float) -> float:
+        """Mean of |x - center|, evaluated at bin midpoints"""
+        midpoints = (self.edges[:-1] + self.edges[1:]) / 2
+        return float(np.sum(self.counts * np.abs(midpoints - center)) / self.total)
+
+    def median_abs_deviation(self, center: float) -> float:
+        """Median of |x - center| from the piecewise-linear CDF"""
+        distances = np.unique(np.abs(self.edges - center))
+        within = (self._cdf(self.edges, self.counts, center + distances)
+                  - self._cdf(self.edges, self.counts, center - distances))
+        return float(np.interp(0.5 * self.total, within, distances))
+
+    def to_bins(self) -> Dict[str, list]:
+        return {"edges": self.edges.tolist(), "counts": self.counts.round().astype(int).tolist()}
+
+
+def proportion_halfwidth(successes: float, trials: float) -> float:
+    """
+    95% half-width, in percentage points, of a proportion. Uses the
+    Agresti-Coull adjustment so that states seen 0 or n times still get
+    a nonzero width.
+    """
+    adjusted = trials + CONFIDENCE_Z ** 2
+    p = (successes + CONFIDENCE_Z ** 2 / 2) / adjusted
+    return 100.0 * CONFIDENCE_Z * math.sqrt(p * (1 - p) / adjusted)
+
+
+def result_histogram(results: Dict[str, Any]) -> Optional[Dict[str, list]]:
+    """Bin edges and counts from a result, whichever histogram form it carries"""
+    if results.get("histogram_bins"):
+        return results["histogram_bins"]
+
+    if results.get("histogram_plotly_json"):
+        trace = json.loads(results["histogram_plotly_json"])["data"][0]
+        if trace.get("type") == "histogram" and trace.get("x"):
+            counts, edges = np.histogram(np.asarray(trace["x"], dtype=float), bins=HISTOGRAM_MAX_BINS)
+            return {"edges": edges.tolist(), "counts": counts.tolist()}
+        if trace.get("type") == "bar" and trace.get("x") and trace.get("width"):
+            centers = np.asarray(trace["x"], dtype=float)
+            # A single width for every bar, or one per bar (as _bar_figure writes)
+            half = np.broadcast_to(np.asarray(trace["width"], dtype=float), centers.shape) / 2
+            return {"edges": np.append(centers - half, centers[-1] + half[-1]).tolist(), "counts": trace["y"]}
+
+    return None
+
+
+class ResultAccumulator:
+    """
+    Running combination of batch results in the display_results schema.
+    Balance statistics in a result describe the iterations matching the
+    condition_end_state filter, so batches are weighted by that count.
+    Without histograms, median, IQR and MAD fall back to count-weighted
+    averages of the batch values.
+    """
+
+    def __init__(self, condition_end_state: str = "All"):
+        self.condition_end_state = condition_end_state
+        self.iterations = 0
+        self.balance = RunningMoments()
+        self.sketch = HistogramSketch()
+        self.end_state_counts: Dict[str, float] = {}
+        self._weighted: Dict[str, float] = {}
+        # Set once any batch was computed locally (see api.engine_label)
+        self.local = False
+        self.fallback: Optional[str] = None
+
+    def _condition_count(self, results: Dict[str, Any], iterations: int) -> float:
+        if self.condition_end_state == "All":
+            return float(iterations)
+        percentage = results.get("end_state_percentages", {}).get(self.condition_end_state, 0.0)
+        return iterations * percentage / 100.0
+
+    def add(self, results: Dict[str, Any], iterations: int):
+        """Fold in the result of one batch of `iterations` iterations"""
+        self.iterations += iterations
+        if results.get("engine") == "local":
+            self.local = True
+            self.fallback = results.get("fallback") or self.fallback
+        for state, percentage in results.get("end_state_percentages", {}).items():
+            self.end_state_counts[state] = self.end_state_counts.get(state, 0.0) + iterations * percentage / 100.0
+
+        count = self._condition_count(results, iterations)
+        if count <= 0:
+            return
+        self.balance.merge(count, results["mean_balance"], results["std_dev"])
+        for key in ("positive_balance_percentage", "mean_days", "median_balance", "iqr", "mad", "mad_median"):
+            self._weighted[key] = self._weighted.get(key, 0.0) + count * results[key]
+
+        histogram = result_histogram(results)
+        if histogram:
+            self.sketch.merge(histogram["edges"], histogram["counts"])
+
+    def precision(self) -> Dict[str, Any]:
+        """95% confidence half-widths of the mean balance and the end-state percentages"""
+        count = self.balance.count
+        return {
+            "mean_balance": CONFIDENCE_Z * self.balance.std / math.sqrt(count) if count else math.inf,
+            "end_state_percentages": {
+                state: proportion_halfwidth(n, self.iterations) for state, n in self.end_state_counts.items()
+            },
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current estimate of the full-run result"""
+        weight = self.balance.count or 1.0
+        averaged = {key: value / weight for key, value in self._weighted.items()}
+
+        results = {
+            "mean_balance": self.balance.mean,
+            "std_dev": self.balance.std,
+            "positive_balance_percentage": averaged.get("positive_balance_percentage", 0.0),
+            "mean_days": averaged.get("mean_days", 0.0),
+            "end_state_percentages": {
+                state: 100.0 * count / self.iterations for state, count in self.end_state_counts.items()
+            } if self.iterations else {},
+            "iterations_completed": self.iterations,
+            "precision": self.precision(),
+        }
+        if self.local:
+            results["engine"] = "local"
+        if self.fallback:
+            results["fallback"] = self.fallback
+
+        if self.sketch.total > 0:
+            median = self.sketch.quantile(0.5)
+            results.update({
+                "median_balance": median,
+                "iqr": self.sketch.quantile(0.75) - self.sketch.quantile(0.25),
+                "mad": self.sketch.mean_abs_deviation(self.balance.mean),
+                "mad_median": self.sketch.median_abs_deviation(median),
+                "histogram_bins": self.sketch.to_bins(),
+            })
+        else:
+            for key in ("median_balance", "iqr", "mad", "mad_median"):
+                results[key] = averaged.get(key, 0.0)
+        return results
@@ -0,0 +1,189 @@
+import contextvars
+import itertools
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from config.settings import SWEEP_MAX_CONCURRENCY, SIMULATION_ENGINE
+from utils.api import batch_limit, engine_label, simulate, simulate_batch, SimulationError, TradeUpload
+from utils.history import record_run
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from utils.jobs import Job
+
+logger = logging.getLogger(__name__)
+
+# Strategy inputs that can be swept, mapped to their config keys
+SWEEP_PARAMETERS = {
+    "stop_loss": "Stop Loss (Ticks)",
+    "take_profit": "Take Profit (Ticks)",
+    "win_percentage": "Win Percentage",
+    "avg_trades_per_day": "Average Trades per Day",
+}
+
+# Columns filled by summarize_point
+SUMMARY_METRICS = ("mean_balance", "bust_rate", "max_payouts_rate")
+
+
+@dataclass
+class SweepPoint:
+    """Outcome of one grid point"""
+    index: int
+    config: Dict[str, Any]
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def value_range(start: float, stop: float, step: float) -> List[float]:
+    """Inclusive range of floats; a non-positive step yields just `start`"""
+    if step <= 0 or stop <= start:
+        return [float(start)]
+    count = int((stop - start) / step + 1e-9) + 1
+    return [round(start + i * step, 6) for i in range(count)]
+
+
+def build_sweep_grid(
+    base_config: Dict[str, Any],
+    ranges: Dict[str, List[float]]
+) -> List[Dict[str, Any]]:
+    """Cartesian product of the swept values, each merged into base_config"""
+    keys = list(ranges)
+    grid = []
+    for values in itertools.product(*(ranges[key] for key in keys)):
+        config = dict(base_config)
+        config.update(zip(keys, values))
+        grid.append(config)
+    return grid
+
+
+def summarize_point(results: Dict[str, Any]) -> Dict[str, float]:
+    """Headline metrics shown in the sweep table and heatmap"""
+    end_states = results.get("end_state_percentages", {})
+    return {
+        "mean_balance": results.get("mean_balance"),
+        "bust_rate": end_states.get("Busted", 0.0),
+        "max_payouts_rate": end_states.get("MaxPayouts", 0.0),
+    }
+
+
+def point_row(point: SweepPoint) -> Dict[str, Any]:
+    """Sweep table row: the point's swept inputs, metrics and engine (None if it failed)"""
+    row = {"point": point.index}
+    row.update({key: point.config[key] for key in SWEEP_PARAMETERS})
+    if point.results is not None:
+        row.update(summarize_point(point.results))
+        row["engine"] = engine_label(point.results)
+    else:
+        row.update(dict.fromkeys(SUMMARY_METRICS + ("engine",)))
+    return row
+
+
+def run_sweep(
+    configs: List[Dict[str, Any]],
+    csv_file: Optional[bytes] = None,
+    max_workers: int = SWEEP_MAX_CONCURRENCY,
+    cancel_event: Optional[threading.Event] = None,
+    engine: str = SIMULATION_ENGINE,
+    trades: Optional["pd.DataFrame"] = None,
+    upload: Optional[TradeUpload] = None
+) -> Iterator[SweepPoint]:
+    """
+    Run configs concurrently and yield each point as it completes.
+    At most `max_workers` requests are in flight (capped by
+    SWEEP_MAX_CONCURRENCY); points are submitted lazily so a cancelled
+    sweep never leaves queued work behind. With a batch-capable backend
+    each request carries several points (see simulate_batch), and its
+    points are yielded together.
+    upload: csv_file encoded once by prepare_upload() for all points.
+    """
+    max_workers = max(1, min(max_workers, SWEEP_MAX_CONCURRENCY))
+    cancel_event = cancel_event or threading.Event()
+
+    # Batches no larger than needed to keep every worker busy
+    size = 1
+    if engine != "local" and len(configs) > max_workers:
+        size = max(1, min(batch_limit(), math.ceil(len(configs) / max_workers)))
+    points = enumerate(configs)
+    remaining = iter(lambda: list(itertools.islice(points, size)), [])
+    pending = {}
+
+    def run(chunk: List[Any]) -> List[Any]:
+        if len(chunk) == 1:
+            return [simulate(chunk[0][1], csv_file, engine, trades, upload=upload)]
+        return simulate_batch([config for _, config in chunk], csv_file, engine, trades, upload=upload)
+
+    def submit_next(pool) -> bool:
+        if cancel_event.is_set():
+            return False
+        chunk = next(remaining, None)
+        if chunk is None:
+            return False
+        # Run in a copy of the caller's context so stage timings reach its collector
+        context = contextvars.copy_context()
+        future = pool.submit(context.run, run, chunk)
+        pending[future] = chunk
+        return True
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sweep")
+    try:
+        for _ in range(max_workers):
+            if not submit_next(pool):
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    outcomes = future.result()
+                except SimulationError as e:
+                    outcomes = [e] * len(chunk)
+                except Exception as e:
+                    logger.error(f"Sweep points {[index for index, _ in chunk]} failed: {str(e)}")
+                    outcomes = [e] * len(chunk)
+                for (index, config), outcome in zip(chunk, outcomes):
+                    if isinstance(outcome, Exception):
+                        yield SweepPoint(index, config, error=str(outcome))
+                    else:
+                        yield SweepPoint(index, config, results=outcome)
+                submit_next(pool)
+    finally:
+        # Reached on completion, cancellation, or when the consumer stops
+        # iterating (e.g. a Streamlit rerun interrupts the script)
+        cancel_event.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def grid_sweep_task(
+    configs: List[Dict[str, Any]],
+    max_workers: int = SWEEP_MAX_CONCURRENCY
+) -> Callable[["Job"], None]:
+    """
+    Job task (see JobQueue.submit) running every config with run_sweep on
+    job.engine. job.result is {"rows": point_row() per completed point,
+    "errors": failed points, "points": len(configs)}, refreshed as points
+    complete, so a stopped sweep keeps the points finished before it.
+    Every completed point is recorded in the run history.
+    """
+    def task(job: "Job"):
+        rows = []
+        errors = 0
+        # run_sweep sets the event it is given when it finishes, so the
+        # job's cancel_event is only read
+        stop = threading.Event()
+        for done, point in enumerate(run_sweep(configs, max_workers=max_workers, cancel_event=stop,
+                                               engine=job.engine), start=1):
+            if job.cancel_event.is_set():
+                stop.set()
+            rows.append(point_row(point))
+            errors += point.error is not None
+            if point.results is not None:
+                record_run(point.config, point.results, client=job.client)
+            # A new list each time: the script thread may be rendering the last one
+            job.result = {"rows": list(rows), "errors": errors, "points": len(configs)}
+            job.progress = done / len(configs)
+            job.progress_text = f"{done} / {len(configs)} points"
+    return task
@@ -0,0 +1,329 @@
+"""
+Content-addressed store for uploaded trade files.
+
+Sessions hold only the SHA-256 of their upload; the bytes are kept here
+once per process however many sessions uploaded the same file. Small files
+stay in memory. Files of UPLOAD_STORE_SPILL_MB or more, and the least
+recently used small ones once UPLOAD_STORE_MEMORY_MB is used up, live in
+UPLOAD_STORE_DIR and are read back memory-mapped, so they cost page cache
+rather than heap. Every read gets its own read-only view with no file
+position, so any number of requests can send the same content; a mapping
+is closed once the last reference to its view is dropped (e.g. when the
+job that holds it finishes).
+
+Each owner (a session's upload slot) references at most one file.
+Beyond UPLOAD_STORE_MAX_MB the least recently used unreferenced files
+are evicted first, then referenced ones. Streamlit does not report closed
+sessions, so a reference lapses after UPLOAD_STORE_IDLE_SECONDS unused.
+"""
+import glob
+import io
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+import streamlit as st
+from config.settings import (
+    UPLOAD_STORE_DIR,
+    UPLOAD_STORE_SPILL_MB,
+    UPLOAD_STORE_MEMORY_MB,
+    UPLOAD_STORE_MAX_MB,
+    UPLOAD_STORE_IDLE_SECONDS,
+)
+from utils.cache import hash_bytes
+from utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# What get() returns: bytes for files in memory, a read-only view of a
+# memory map for spilled ones. Neither has a file position to exhaust.
+Content = Union[bytes, memoryview]
+
+
+class _Entry:
+    __slots__ = ("digest", "size", "data", "path", "refs", "spilling")
+
+    def __init__(self, digest: str, size: int):
+        self.digest = digest
+        self.size = size
+        self.data: Optional[bytes] = None
+        self.path: Optional[str] = None
+        self.refs = 0
+        # Chosen to move to disk; being written outside the lock
+        self.spilling = False
+
+
+class StoredFile(io.BytesIO):
+    """In-memory file over stored content, with the .size of Streamlit's UploadedFile"""
+
+    @property
+    def size(self) -> int:
+        return len(self.getbuffer())
+
+
+class UploadStore:
+    """Deduplicating upload store with a memory tier, a disk tier and per-owner references"""
+
+    def __init__(
+        self,
+        directory: str = UPLOAD_STORE_DIR,
+        spill_bytes: int = int(UPLOAD_STORE_SPILL_MB * MB),
+        memory_bytes: int = int(UPLOAD_STORE_MEMORY_MB * MB),
+        max_bytes: int = int(UPLOAD_STORE_MAX_MB * MB),
+        idle_seconds: float = UPLOAD_STORE_IDLE_SECONDS
+    ):
+        self.directory = directory
+        self.spill_bytes = spill_bytes
+        self.memory_bytes = memory_bytes
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        # Least recently used first
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # owner -> (digest, last use)
+        self._owners: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.memory_used = 0
+        self.disk_used = 0
+        self.deduplicated = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        # Files of a previous process are not referenced by anyone
+        for path in glob.glob(os.path.join(directory, "*.upload")):
+            self._remove_file(path)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.upload")
+
+    def _write(self, digest: str, data: Content) -> str:
+        """Write content to its path atomically; concurrent writers of one digest agree"""
+        path = self._path(digest)
+        partial = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+        return path
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove stored upload {path}: {str(e)}")
+
+    def put(self, data: bytes, owner: str) -> str:
+        """
+        Store data (if its content is new) and make it owner's file,
+        releasing the file owner held before. Returns the content hash.
+        """
+        digest = hash_bytes(data)
+        with self._lock:
+            known = digest in self._entries
+
+        path = None
+        if not known and len(data) >= self.spill_bytes:
+            # Large files go straight to disk, written outside the lock
+            path = self._write(digest, data)
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                entry = self._entries[digest] = _Entry(digest, len(data))
+                if path is not None:
+                    entry.path = path
+                    self.disk_used += entry.size
+                else:
+                    entry.data = bytes(data)
+                    self.memory_used += entry.size
+            else:
+                self.deduplicated += 1
+                get_registry().increment("upload_store_deduplicated_total")
+            self._entries.move_to_end(digest)
+            self._assign(owner, digest)
+            spills = self._enforce_limits()
+        self._spill(spills)
+        return digest
+
+    def get(self, digest: str, owner: Optional[str] = None) -> Optional[Content]:
+        """
+        Content of a stored file, or None if it was evicted. Spilled files
+        come back as a read-only view of a fresh memory map, unmapped once
+        the view is dropped. owner: refreshes that owner's reference so it
+        does not lapse while in use.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            self._entries.move_to_end(digest)
+            if owner is not None and self._owners.get(owner, ("",))[0] == digest:
+                self._owners[owner] = (digest, time.monotonic())
+            if entry.data is not None:
+                return entry.data
+            path = entry.path
+        try:
+            with open(path, "rb") as f:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError) as e:
+            logger.error(f"Stored upload {digest[:16]} is unreadable: {str(e)}")
+            with self._lock:
+                if self._entries.get(digest) is entry:
+                    self._evict(entry)
+            return None
+
+    def open(self, digest: str) -> Optional[StoredFile]:
+        """Stored content as a file object for parsers, or None if it was evicted"""
+        data = self.get(digest)
+        return StoredFile(data) if data is not None else None
+
+    def touch(self, owner: str) -> Optional[str]:
+        """Keep owner's reference alive; returns its digest, or None if it has none"""
+        with self._lock:
+            held = self._owners.get(owner)
+            if held is None or held[0] not in self._entries:
+                return None
+            self._owners[owner] = (held[0], time.monotonic())
+            self._entries.move_to_end(held[0])
+            return held[0]
+
+    def release(self, owner: str):
+        """Drop owner's reference; the file stays until limits evict it"""
+        with self._lock:
+            self._assign(owner, None)
+
+    def _assign(self, owner: str, digest: Optional[str]):
+        """Point owner at digest, moving its reference; caller holds the lock"""
+        held = self._owners.pop(owner, None)
+        if held is not None and held[0] in self._entries:
+            self._entries[held[0]].refs -= 1
+        if digest is not None:
+            self._entries[digest].refs += 1
+            self._owners[owner] = (digest, time.monotonic())
+
+    def _evict(self, entry: _Entry):
+        """Remove an entry; caller holds the lock"""
+        del self._entries[entry.digest]
+        if entry.data is not None:
+            self.memory_used -= entry.size
+        if entry.path is not None:
+            self.disk_used -= entry.size
+            self._remove_file(entry.path)
+        self.evictions += 1
+        get_registry().increment("upload_store_evictions_total")
+
+    def _enforce_limits(self) -> List[_Entry]:
+        """
+        Lapse idle references, evict beyond the total, and choose the files
+        to spill beyond the memory budget; caller holds the lock. Returns
+        the files to pass to _spill() once the lock is released.
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        for owner, (_, last_used) in list(self._owners.items()):
+            if last_used < cutoff:
+                self._assign(owner, None)
+
+        # Unreferenced files go first; referenced ones only if that is not enough
+        for referenced in (False, True):
+            for entry in list(self._entries.values()):
+                if self.memory_used + self.disk_used <= self.max_bytes:
+                    break
+                if (entry.refs > 0) == referenced:
+                    self._evict(entry)
+
+        # Files already being written by another put() count as spilled
+        memory_used = self.memory_used - sum(e.size for e in self._entries.values() if e.spilling)
+        spills = []
+        for entry in self._entries.values():
+            if memory_used <= self.memory_bytes:
+                break
+            if entry.data is not None and not entry.spilling:
+                entry.spilling = True
+                memory_used -= entry.size
+                spills.append(entry)
+        return spills
+
+    def _spill(self, entries: List[_Entry]):
+        """Move files chosen by _enforce_limits() to disk; called without the lock"""
+        for entry in entries:
+            try:
+                path = self._write(entry.digest, entry.data)
+            except OSError as e:
+                logger.error(f"Could not spill stored upload {entry.digest[:16]}: {str(e)}")
+                with self._lock:
+                    entry.spilling = False
+                continue
+            with self._lock:
+                entry.spilling = False
+                current = self._entries.get(entry.digest)
+                if current is entry:
+                    entry.path = path
+                    entry.data = None
+                    self.memory_used -= entry.size
+                    self.disk_used += entry.size
+                elif current is None or current.path != path:
+                    # Evicted while it was being written
+                    self._remove_file(path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "owners": len(self._owners),
+                "memory_bytes": self.memory_used,
+                "disk_bytes": self.disk_used,
+                "deduplicated": self.deduplicated,
+                "evictions": self.evictions,
+            }
+
+
+_store: Optional[UploadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Return the process-wide upload store, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UploadStore()
+    return _store
+
+
+def _owner(slot: str) -> str:
+    """Owner id of this session's upload slot"""
+    if "upload_session" not in st.session_state:
+        st.session_state.upload_session = uuid.uuid4().hex
+    return f"{st.session_state.upload_session}:{slot}"
+
+
+def store_upload(slot: str, file) -> str:
+    """
+    Put a Streamlit UploadedFile in the store, once per upload, and make it
+    this session's file for slot. Returns its content hash, the only thing
+    the session needs to keep.
+    """
+    owner = _owner(slot)
+    remembered = st.session_state.get(f"{slot}_upload")
+    if remembered and remembered[0] == file.file_id and get_upload_store().touch(owner) == remembered[1]:
+        return remembered[1]
+    digest = get_upload_store().put(file.getvalue(), owner)
+    st.session_state[f"{slot}_upload"] = (file.file_id, digest)
+    return digest
+
+
+def release_upload(slot: str):
+    """Forget this session's file for slot (e.g. the uploader was cleared)"""
+    st.session_state.pop(f"{slot}_upload", None)
+    get_upload_store().release(_owner(slot))
+
+
+def load_upload(slot: str, digest: str) -> Optional[Content]:
+    """Content of this session's stored file, or None if it has been evicted"""
+    return get_upload_store().get(digest, _owner(slot))